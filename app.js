@@ -7,6 +7,8 @@ let currentNOAAMetric = 'loss'; // 'loss' or 'fatalities'
 let dashboardData = {};
 let nriData = {};
 let statesGeoJSON;
+let boundaryLevel = null; // TopoJSON level of detail in use, null for plain GeoJSON
+let datasetManifest = {};
 let selectedEvents = new Set();
 let selectedState = null;
 let nriChartInstances = {};
@@ -412,6 +414,7 @@ document.addEventListener('DOMContentLoaded', async () => {
     }).addTo(map);
 
     await loadData();
+    map.on('zoomend', refreshBoundaries);
     initializeSlider();
     initializeDropdown();
     initializeNOAAMetricToggle();
@@ -440,21 +443,198 @@ document.addEventListener('DOMContentLoaded', async () => {
 });
 
 
+// The manifest maps each dataset to a content hash written at preprocessing
+// time, so unchanged files stay in the browser cache across visits.
+async function loadDatasetManifest() {
+    try {
+        const response = await fetch('datasets/manifest.json', { cache: 'no-cache' });
+        return response.ok ? await response.json() : {};
+    } catch (error) {
+        console.warn("Dataset manifest unavailable, falling back to uncached loads", error);
+        return {};
+    }
+}
+
+function datasetUrl(name, manifest) {
+    const entry = manifest[name];
+    const version = entry ? entry.hash : new Date().getTime();
+    return `datasets/${name}?v=${version}`;
+}
+
+// Decoder for the columnar .bin twins written by
+// preprocessing/columnar_dataset.py: a JSON header followed by 8-byte
+// aligned little-endian columns, viewed in place as typed arrays.
+const COLUMNAR_MAGIC = "DDCOL";
+const COLUMNAR_TYPES = {
+    'u1': Uint8Array, 'u2': Uint16Array, 'u4': Uint32Array, 'u8': BigUint64Array,
+    'i1': Int8Array, 'i2': Int16Array, 'i4': Int32Array, 'i8': BigInt64Array,
+    'f4': Float32Array, 'f8': Float64Array
+};
+
+function decodeColumnarDataset(buffer) {
+    const bytes = new Uint8Array(buffer);
+    if (String.fromCharCode(...bytes.subarray(0, COLUMNAR_MAGIC.length)) !== COLUMNAR_MAGIC) {
+        throw new Error("Not a columnar dataset");
+    }
+    const headerStart = 12;
+    const headerLength = new DataView(buffer).getUint32(8, true);
+    const header = JSON.parse(new TextDecoder().decode(bytes.subarray(headerStart, headerStart + headerLength)));
+
+    const cols = {};
+    for (const [name, spec] of Object.entries(header.columns)) {
+        const ArrayType = COLUMNAR_TYPES[spec.dtype.slice(1)];
+        const count = spec.shape.reduce((a, b) => a * b, 1);
+        const column = new ArrayType(buffer, spec.offset, count);
+        // 64-bit integer columns come back as BigInt; the dashboard wants numbers
+        cols[name] = (column instanceof BigInt64Array || column instanceof BigUint64Array)
+            ? Array.from(column, Number) : column;
+    }
+
+    const strings = header.strings;
+    const fields = header.event_fields;
+    const eventColumn = field => {
+        if (field === 'type') return cols.event_type;
+        if (field === 'name') return cols.event_name || cols.event_type;
+        return cols[`event_${field}`];
+    };
+    const fieldColumns = fields.map(eventColumn);
+    const coded = fields.map(field => field === 'type' || field === 'name');
+
+    const nested = {};
+    header.years.forEach(year => { nested[year] = {}; });
+    const offsets = cols.group_offsets;
+    const top = cols.group_top_events;
+    for (let g = 0; g < cols.group_year.length; g++) {
+        const events = [];
+        for (let e = offsets[g]; e < offsets[g + 1]; e++) {
+            const event = {};
+            for (let f = 0; f < fields.length; f++) {
+                const value = fieldColumns[f][e];
+                event[fields[f]] = coded[f] ? strings[value] : value;
+            }
+            events.push(event);
+        }
+
+        const stateData = { loss: cols.group_loss[g], fatalities: cols.group_fatalities[g] };
+        if (top) {
+            stateData.top_events = Array.from(top.subarray(g * 3, g * 3 + 3)).filter(c => c >= 0).map(c => strings[c]);
+        }
+        stateData.events = events;
+        nested[header.years[cols.group_year[g]]][header.states[cols.group_state[g]]] = stateData;
+    }
+
+    if (!header.events_key) return nested;
+    return { [header.events_key]: nested, ...header.extra };
+}
+
+// Loads a JSON dataset, preferring its columnar .bin twin when the
+// manifest lists one (smaller to download and cheaper to parse).
+async function fetchDataset(name, manifest) {
+    const columnarName = name.replace(/\.json$/, '.bin');
+    if (manifest[columnarName]) {
+        try {
+            const response = await fetch(datasetUrl(columnarName, manifest));
+            if (response.ok) {
+                return decodeColumnarDataset(await response.arrayBuffer());
+            }
+        } catch (error) {
+            console.warn(`Columnar ${columnarName} unavailable, falling back to JSON`, error);
+        }
+    }
+    const response = await fetch(datasetUrl(name, manifest));
+    return response.json();
+}
+
+// Decodes a quantized, delta-encoded TopoJSON object (as written by
+// preprocessing/topology.py) into a GeoJSON FeatureCollection.
+function topologyToGeoJSON(topology) {
+    const [kx, ky] = topology.transform.scale;
+    const [tx, ty] = topology.transform.translate;
+    const arcs = topology.arcs.map(arc => {
+        let x = 0, y = 0;
+        return arc.map(([dx, dy]) => {
+            x += dx;
+            y += dy;
+            return [x * kx + tx, y * ky + ty];
+        });
+    });
+
+    const ring = refs => {
+        const coords = [];
+        refs.forEach(ref => {
+            const points = ref >= 0 ? arcs[ref] : arcs[~ref].slice().reverse();
+            coords.push(...(coords.length ? points.slice(1) : points));
+        });
+        return coords;
+    };
+
+    const collection = Object.values(topology.objects)[0];
+    return {
+        type: 'FeatureCollection',
+        features: collection.geometries.map(geometry => ({
+            type: 'Feature',
+            id: geometry.id,
+            properties: geometry.properties || {},
+            geometry: {
+                type: geometry.type,
+                coordinates: geometry.type === 'Polygon'
+                    ? geometry.arcs.map(ring)
+                    : geometry.arcs.map(polygon => polygon.map(ring))
+            }
+        }))
+    };
+}
+
+// Fetches state boundaries. When preprocessing/topology.py has written
+// TopoJSON levels of detail, the server picks the one for this zoom;
+// otherwise the full GeoJSON is used. Returns null if the server picked
+// `currentLevel` again, so callers can keep the shapes they have.
+async function fetchBoundaries(manifest, zoom, currentLevel = null) {
+    const levels = Object.keys(manifest).filter(key => key.startsWith('us-states-') && key.endsWith('.topo.json'));
+    if (levels.length) {
+        try {
+            const version = levels.sort().map(key => manifest[key].hash).join('.');
+            const response = await fetch(`datasets/us-states.topo.json?zoom=${Math.floor(zoom)}&v=${version}`);
+            if (response.ok) {
+                const level = response.headers.get('X-Detail-Level');
+                if (level && level === currentLevel) return null;
+                return { geojson: topologyToGeoJSON(await response.json()), level };
+            }
+        } catch (error) {
+            console.warn("TopoJSON boundaries unavailable, falling back to GeoJSON", error);
+        }
+    }
+    const response = await fetch(datasetUrl('us-states.json', manifest));
+    return { geojson: await response.json(), level: null };
+}
+
+async function refreshBoundaries() {
+    if (!boundaryLevel) return;
+    const zoom = map.getZoom();
+    const boundaries = await fetchBoundaries(datasetManifest, zoom, boundaryLevel);
+    // Drop answers overtaken by a later zoom
+    if (!boundaries || map.getZoom() !== zoom) return;
+    statesGeoJSON = boundaries.geojson;
+    boundaryLevel = boundaries.level;
+    updateMapLayer();
+}
+
 async function loadData() {
     try {
-        const timestamp = new Date().getTime();
-        const [dataResponse, nriResponse, geojsonResponse, predictionsResponse] = await Promise.all([
-            fetch(`datasets/noaa_data.json?v=${timestamp}`),
-            fetch(`datasets/nri_data.json?v=${timestamp}`),
-            fetch(`datasets/us-states.json?v=${timestamp}`),
-            fetch(`datasets/predictions_data.json?v=${timestamp}`)
+        const manifest = await loadDatasetManifest();
+        datasetManifest = manifest;
+        const [noaaData, nriResponse, boundaries, predictionsData] = await Promise.all([
+            fetchDataset('noaa_data.json', manifest),
+            fetch(datasetUrl('nri_data.json', manifest)),
+            fetchBoundaries(manifest, map.getZoom()),
+            fetchDataset('predictions_data.json', manifest)
         ]);
-        dashboardData = await dataResponse.json();
+        dashboardData = noaaData;
         nriData = await nriResponse.json();
-        statesGeoJSON = await geojsonResponse.json();
+        statesGeoJSON = boundaries.geojson;
+        boundaryLevel = boundaries.level;
 
         // Load predictions data
-        const predictionsData = await predictionsResponse.json();
         dashboardData.projections = predictionsData;
 
         console.log("Data loaded successfully", dashboardData);
@@ -1043,7 +1223,7 @@ function updateHistoricalDetails(stateName) {
         });
     }
 
-    updatePrediction(stateName);
+    updatePrediction(stateName).catch(error => console.error("Prediction update failed", error));
 
     // Safety tips based on top hazard
     const safetyListElem = document.getElementById('safety-list');
@@ -1101,55 +1281,82 @@ function updateRiskDetails(stateName) {
 }
 
 
-function updatePrediction(stateName) {
-    const lossElem = document.getElementById('pred-loss');
-    const fatalitiesElem = document.getElementById('pred-fatalities');
+// Yearly loss/fatality totals (2000-2024) for the selected events, national
+// or for one state. Served by /api/aggregate when the server has the NOAA
+// cube loaded, otherwise computed by scanning dashboardData.historical.
+let aggregateApiAvailable = true;
 
-    if (!dashboardData.historical) {
-        lossElem.textContent = 'N/A';
-        fatalitiesElem.textContent = 'N/A';
-        return;
+async function getYearlySeries(stateName) {
+    if (aggregateApiAvailable) {
+        const params = new URLSearchParams({
+            years: '2000-2024',
+            events: [...selectedEvents].join(',')
+        });
+        if (stateName) params.set('states', stateName);
+
+        try {
+            const response = await fetch(`/api/aggregate/yearly?${params}`);
+            if (response.ok) return await response.json();
+        } catch (error) {
+            console.warn("Aggregate API unavailable, aggregating in the browser", error);
+        }
+        aggregateApiAvailable = false;
     }
+    return computeYearlySeries(stateName);
+}
 
-    const years = [];
-    const losses = [];
-    const fatalities = [];
+function computeYearlySeries(stateName) {
+    const series = { years: [], loss: [], fatalities: [] };
+    if (!dashboardData.historical) return series;
+
+    const addEvents = (stateData, totals) => {
+        if (stateData && stateData.events && Array.isArray(stateData.events)) {
+            stateData.events.forEach(event => {
+                if (selectedEvents.has(event.type)) {
+                    totals.loss += event.loss || 0;
+                    totals.fatalities += event.fatalities || 0;
+                }
+            });
+        }
+    };
 
     for (let year = 2000; year <= 2024; year++) {
-        if (dashboardData.historical[year]) {
-            let yearLoss = 0;
-            let yearFatalities = 0;
+        const yearData = dashboardData.historical[year];
+        if (!yearData) continue;
 
-            if (stateName) {
-                const stateData = dashboardData.historical[year][stateName];
-                if (stateData && stateData.events) {
-                    stateData.events.forEach(event => {
-                        if (selectedEvents.has(event.type)) {
-                            yearLoss += event.loss || 0;
-                            yearFatalities += event.fatalities || 0;
-                        }
-                    });
-                }
-            } else {
-                // National
-                for (const state in dashboardData.historical[year]) {
-                    const stateData = dashboardData.historical[year][state];
-                    if (stateData.events) {
-                        stateData.events.forEach(event => {
-                            if (selectedEvents.has(event.type)) {
-                                yearLoss += event.loss || 0;
-                                yearFatalities += event.fatalities || 0;
-                            }
-                        });
-                    }
-                }
+        const totals = { loss: 0, fatalities: 0 };
+        if (stateName) {
+            addEvents(yearData[stateName], totals);
+        } else {
+            // National
+            for (const state in yearData) {
+                addEvents(yearData[state], totals);
             }
-
-            years.push(year);
-            losses.push(yearLoss);
-            fatalities.push(yearFatalities);
         }
+
+        series.years.push(year);
+        series.loss.push(totals.loss);
+        series.fatalities.push(totals.fatalities);
     }
+    return series;
+}
+
+// Incremented per call, so answers overtaken by a later selection are dropped
+let predictionRequest = 0;
+
+async function updatePrediction(stateName) {
+    const request = ++predictionRequest;
+    const lossElem = document.getElementById('pred-loss');
+    const fatalitiesElem = document.getElementById('pred-fatalities');
+
+    if (!dashboardData.historical) {
+        lossElem.textContent = 'N/A';
+        fatalitiesElem.textContent = 'N/A';
+        return;
+    }
+
+    const { years, loss: losses, fatalities } = await getYearlySeries(stateName);
+    if (request !== predictionRequest) return;
 
     if (years.length < 5) {
         lossElem.textContent = 'Insufficient Data';
@@ -1190,7 +1397,7 @@ function updateCharts(stateName = null) {
     }
     updateMonthlyChart(stateName);
     updateEventDistChart(stateName);
-    updateBenchmarkChart(stateName);
+    updateBenchmarkChart(stateName).catch(error => console.error("Benchmark chart update failed", error));
 }
 
 function updateMonthlyChart(stateName) {
@@ -1345,7 +1552,12 @@ function updateEventDistChart(stateName) {
 }
 
 
-function updateBenchmarkChart(stateName) {
+// Incremented by both benchmark chart views, so a historical chart whose
+// data arrives after a later selection (or view switch) is not drawn
+let benchmarkRequest = 0;
+
+async function updateBenchmarkChart(stateName) {
+    const request = ++benchmarkRequest;
     const ctx = document.getElementById('benchmark-chart');
     const yearlyTotals = {};
     const metricIsFatalities = (currentNOAAMetric === 'fatalities');
@@ -1363,32 +1575,13 @@ function updateBenchmarkChart(stateName) {
     }
 
     if (dashboardData.historical) {
-        for (const year in dashboardData.historical) {
-            const y = parseInt(year);
-            const yearData = dashboardData.historical[year];
-
-            const processState = (sData) => {
-                if (sData.events && Array.isArray(sData.events)) {
-                    sData.events.forEach(event => {
-                        if (selectedEvents.has(event.type)) {
-                            if (metricIsFatalities) {
-                                yearlyTotals[y] += event.fatalities || 0;
-                            } else {
-                                yearlyTotals[y] += (event.loss || 0) / 1e6; // Millions
-                            }
-                        }
-                    });
-                }
-            };
-
-            if (stateName) {
-                if (yearData[stateName]) processState(yearData[stateName]);
-            } else {
-                for (const state in yearData) {
-                    processState(yearData[state]);
-                }
-            }
-        }
+        const series = await getYearlySeries(stateName);
+        if (request !== benchmarkRequest) return;
+        series.years.forEach((year, i) => {
+            yearlyTotals[year] = metricIsFatalities
+                ? series.fatalities[i]
+                : series.loss[i] / 1e6; // Millions
+        });
     }
 
     const labels = Object.keys(yearlyTotals);
@@ -2195,10 +2388,21 @@ function initializeChatbot() {
                 },
                 body: JSON.stringify({
                     message: message,
-                    context: context
+                    context: context,
+                    stream: true
                 })
             });
 
+            // Streaming servers answer with SSE; render tokens into the
+            // loading bubble as they arrive
+            const contentType = response.headers.get('Content-Type') || '';
+            if (response.body && contentType.startsWith('text/event-stream')) {
+                const streamMsg = document.getElementById(loadingId);
+                if (streamMsg) streamMsg.removeAttribute('id');
+                await readChatStream(response, streamMsg);
+                return;
+            }
+
             const data = await response.json();
 
             // Remove Loading Indicator
@@ -2220,6 +2424,39 @@ function initializeChatbot() {
         }
     }
 
+    async function readChatStream(response, messageElem) {
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        let answer = '';
+
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, { stream: true });
+
+            let boundary;
+            while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+                const rawEvent = buffer.slice(0, boundary);
+                buffer = buffer.slice(boundary + 2);
+
+                const dataLine = rawEvent.split('\n').find(line => line.startsWith('data:'));
+                if (!dataLine) continue;
+                const event = JSON.parse(dataLine.slice(5));
+
+                if (event.error) {
+                    messageElem.innerHTML = "Error: " + event.error;
+                    return;
+                }
+                if (event.token) {
+                    answer += event.token;
+                    messageElem.innerHTML = answer; // Allow HTML in responses
+                    chatbotMessages.scrollTop = chatbotMessages.scrollHeight;
+                }
+            }
+        }
+    }
+
     chatbotSend.addEventListener('click', sendMessage);
     chatbotInput.addEventListener('keypress', (e) => {
         if (e.key === 'Enter') sendMessage();
@@ -2460,6 +2697,7 @@ function updateEventDistChartProjections(stateName) {
 }
 
 function updateBenchmarkChartProjections(stateName) {
+    benchmarkRequest++;
     const ctx = document.getElementById('benchmark-chart');
     const yearlyTotals = {};
     const metricIsFatalities = (currentNOAAMetric === 'fatalities');
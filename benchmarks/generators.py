@@ -0,0 +1,225 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+# Synthetic inputs for run_benchmarks.py. Everything is seeded, so a given
+# size always produces the same files, and large sizes are written in
+# chunks so generating 100x inputs doesn't need 100x the memory.
+
+CHUNK_ROWS = 1_000_000
+
+STATES = [
+    "ALABAMA", "ALASKA", "ARIZONA", "ARKANSAS", "CALIFORNIA", "COLORADO", "CONNECTICUT", "DELAWARE",
+    "DISTRICT OF COLUMBIA", "FLORIDA", "GEORGIA", "HAWAII", "IDAHO", "ILLINOIS", "INDIANA", "IOWA",
+    "KANSAS", "KENTUCKY", "LOUISIANA", "MAINE", "MARYLAND", "MASSACHUSETTS", "MICHIGAN", "MINNESOTA",
+    "MISSISSIPPI", "MISSOURI", "MONTANA", "NEBRASKA", "NEVADA", "NEW HAMPSHIRE", "NEW JERSEY",
+    "NEW MEXICO", "NEW YORK", "NORTH CAROLINA", "NORTH DAKOTA", "OHIO", "OKLAHOMA", "OREGON",
+    "PENNSYLVANIA", "RHODE ISLAND", "SOUTH CAROLINA", "SOUTH DAKOTA", "TENNESSEE", "TEXAS", "UTAH",
+    "VERMONT", "VIRGINIA", "WASHINGTON", "WEST VIRGINIA", "WISCONSIN", "WYOMING", "PUERTO RICO",
+    "GUAM", "VIRGIN ISLANDS", "AMERICAN SAMOA", "GULF OF MEXICO", "ATLANTIC SOUTH", "LAKE MICHIGAN"
+]
+
+EVENT_TYPES = [
+    "Thunderstorm Wind", "Hail", "Flash Flood", "Flood", "Tornado", "High Wind", "Winter Storm",
+    "Heavy Snow", "Drought", "Heat", "Excessive Heat", "Wildfire", "Lightning", "Strong Wind",
+    "Heavy Rain", "Winter Weather", "Blizzard", "Ice Storm", "Frost/Freeze", "Cold/Wind Chill",
+    "Extreme Cold/Wind Chill", "Hurricane (Typhoon)", "Tropical Storm", "Storm Surge/Tide",
+    "Coastal Flood", "Rip Current", "High Surf", "Dense Fog", "Dust Storm", "Avalanche",
+    "Waterspout", "Marine Thunderstorm Wind", "Lake-Effect Snow", "Debris Flow", "Funnel Cloud",
+    "Tropical Depression", "Lakeshore Flood", "Sleet", "Freezing Fog", "Dust Devil",
+    "Astronomical Low Tide", "Seiche", "Volcanic Ash", "Tsunami", "Sneakerwave", "Marine Hail",
+    "Marine High Wind", "Marine Strong Wind"
+]
+
+HAZARD_PREFIXES = ['RFLD', 'HRCN', 'WFIR', 'ERQK', 'TRND', 'CFLD', 'SWND', 'HAIL']
+
+FEATURE_COLUMNS = [
+    'disaster_type_flood', 'disaster_type_wind', 'magnitude_normalized', 'duration_hours',
+    'season_month', 'season_quarter', 'is_urban', 'population_density_log',
+    'gdp_per_capita_normalized', 'historical_disaster_frequency', 'preparedness_index',
+    'early_warning_system_level', 'healthcare_access_index', 'past_response_time_hours'
+]
+REGRESSION_TARGETS = [
+    'total_population_affected', 'total_fatalities', 'total_injuries', 'total_socio_economic_loss'
+]
+
+def noaa_frame(n, rng):
+    # Most events cause no damage; the rest have a long-tailed loss
+    damaging = rng.random(n) < 0.3
+    loss = np.where(damaging, np.round(rng.lognormal(9, 2.5, n)), 0.0)
+    fatalities = np.where(rng.random(n) < 0.01, rng.integers(1, 5, n), 0).astype(float)
+    month = rng.integers(1, 13, n).astype(float)
+    month[rng.random(n) < 0.001] = np.nan
+    return pd.DataFrame({
+        'year': rng.integers(2000, 2025, n),
+        'month': month,
+        'state': np.array(STATES, dtype=object)[rng.integers(0, len(STATES), n)],
+        'disaster_name': np.array(EVENT_TYPES, dtype=object)[rng.zipf(1.6, n).clip(1, len(EVENT_TYPES)) - 1],
+        'loss': loss,
+        'fatalities': fatalities
+    })
+
+def write_noaa_csv(path, rows, seed=0):
+    """
+    NOAA storm events in the US_Disasters_2000_2024.csv layout read by
+    preprocess_noaa_data.py.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    rng = np.random.default_rng(seed)
+    written = 0
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        while written < rows:
+            n = min(CHUNK_ROWS, rows - written)
+            noaa_frame(n, rng).to_csv(f, header=written == 0, index=False)
+            written += n
+
+def write_predictions_csv(path, rows, seed=0):
+    """
+    Monthly prediction rows in the US_Disasters_Prediction_2025.csv layout.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    rng = np.random.default_rng(seed)
+    pd.DataFrame({
+        'year': 2025,
+        'month': rng.integers(1, 13, rows),
+        'STATE': np.array(STATES, dtype=object)[rng.integers(0, len(STATES), rows)],
+        'predicted_fatalities': np.where(rng.random(rows) < 0.1, rng.integers(1, 4, rows), 0),
+        'predicted_loss': np.round(rng.lognormal(9, 2, rows)),
+        'most_likely_disaster': np.array(EVENT_TYPES, dtype=object)[rng.integers(0, len(EVENT_TYPES), rows)]
+    }).to_csv(path, index=False)
+
+def fixed_width(values, width, fmt=None, left=False):
+    text = np.char.mod(fmt, values) if fmt else np.asarray(values, dtype=str)
+    text = np.char.ljust(text, width) if left else np.char.rjust(text, width)
+    return np.char.encode(text, 'ascii').astype(f'S{width}')
+
+def write_nri_shapefile(base, tracts, seed=0):
+    """
+    Writes base.dbf/.shp/.shx like the NRI census tract shapefile: one
+    rectangular polygon per tract, ~2% deleted DBF records and ~5% blank
+    numeric fields, with the columns preprocess_nri_data.py reads.
+    """
+    os.makedirs(os.path.dirname(base), exist_ok=True)
+    rng = np.random.default_rng(seed)
+    n = tracts
+
+    state = rng.integers(0, 56, n)
+    county = rng.integers(1, 100, n) * 2 + 1
+    tract_fips = (state + 1) * 10**9 + county * 10**6 + rng.integers(0, 10**6, n)
+    cx = -125 + (state + 0.5) / 56 * 58 + rng.normal(0, 0.8, n)
+    cy = 25 + county / 200 * 24 + rng.normal(0, 0.4, n)
+    half = rng.exponential(0.03, (n, 2)) + 1e-4
+    bbox = np.column_stack([cx - half[:, 0], cy - half[:, 1], cx + half[:, 0], cy + half[:, 1]])
+
+    # DBF: fixed-width records assembled column by column
+    fields = [('TRACTFIPS', 'C', 11, 0), ('STATE', 'C', 20, 0), ('COUNTY', 'C', 30, 0),
+              ('RISK_SCORE', 'N', 19, 11), ('SOVI_SCORE', 'N', 19, 11), ('RESL_SCORE', 'N', 19, 11),
+              ('EAL_VALT', 'N', 24, 6)]
+    fields += [(f'{p}_{kind}', 'N', 24, 6) for p in HAZARD_PREFIXES for kind in ('EALB', 'EALA')]
+
+    records = np.zeros(n, dtype=[('_deleted', 'S1')] + [(name, f'S{length}') for name, _, length, _ in fields])
+    records['_deleted'] = np.where(rng.random(n) < 0.02, b'*', b' ')
+    records['TRACTFIPS'] = fixed_width(tract_fips, 11, '%011d')
+    records['STATE'] = fixed_width(np.array([s.title() for s in STATES])[state], 20, left=True)
+    records['COUNTY'] = fixed_width(county, 30, 'County %d', left=True)
+    for name, kind, length, decimals in fields:
+        if kind == 'N':
+            values = fixed_width(rng.random(n) * 100, length, f'%.{decimals}f')
+            values[rng.random(n) < 0.05] = b' ' * length
+            records[name] = values
+
+    recordlen = records.dtype.itemsize
+    headerlen = 32 + 32 * len(fields) + 1
+    with open(base + '.dbf', 'wb') as f:
+        header = np.zeros(32, dtype=np.uint8)
+        header[:4] = (3, 124, 1, 1)
+        header[4:8] = np.frombuffer(np.uint32(n).tobytes(), np.uint8)
+        header[8:10] = np.frombuffer(np.uint16(headerlen).tobytes(), np.uint8)
+        header[10:12] = np.frombuffer(np.uint16(recordlen).tobytes(), np.uint8)
+        f.write(header.tobytes())
+        for name, kind, length, decimals in fields:
+            descriptor = np.zeros(32, dtype=np.uint8)
+            descriptor[:len(name)] = np.frombuffer(name.encode(), np.uint8)
+            descriptor[11] = ord(kind)
+            descriptor[16:18] = (length, decimals)
+            f.write(descriptor.tobytes())
+        f.write(b'\r')
+        f.write(records.tobytes())
+        f.write(b'\x1a')
+
+    # SHP/SHX: every record is a closed 5-point ring, so all have one size
+    shp_records = np.zeros(n, dtype=[
+        ('number', '>i4'), ('length', '>i4'), ('shape_type', '<i4'), ('bbox', '<f8', 4),
+        ('num_parts', '<i4'), ('num_points', '<i4'), ('part', '<i4'), ('points', '<f8', (5, 2))
+    ])
+    content_words = (shp_records.dtype.itemsize - 8) // 2
+    shp_records['number'] = np.arange(1, n + 1)
+    shp_records['length'] = content_words
+    shp_records['shape_type'] = 5
+    shp_records['bbox'] = bbox
+    shp_records['num_parts'] = 1
+    shp_records['num_points'] = 5
+    x0, y0, x1, y1 = bbox.T
+    shp_records['points'] = np.stack([
+        np.column_stack(p) for p in ((x0, y0), (x0, y1), (x1, y1), (x1, y0), (x0, y0))
+    ], axis=1)
+
+    index = np.zeros(n, dtype=[('offset', '>i4'), ('length', '>i4')])
+    index['offset'] = 50 + np.arange(n) * (shp_records.dtype.itemsize // 2)
+    index['length'] = content_words
+
+    def shape_header(file_words):
+        header = np.zeros(1, dtype=[('code', '>i4'), ('unused', '>i4', 5), ('file_length', '>i4'),
+                                    ('version', '<i4'), ('shape_type', '<i4'), ('bbox', '<f8', 4),
+                                    ('z_m', '<f8', 4)])
+        header['code'] = 9994
+        header['file_length'] = file_words
+        header['version'] = 1000
+        header['shape_type'] = 5
+        header['bbox'] = (*bbox[:, :2].min(axis=0), *bbox[:, 2:].max(axis=0)) if n else (0, 0, 0, 0)
+        return header.tobytes()
+
+    with open(base + '.shp', 'wb') as f:
+        f.write(shape_header(50 + n * shp_records.dtype.itemsize // 2))
+        f.write(shp_records.tobytes())
+    with open(base + '.shx', 'wb') as f:
+        f.write(shape_header(50 + n * 4))
+        f.write(index.tobytes())
+
+def write_training_data(data_dir, rows, seed=0):
+    """
+    features.csv and targets.csv following the data contract of
+    src/utils.py load_data (event_id, GEOID, the model features; impact_rank
+    and the regression targets).
+    """
+    os.makedirs(data_dir, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame({
+        'event_id': np.arange(rows),
+        'GEOID': rng.integers(1000, 99999, rows),
+        'disaster_type_flood': rng.integers(0, 2, rows),
+        'disaster_type_wind': rng.integers(0, 2, rows),
+        'magnitude_normalized': rng.random(rows),
+        'duration_hours': rng.random(rows) * 48,
+        'season_month': rng.integers(1, 13, rows),
+        'season_quarter': rng.integers(1, 5, rows),
+        'is_urban': rng.integers(0, 2, rows),
+        'population_density_log': rng.random(rows) * 8,
+        'gdp_per_capita_normalized': rng.random(rows),
+        'historical_disaster_frequency': rng.integers(0, 20, rows),
+        'preparedness_index': rng.random(rows),
+        'early_warning_system_level': rng.integers(0, 4, rows),
+        'healthcare_access_index': rng.random(rows),
+        'past_response_time_hours': rng.random(rows) * 24
+    })
+
+    score = (2 * X['magnitude_normalized'] + X['population_density_log'] / 4
+             - X['preparedness_index'] + rng.normal(0, 0.3, rows))
+    y = pd.DataFrame({'impact_rank': pd.cut(score, 3, labels=['low', 'medium', 'high']).astype(str)})
+    for i, target in enumerate(REGRESSION_TARGETS):
+        y[target] = np.maximum(0, score * 10 ** i + rng.normal(0, 1, rows))
+
+    X.to_csv(os.path.join(data_dir, 'features.csv'), index=False)
+    y.to_csv(os.path.join(data_dir, 'targets.csv'), index=False)
+    return X[FEATURE_COLUMNS], y
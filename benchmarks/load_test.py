@@ -0,0 +1,140 @@
+import argparse
+import http.client
+import http.server
+import json
+import os
+import sys
+import threading
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path[:0] = [REPO_DIR, os.path.join(REPO_DIR, "preprocessing")]
+
+import chatbot_api
+import fake_chat_upstream
+import serve_dashboard
+
+# Reproduces the load check for the dashboard server: slow chatbot calls and
+# idle keep-alive connections (e.g. background browser tabs) must not delay
+# the static and API requests of active clients.
+
+DEFAULT_PATHS = ["/datasets/nri_data.json", "/datasets/us-states.topo.json?zoom=4"]
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument("--workers", type=int, default=serve_dashboard.DEFAULT_WORKERS,
+                        help="Server worker threads (--workers of serve_dashboard.py)")
+    parser.add_argument("--idle", type=int, default=64,
+                        help="Keep-alive connections that make one request and then stay idle")
+    parser.add_argument("--chats", type=int, default=8, help="Concurrent /api/chat calls")
+    parser.add_argument("--chat-latency", type=float, default=2.0, help="Seconds the fake upstream takes per chat")
+    parser.add_argument("--clients", type=int, default=4, help="Active keep-alive clients")
+    parser.add_argument("--requests", type=int, default=200, help="GET requests per active client")
+    parser.add_argument("--paths", nargs='+', default=DEFAULT_PATHS, help="Paths the active clients cycle through")
+    parser.add_argument("--max-latency-ms", type=float, default=1000,
+                        help="Fail when any request of the active clients takes longer than this")
+
+    return parser.parse_args()
+
+def start(server):
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server.server_address[1]
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(int(q * len(values)), len(values) - 1)]
+
+def main():
+    args = parse_args()
+
+    fake_chat_upstream.FakeUpstreamHandler.latency = args.chat_latency
+    fake_chat_upstream.FakeUpstreamHandler.log_message = lambda *a: None
+    upstream_port = start(http.server.ThreadingHTTPServer(("127.0.0.1", 0), fake_chat_upstream.FakeUpstreamHandler))
+    chatbot_api.configure_default_client(api_key="load-test", max_concurrency=args.chats,
+                                         url=f"http://127.0.0.1:{upstream_port}/v1/chat/completions")
+
+    serve_dashboard.Handler.log_message = lambda *a: None
+    server = serve_dashboard.ThreadPoolHTTPServer(("127.0.0.1", 0), serve_dashboard.Handler,
+                                                  workers=args.workers, max_chats=args.chats)
+    port = start(server)
+
+    # Idle connections first, so they already hold workers when the load starts
+    idle = []
+    for _ in range(args.idle):
+        conn = http.client.HTTPConnection("127.0.0.1", port)
+        conn.request("GET", args.paths[0])
+        conn.getresponse().read()
+        idle.append(conn)
+
+    statuses = {"chat": [], "get": []}
+    latencies = []
+    reconnects = []
+    lock = threading.Lock()
+
+    def chat(i):
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+        body = json.dumps({"message": f"Question {i}", "context": "load test"})
+        conn.request("POST", "/api/chat", body, {"Content-Type": "application/json"})
+        response = conn.getresponse()
+        response.read()
+        with lock:
+            statuses["chat"].append(response.status)
+
+    def client(offset):
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+        for i in range(args.requests):
+            path = args.paths[(offset + i) % len(args.paths)]
+            begin = time.perf_counter()
+            try:
+                conn.request("GET", path, headers={"Accept-Encoding": "gzip"})
+                response = conn.getresponse()
+            except (http.client.RemoteDisconnected, ConnectionResetError):
+                # The server closed the idle connection; retry once on a new
+                # one, as browsers do
+                conn.close()
+                conn.request("GET", path, headers={"Accept-Encoding": "gzip"})
+                response = conn.getresponse()
+                with lock:
+                    reconnects.append(path)
+            response.read()
+            elapsed = time.perf_counter() - begin
+            with lock:
+                statuses["get"].append(response.status)
+                latencies.append(elapsed * 1000)
+        conn.close()
+
+    chats = [threading.Thread(target=chat, args=(i,)) for i in range(args.chats)]
+    clients = [threading.Thread(target=client, args=(i,)) for i in range(args.clients)]
+    start_time = time.perf_counter()
+    for t in chats + clients:
+        t.start()
+    for t in clients:
+        t.join()
+    load_seconds = time.perf_counter() - start_time
+    for t in chats:
+        t.join()
+
+    for conn in idle:
+        conn.close()
+    server.shutdown()
+    server.server_close()
+
+    failed = [s for s in statuses["get"] + statuses["chat"] if s != 200]
+    worst = max(latencies)
+    print(f"{args.workers} workers, {args.idle} idle keep-alive connections, "
+          f"{args.chats} chats of {args.chat_latency:g}s in flight")
+    print(f"{len(latencies)} GETs from {args.clients} clients in {load_seconds:.2f}s: "
+          f"p50 {percentile(latencies, 0.5):.2f}ms, p95 {percentile(latencies, 0.95):.2f}ms, max {worst:.2f}ms, {len(reconnects)} reconnects")
+    print(f"chat statuses: {sorted(statuses['chat'])}")
+
+    if failed:
+        print(f"FAILED: {len(failed)} requests did not return 200, e.g. HTTP {failed[0]}")
+        sys.exit(1)
+    if worst > args.max_latency_ms:
+        print(f"FAILED: the slowest request took {worst:.2f}ms, more than {args.max_latency_ms:g}ms")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
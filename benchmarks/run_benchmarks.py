@@ -0,0 +1,424 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import threading
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path[:0] = [BENCH_DIR, REPO_DIR, os.path.join(REPO_DIR, "preprocessing"), os.path.join(REPO_DIR, "src")]
+
+import generators
+
+BASELINE_FILE = os.path.join(BENCH_DIR, "baselines.json")
+WORK_DIR = os.path.join(BENCH_DIR, ".work")
+
+# Approximate production sizes that scale 1 stands for
+BASE_SIZES = {
+    "noaa_rows": 1_500_000,      # NOAA storm events 2000-2024
+    "nri_tracts": 85_000,        # NRI census tracts
+    "prediction_rows": 828,      # US_Disasters_Prediction_2025.csv
+    "feature_rows": 10_000,      # training / scoring rows
+    "requests": 2_000            # dashboard API requests per run
+}
+
+# A run fails when it is this much slower / bigger than its baseline
+TIME_TOLERANCE = 0.25
+RSS_TOLERANCE = 0.20
+# Slowdowns smaller than this many seconds are treated as timing noise
+TIME_FLOOR = 0.25
+
+# Streaming chunk size for the NOAA benchmark, so 100x stays within memory
+NOAA_CHUNKSIZE = 1_000_000
+# Concurrent keep-alive clients in the server benchmark
+SERVE_CLIENTS = 4
+
+RESULT_PREFIX = "BENCH_RESULT "
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument("--only", nargs='+', default=None,
+                        help=f"Benchmarks to run (default: all of {', '.join(BENCHMARKS)})")
+    parser.add_argument("--scales", nargs='+', type=float, default=[1],
+                        help="Input sizes as multiples of BASE_SIZES, e.g. 1 10 100")
+    parser.add_argument("--repeat", type=int, default=1,
+                        help="Runs per benchmark; the fastest run is reported")
+    parser.add_argument("--time-tolerance", type=float, default=TIME_TOLERANCE)
+    parser.add_argument("--rss-tolerance", type=float, default=RSS_TOLERANCE)
+    parser.add_argument("--update-baselines", action="store_true",
+                        help=f"Store these results as the new baselines in {BASELINE_FILE}")
+    parser.add_argument("--work-dir", type=str, default=WORK_DIR,
+                        help="Where generated inputs and outputs are kept between runs")
+    parser.add_argument("--verbose", action="store_true", help="Show the benchmarked code's own output")
+    # Internal: run one phase of one benchmark in this process
+    parser.add_argument("--child", nargs=3, metavar=("NAME", "SCALE", "PHASE"), help=argparse.SUPPRESS)
+
+    return parser.parse_args()
+
+# --- Benchmarks ---
+# Each benchmark has a setup(work_dir, size) that generates its inputs once
+# and a run(work_dir, size) that returns the number of items processed, or
+# (items, seconds) when it times only part of its own work.
+
+def setup_noaa(work_dir, size):
+    generators.write_noaa_csv(os.path.join(work_dir, "noaa.csv"), size)
+
+def run_noaa(work_dir, size):
+    import preprocess_noaa_data
+
+    preprocess_noaa_data.DATA_DIR = os.path.join(work_dir, "data")
+    preprocess_noaa_data.PARTITION_DIR = os.path.join(work_dir, "data", "noaa_partitions")
+    preprocess_noaa_data.OUTPUT_JSON = os.path.join(work_dir, "datasets", "noaa_data.json")
+    preprocess_noaa_data.CUBE_DIR = os.path.join(work_dir, "datasets", "noaa_cube")
+    # A cold run: unchanged partitions from a previous run would be reused
+    shutil.rmtree(preprocess_noaa_data.DATA_DIR, ignore_errors=True)
+    shutil.rmtree(os.path.dirname(preprocess_noaa_data.OUTPUT_JSON), ignore_errors=True)
+    sys.argv = ["preprocess_noaa_data.py", "--sources", os.path.join(work_dir, "noaa.csv"),
+                "--chunksize", str(NOAA_CHUNKSIZE)]
+    preprocess_noaa_data.main()
+    require(preprocess_noaa_data.OUTPUT_JSON)
+    return size
+
+def setup_nri(work_dir, size):
+    generators.write_nri_shapefile(os.path.join(work_dir, "NRI"), size)
+
+def run_nri(work_dir, size):
+    import preprocess_nri_data
+
+    preprocess_nri_data.DBF_PATH = os.path.join(work_dir, "NRI.dbf")
+    preprocess_nri_data.SHP_PATH = os.path.join(work_dir, "NRI.shp")
+    preprocess_nri_data.OUTPUT_JSON = os.path.join(work_dir, "datasets", "nri_data.json")
+    preprocess_nri_data.TRACTS_DIR = os.path.join(work_dir, "datasets", "nri_tracts")
+    remove(preprocess_nri_data.OUTPUT_JSON)
+    shutil.rmtree(preprocess_nri_data.TRACTS_DIR, ignore_errors=True)
+    preprocess_nri_data.process_nri()
+    require(preprocess_nri_data.OUTPUT_JSON)
+    return size
+
+def setup_predictions(work_dir, size):
+    generators.write_predictions_csv(os.path.join(work_dir, "predictions.csv"), size)
+
+def run_predictions(work_dir, size):
+    from preprocess_predictions import preprocess_predictions
+
+    output = os.path.join(work_dir, "datasets", "predictions_data.json")
+    preprocess_predictions(os.path.join(work_dir, "predictions.csv"), output)
+    require(output)
+    return size
+
+def setup_train(work_dir, size):
+    generators.write_training_data(os.path.join(work_dir, "data"), size)
+
+def run_train(work_dir, size):
+    import train
+
+    model_dir = os.path.join(work_dir, "models")
+    shutil.rmtree(model_dir, ignore_errors=True)
+    sys.argv = ["train.py", "--data_dir", os.path.join(work_dir, "data"), "--model_dir", model_dir,
+                "--reports_dir", os.path.join(work_dir, "reports")]
+    train.main()
+    require(os.path.join(model_dir, "best_classification_model.joblib"))
+    return size
+
+def setup_models(work_dir, size):
+    """
+    Scoring inputs plus one XGBoost classifier and per-target regressor,
+    fitted directly so the inference benchmarks don't depend on train.py.
+    """
+    import utils
+    from sklearn.preprocessing import LabelEncoder
+    from train import make_classifier, make_regressor
+
+    X, y = generators.write_training_data(os.path.join(work_dir, "data"), size)
+    utils.init_paths(data_dir=os.path.join(work_dir, "data"), model_dir=os.path.join(work_dir, "models"),
+                     reports_dir=os.path.join(work_dir, "reports"))
+    le = LabelEncoder()
+    y_class = le.fit_transform(y['impact_rank'])
+    utils.save_model(le, "label_encoder.joblib")
+    utils.save_model(make_classifier("XGBoost").fit(X, y_class), "best_classification_model.joblib")
+    for target in generators.REGRESSION_TARGETS:
+        utils.save_model(make_regressor("XGBoost").fit(X, y[target]), f"best_regression_model_{target}.joblib")
+
+def load_scoring_models(work_dir):
+    import utils
+    from predict import load_models
+
+    utils.init_paths(data_dir=os.path.join(work_dir, "data"), model_dir=os.path.join(work_dir, "models"),
+                     reports_dir=os.path.join(work_dir, "reports"))
+    models = load_models()
+    if models is None:
+        raise RuntimeError("load_models() returned None")
+    return models
+
+def run_load_models(work_dir, size):
+    load_scoring_models(work_dir)
+    return 1
+
+def scoring_run(explain):
+    def run(work_dir, size):
+        import pandas as pd
+        from predict import predict_full_package
+
+        models = load_scoring_models(work_dir)
+        features = pd.read_csv(os.path.join(work_dir, "data", "features.csv"))[generators.FEATURE_COLUMNS]
+        start = time.perf_counter()
+        results = predict_full_package(models, features, explain=explain)
+        seconds = time.perf_counter() - start
+        if len(results) != len(features):
+            raise RuntimeError(f"predict_full_package failed: {results[:1]}")
+        return len(results), seconds
+    return run
+
+def setup_serve(work_dir, size):
+    import numpy as np
+    from noaa_cube import MONTHS, METRICS, NoaaCube
+
+    rng = np.random.default_rng(0)
+    states = sorted({s.title() for s in generators.STATES})
+    shape = (len(METRICS), 25, len(states), len(generators.EVENT_TYPES), len(MONTHS))
+    values = rng.gamma(0.3, 1e5, shape) * (rng.random(shape) < 0.2)
+    NoaaCube(range(2000, 2025), states, sorted(generators.EVENT_TYPES), values).save(os.path.join(work_dir, "noaa_cube"))
+
+def run_serve(work_dir, size):
+    """
+    Drives the dashboard's request handler over keep-alive connections with
+    a mix of /api/aggregate queries and a static dataset download.
+    """
+    import http.client
+    from noaa_cube import NoaaCube
+    from serve_dashboard import Handler, ThreadPoolHTTPServer
+
+    paths = [
+        "/api/aggregate/totals?years=2000-2010",
+        "/api/aggregate/states?metric=loss&limit=10&events=Hail,Tornado",
+        "/api/aggregate/yearly?states=Texas,Florida",
+        "/api/aggregate/monthly?years=2015-2020&events=Flood",
+        "/api/aggregate/states?metric=fatalities&months=6,7,8",
+        "/datasets/nri_data.json"
+    ]
+    cube = NoaaCube.load(os.path.join(work_dir, "noaa_cube"))
+    server = ThreadPoolHTTPServer(("127.0.0.1", 0), Handler, workers=SERVE_CLIENTS * 2, noaa_cube=cube)
+    Handler.log_message = lambda *args: None
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    errors = []
+    def client(count, offset):
+        conn = http.client.HTTPConnection("127.0.0.1", server.server_address[1])
+        for i in range(count):
+            conn.request("GET", paths[(offset + i) % len(paths)], headers={"Accept-Encoding": "gzip"})
+            response = conn.getresponse()
+            response.read()
+            if response.status != 200:
+                errors.append(response.status)
+        conn.close()
+
+    per_client = max(size // SERVE_CLIENTS, 1)
+    clients = [threading.Thread(target=client, args=(per_client, i)) for i in range(SERVE_CLIENTS)]
+    start = time.perf_counter()
+    for t in clients:
+        t.start()
+    for t in clients:
+        t.join()
+    seconds = time.perf_counter() - start
+    server.shutdown()
+    server.server_close()
+    if errors:
+        raise RuntimeError(f"{len(errors)} requests failed, e.g. HTTP {errors[0]}")
+    return per_client * SERVE_CLIENTS, seconds
+
+# name -> (BASE_SIZES key, unit, setup, run). Benchmarks sharing a setup
+# function share their generated inputs.
+BENCHMARKS = {
+    "noaa_preprocess": ("noaa_rows", "rows", setup_noaa, run_noaa),
+    "nri_process": ("nri_tracts", "tracts", setup_nri, run_nri),
+    "predictions_preprocess": ("prediction_rows", "rows", setup_predictions, run_predictions),
+    "train": ("feature_rows", "rows", setup_train, run_train),
+    "predict_load_models": ("feature_rows", "loads", setup_models, run_load_models),
+    "predict_score": ("feature_rows", "rows", setup_models, scoring_run('none')),
+    "predict_explain": ("feature_rows", "rows", setup_models, scoring_run('top_k')),
+    "serve_dashboard": ("requests", "requests", setup_serve, run_serve),
+}
+
+# --- Harness ---
+
+def require(path):
+    if not os.path.exists(path):
+        raise RuntimeError(f"{path} was not written")
+
+def remove(path):
+    if os.path.exists(path):
+        os.remove(path)
+
+def scale_label(scale):
+    return f"{scale:g}x"
+
+def input_dir(work_dir, name, scale):
+    setup = BENCHMARKS[name][2]
+    return os.path.join(work_dir, f"{setup.__name__[len('setup_'):]}-{scale_label(scale)}")
+
+def peak_rss_mb():
+    """
+    Peak resident set size of this process or of its largest child (worker
+    pools), in MB. None where the resource module is unavailable.
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return peak / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+def run_child(name, scale, phase, work_dir):
+    key, _, setup, run = BENCHMARKS[name]
+    size = max(int(BASE_SIZES[key] * scale), 1)
+    directory = input_dir(work_dir, name, scale)
+    os.makedirs(directory, exist_ok=True)
+
+    if phase == "setup":
+        marker = os.path.join(directory, ".inputs-ready")
+        if not os.path.exists(marker):
+            setup(directory, size)
+            open(marker, 'w').close()
+        return
+
+    start = time.perf_counter()
+    items = run(directory, size)
+    seconds = time.perf_counter() - start
+    if isinstance(items, tuple):
+        items, seconds = items
+    print(RESULT_PREFIX + json.dumps({"seconds": seconds, "items": items, "peak_rss_mb": peak_rss_mb()}))
+
+def spawn(name, scale, phase, work_dir, verbose):
+    """
+    Runs one phase in a fresh interpreter, so peak RSS and import costs
+    belong to that benchmark alone. Returns (result, output); result is
+    None if the phase failed or reported nothing.
+    """
+    command = [sys.executable, os.path.abspath(__file__), "--work-dir", work_dir,
+               "--child", name, f"{scale:g}", phase]
+    proc = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, cwd=REPO_DIR)
+    if verbose:
+        print(proc.stdout)
+    result = None
+    for line in proc.stdout.splitlines():
+        if line.startswith(RESULT_PREFIX):
+            result = json.loads(line[len(RESULT_PREFIX):])
+    if proc.returncode != 0:
+        return None, proc.stdout
+    return result if phase == "run" else {}, proc.stdout
+
+def machine_info():
+    return {
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "cpus": os.cpu_count()
+    }
+
+def load_baselines():
+    if not os.path.exists(BASELINE_FILE):
+        return {"machine": None, "results": {}}
+    with open(BASELINE_FILE, 'r') as f:
+        return json.load(f)
+
+def compare(result, baseline, time_tolerance, rss_tolerance):
+    """
+    Returns (regressions, notes) for one result against its baseline.
+    """
+    regressions, notes = [], []
+    for field, label, tolerance in (("seconds", "time", time_tolerance), ("peak_rss_mb", "peak RSS", rss_tolerance)):
+        old, new = baseline.get(field), result.get(field)
+        if not old or new is None:
+            continue
+        change = new / old - 1
+        text = f"{label} {change:+.0%}"
+        if change > tolerance and not (field == "seconds" and new - old < TIME_FLOOR):
+            regressions.append(f"{text} (limit +{tolerance:.0%})")
+        else:
+            notes.append(text)
+    return regressions, notes
+
+def format_rate(items, seconds, unit):
+    rate = items / seconds if seconds > 0 else float('inf')
+    for factor, suffix in ((1e6, "M"), (1e3, "k")):
+        if rate >= factor:
+            return f"{rate / factor:.1f}{suffix} {unit}/s"
+    return f"{rate:.1f} {unit}/s"
+
+def main():
+    args = parse_args()
+    if args.child:
+        name, scale, phase = args.child
+        run_child(name, float(scale), phase, args.work_dir)
+        return
+
+    names = args.only or list(BENCHMARKS)
+    unknown = [n for n in names if n not in BENCHMARKS]
+    if unknown:
+        print(f"Error: unknown benchmarks {unknown}; choose from {list(BENCHMARKS)}")
+        sys.exit(2)
+
+    baselines = load_baselines()
+    if baselines.get("machine") and baselines["machine"] != machine_info():
+        print(f"WARNING: baselines were recorded on {baselines['machine']}, this is {machine_info()}.")
+
+    failures = []
+    results = {}
+    print(f"{'benchmark':<24}{'scale':>7}{'seconds':>10}{'peak MB':>10}  {'throughput':<20}vs baseline")
+    for scale in args.scales:
+        for name in names:
+            key = f"{name}@{scale_label(scale)}"
+            setup_result, output = spawn(name, scale, "setup", args.work_dir, args.verbose)
+            ready = setup_result is not None
+            runs = [spawn(name, scale, "run", args.work_dir, args.verbose) for _ in range(args.repeat)] if ready else []
+            ok = [r for r, _ in runs if r is not None]
+            if not ok or len(ok) < len(runs):
+                output = next((out for r, out in runs if r is None), output)
+                failures.append(f"{key}: {'benchmark' if ready else 'input generation'} failed")
+                print(f"{name:<24}{scale_label(scale):>7}  FAILED")
+                print("    " + "\n    ".join(output.strip().splitlines()[-15:]))
+                continue
+
+            result = min(ok, key=lambda r: r["seconds"])
+            unit = BENCHMARKS[name][1]
+            result["unit"] = unit
+            results[key] = result
+
+            baseline = baselines["results"].get(key)
+            if baseline is None:
+                verdict = "no baseline"
+            else:
+                regressions, notes = compare(result, baseline, args.time_tolerance, args.rss_tolerance)
+                if regressions and not args.update_baselines:
+                    failures.append(f"{key}: " + ", ".join(regressions))
+                    verdict = "REGRESSION: " + ", ".join(regressions)
+                else:
+                    verdict = "ok (" + ", ".join(notes) + ")"
+
+            rss = "-" if result["peak_rss_mb"] is None else f"{result['peak_rss_mb']:.0f}"
+            print(f"{name:<24}{scale_label(scale):>7}{result['seconds']:>10.2f}{rss:>10}  "
+                  f"{format_rate(result['items'], result['seconds'], unit):<20}{verdict}")
+
+    if args.update_baselines:
+        baselines["machine"] = machine_info()
+        baselines["results"].update(results)
+        with open(BASELINE_FILE, 'w') as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+        print(f"\nUpdated {len(results)} baselines in {BASELINE_FILE}")
+
+    if failures:
+        print("\n" + "!" * 60)
+        print(f"PERFORMANCE CHECK FAILED ({len(failures)}):")
+        for failure in failures:
+            print(f"  - {failure}")
+        print("!" * 60)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+import http.server
+import json
+import argparse
+import time
+
+# Offline stand-in for the Groq chat completions API. Point the dashboard at
+# it with GROQ_API_URL=http://localhost:8001/v1/chat/completions and any
+# GROQ_API_KEY to exercise the chatbot (including streaming) without network.
+
+PORT = 8001
+
+class FakeUpstreamHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    # Overridden from the command line in main()
+    latency = 0.5
+    token_delay = 0.05
+
+    def reply_text(self, payload):
+        question = payload.get("messages", [{}])[-1].get("content", "").rsplit("User Question:", 1)[-1].strip()
+        return f"This is a canned answer from the fake upstream to: <b>{question}</b>"
+
+    def do_POST(self):
+        content_length = int(self.headers.get('Content-Length', 0))
+        payload = json.loads(self.rfile.read(content_length) or b"{}")
+        text = self.reply_text(payload)
+
+        time.sleep(self.latency)
+
+        if not payload.get("stream"):
+            body = json.dumps({"choices": [{"message": {"role": "assistant", "content": text}}]}).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+
+        def write_chunk(data):
+            self.wfile.write(f"{len(data):X}\r\n".encode('ascii') + data + b"\r\n")
+
+        try:
+            for i, word in enumerate(text.split(" ")):
+                delta = {"choices": [{"delta": {"content": word if i == 0 else " " + word}}]}
+                write_chunk(f"data: {json.dumps(delta)}\n\n".encode('utf-8'))
+                time.sleep(self.token_delay)
+            write_chunk(b"data: [DONE]\n\n")
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            # The dashboard cancelled the stream
+            self.close_connection = True
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--latency", type=float, default=0.5, help="Seconds before the first token")
+    parser.add_argument("--token-delay", type=float, default=0.05, help="Seconds between streamed tokens")
+
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    FakeUpstreamHandler.latency = args.latency
+    FakeUpstreamHandler.token_delay = args.token_delay
+
+    print(f"Fake chat upstream at http://localhost:{args.port}/v1/chat/completions")
+    with http.server.ThreadingHTTPServer(("", args.port), FakeUpstreamHandler) as httpd:
+        try:
+            httpd.serve_forever()
+        except KeyboardInterrupt:
+            print("\nStopping server.")
+
+if __name__ == "__main__":
+    main()
@@ -1,34 +1,57 @@
-from sklearn.linear_model import LinearRegression
+import numpy as np
+
+def predict_years(df, years):
+    """
+    Fits a per-state linear trend on yearly loss/fatality totals and
+    extrapolates it to each of `years`. Returns {year: {state: {...}}}.
+    """
+    yearly = df.groupby(['state', 'year'])[['loss', 'fatalities']].sum()
+    return predict_years_from_totals(yearly, df['state'].unique(), years)
+
+def predict_years_from_totals(yearly, states, years):
+    """
+    Same as predict_years, from precomputed (state, year)-indexed loss and
+    fatality totals, e.g. the cached NOAA partitions. Predictions are keyed
+    in the order of `states`.
+    """
+    # (target, state, year) matrix; NaN where a state has no events that year
+    wide = yearly.unstack('year').reindex(states)
+    x = wide['loss'].columns.to_numpy(dtype=float)
+    Y = np.stack([wide['loss'].to_numpy(dtype=float), wide['fatalities'].to_numpy(dtype=float)])
+
+    # Ordinary least squares in closed form on centered years, for all
+    # states and both targets at once
+    mask = ~np.isnan(Y[0])
+    n = mask.sum(axis=1)
+    safe_n = np.maximum(n, 1)
+    x_mean = np.where(mask, x, 0).sum(axis=1) / safe_n
+    xc = np.where(mask, x - x_mean[:, None], 0)
+    Yz = np.where(mask, Y, 0)
+    y_mean = Yz.sum(axis=2) / safe_n
+    sxx = (xc * xc).sum(axis=1)
+    slope = (xc * Yz).sum(axis=2) / np.where(sxx > 0, sxx, 1)
+
+    target_years = np.asarray(years, dtype=float)
+    preds = y_mean[..., None] + slope[..., None] * (target_years - x_mean[:, None])
 
-def predict_next_year(df):
     predictions = {}
+    for k, year in enumerate(years):
+        year_preds = {}
+        for i, state in enumerate(states):
+            if n[i] < 3:
+                year_preds[state] = {"loss": 0, "fatalities": 0}
+                continue
+
+            year_preds[state] = {
+                "loss": float(max(0, preds[0, i, k])),  # No negative loss
+                "fatalities": int(max(0, preds[1, i, k]))  # No negative fatalities
+            }
+        predictions[year] = year_preds
 
-    states = df['state'].unique()
-
-    for state in states:
-        state_data = df[df['state'] == state]
-
-        yearly_state = state_data.groupby('year')[['loss', 'fatalities']].sum().reset_index()
-
-        if len(yearly_state) < 3:
-            predictions[state] = {"loss": 0, "fatalities": 0}
-            continue
-
-        X = yearly_state['year'].values.reshape(-1, 1)
-
-        y_loss = yearly_state['loss'].values
-        model_loss = LinearRegression()
-        model_loss.fit(X, y_loss)
-        pred_loss = model_loss.predict([[2025]])[0]
-
-        y_fat = yearly_state['fatalities'].values
-        model_fat = LinearRegression()
-        model_fat.fit(X, y_fat)
-        pred_fat = model_fat.predict([[2025]])[0]
+    return predictions
 
-        predictions[state] = {
-            "loss": float(max(0, pred_loss)),  # No negative loss
-            "fatalities": int(max(0, pred_fat))  # No negative fatalities
-        }
+def predict_next_year(df, year=2025):
+    return predict_years(df, [year])[year]
 
-    return predictions
+def predict_next_year_from_totals(yearly, states, year=2025):
+    return predict_years_from_totals(yearly, states, [year])[year]
@@ -1,24 +1,24 @@
 import os
 import json
+import hashlib
+import random
+import re
+import threading
+import time
+from collections import OrderedDict
 import requests
+from requests.adapters import HTTPAdapter
 
-def get_openai_response(message, context, api_key=None):
-    """
-    Sends a message and context to Groq API and returns the response.
-    """
-    if not api_key:
-        api_key = os.environ.get("GROQ_API_KEY")
-        
-    if not api_key:
-        return {"error": "Groq API key not found. Please set the GROQ_API_KEY environment variable."}
-
-    url = "https://api.groq.com/openai/v1/chat/completions"
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {api_key}"
-    }
-    
-    system_prompt = """You are an AI assistant for a US Disaster Dashboard. 
+DEFAULT_API_URL = "https://api.groq.com/openai/v1/chat/completions"
+DEFAULT_MODEL = "llama-3.3-70b-versatile"
+
+# Upstream statuses worth retrying: rate limiting and transient server errors
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# The persisted cache log is rewritten once it holds this many lines per
+# cache entry, so it stays bounded like the in-memory LRU
+CACHE_LOG_FACTOR = 2
+
+SYSTEM_PROMPT = """You are an AI assistant for a US Disaster Dashboard. 
     Your goal is to help users understand the 2025 disaster projections based on the provided data context.
     
     Rules:
@@ -28,26 +28,334 @@ def get_openai_response(message, context, api_key=None):
     4. Format your response with simple HTML tags if needed (e.g., <b>bold</b>, <ul><li>lists</li></ul>).
     """
 
-    payload = {
-        "model": "llama-3.3-70b-versatile",
-        "messages": [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": f"Context:\n{context}\n\nUser Question: {message}"}
-        ],
-        "temperature": 0.7,
-        "max_tokens": 500
-    }
-
-    try:
-        response = requests.post(url, headers=headers, json=payload)
-        response.raise_for_status()
-        data = response.json()
-        return {"response": data['choices'][0]['message']['content']}
-    except requests.exceptions.RequestException as e:
-        print(f"Groq API Error: {e}")
-        if hasattr(e, 'response') and e.response is not None:
-             return {"error": f"Groq API Error: {e.response.text}"}
-        return {"error": str(e)}
-    except Exception as e:
-        print(f"General Error: {e}")
-        return {"error": str(e)}
+class ResponseCache:
+    """
+    Thread-safe LRU cache of chat responses with a TTL. When persist_path is
+    set, entries are appended to a JSON-lines file and reloaded on start, so
+    answers survive server restarts. The file is compacted to the live
+    entries whenever it grows past CACHE_LOG_FACTOR lines per entry.
+    """
+
+    def __init__(self, max_entries=1024, ttl=3600.0, persist_path=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.persist_path = persist_path
+        self.entries = OrderedDict()  # key -> (stored_at, value)
+        self.hits = 0
+        self.misses = 0
+        self.log_lines = 0
+        self.lock = threading.Lock()
+
+        if persist_path:
+            self.load()
+
+    @staticmethod
+    def make_key(message, context, model, temperature):
+        # Case, surrounding punctuation and runs of whitespace don't change
+        # the question being asked
+        normalized = re.sub(r"\s+", " ", str(message or "")).strip().lower().strip("?!. ")
+        context = re.sub(r"\s+", " ", str(context or "")).strip()
+        raw = json.dumps([normalized, context, model, temperature])
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and time.time() - entry[0] <= self.ttl:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+
+            if entry is not None:
+                del self.entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        stored_at = time.time()
+        with self.lock:
+            self._insert(key, stored_at, value)
+            if self.persist_path:
+                with open(self.persist_path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps({"key": key, "time": stored_at, "value": value}) + "\n")
+                self.log_lines += 1
+                if self.log_lines > CACHE_LOG_FACTOR * max(self.max_entries, 1):
+                    self.compact()
+
+    def _insert(self, key, stored_at, value):
+        self.entries[key] = (stored_at, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def load(self):
+        if not os.path.exists(self.persist_path):
+            return
+
+        now = time.time()
+        lines = 0
+        with open(self.persist_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                lines += 1
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if now - record["time"] <= self.ttl:
+                    self._insert(record["key"], record["time"], record["value"])
+
+        self.log_lines = lines
+        # Rewrite the log once stale or superseded lines dominate it
+        if lines > CACHE_LOG_FACTOR * max(len(self.entries), 1):
+            self.compact()
+
+    def compact(self):
+        """
+        Rewrites the log with only the live entries. The new file replaces
+        the old one atomically, so a crash never leaves a truncated log.
+        """
+        tmp_path = self.persist_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for key, (stored_at, value) in self.entries.items():
+                f.write(json.dumps({"key": key, "time": stored_at, "value": value}) + "\n")
+        os.replace(tmp_path, self.persist_path)
+        self.log_lines = len(self.entries)
+
+    def stats(self):
+        with self.lock:
+            total = self.hits + self.misses
+            return {
+                "enabled": True,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "size": len(self.entries)
+            }
+
+class ChatClient:
+    """
+    Reusable client for the Groq chat completions API. Keeps a pooled
+    requests.Session, applies connect/read timeouts, retries 429/5xx with
+    jittered exponential backoff and caps the number of calls in flight.
+    Successful answers are served from `cache` (a ResponseCache) if given.
+
+    The upstream URL defaults to GROQ_API_URL (or the public Groq endpoint)
+    so it can be pointed at a local stand-in server.
+    """
+
+    def __init__(self, api_key=None, url=None, model=DEFAULT_MODEL,
+                 connect_timeout=5.0, read_timeout=60.0,
+                 max_retries=3, backoff=0.5, max_backoff=8.0,
+                 max_concurrency=8, pool_size=16, temperature=0.7, cache=None):
+        self.api_key = api_key
+        self.url = url or os.environ.get("GROQ_API_URL", DEFAULT_API_URL)
+        self.model = model
+        self.temperature = temperature
+        self.cache = cache
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.slots = threading.BoundedSemaphore(max_concurrency)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def build_payload(self, message, context, stream=False):
+        payload = {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": f"Context:\n{context}\n\nUser Question: {message}"}
+            ],
+            "temperature": self.temperature,
+            "max_tokens": 500
+        }
+        if stream:
+            payload["stream"] = True
+        return payload
+
+    def retry_delay(self, attempt, response=None):
+        # Full jitter, but never sooner than the server's Retry-After
+        delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after:
+            try:
+                delay = max(delay, min(float(retry_after), self.max_backoff))
+            except ValueError:
+                pass
+        return delay
+
+    def open(self, payload, api_key, stream=False):
+        """
+        POSTs payload upstream and returns the successful response, retrying
+        retryable statuses and connection failures. The caller must release
+        the concurrency slot taken here by calling self.slots.release().
+        Raises requests.exceptions.RequestException once retries are exhausted.
+        """
+        headers = {
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {api_key}"
+        }
+
+        for attempt in range(self.max_retries + 1):
+            last_attempt = attempt == self.max_retries
+            self.slots.acquire()
+            try:
+                response = self.session.post(self.url, headers=headers, json=payload,
+                                             timeout=self.timeout, stream=stream)
+            except requests.exceptions.ConnectionError:
+                self.slots.release()
+                if last_attempt:
+                    raise
+                response = None
+            except BaseException:
+                # Read timeouts and other failures aren't retried, but must
+                # not keep the slot
+                self.slots.release()
+                raise
+            else:
+                if response.status_code not in RETRY_STATUSES or last_attempt:
+                    try:
+                        response.raise_for_status()
+                    except requests.exceptions.HTTPError:
+                        self.slots.release()
+                        raise
+                    return response
+                response.close()
+                self.slots.release()
+
+            # Back off outside the semaphore so waiting calls don't hold a slot
+            time.sleep(self.retry_delay(attempt, response))
+
+    def post(self, payload, api_key):
+        """
+        POSTs payload upstream and returns the decoded JSON body.
+        """
+        response = self.open(payload, api_key)
+        try:
+            return response.json()
+        finally:
+            self.slots.release()
+
+    def stream(self, payload, api_key):
+        """
+        POSTs a stream=True payload and yields content deltas as they arrive
+        from the upstream's server-sent events.
+        """
+        response = self.open(payload, api_key, stream=True)
+        try:
+            # SSE is always UTF-8; don't let requests guess from the content type
+            for raw_line in response.iter_lines():
+                line = raw_line.decode('utf-8')
+                if not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                delta = json.loads(data)['choices'][0].get('delta', {}).get('content')
+                if delta:
+                    yield delta
+        finally:
+            response.close()
+            self.slots.release()
+
+    def chat(self, message, context, api_key=None):
+        """
+        Sends a message and context to Groq API and returns the response.
+        """
+        api_key = api_key or self.api_key or os.environ.get("GROQ_API_KEY")
+        if not api_key:
+            return {"error": "Groq API key not found. Please set the GROQ_API_KEY environment variable."}
+
+        key = None
+        if self.cache is not None:
+            key = ResponseCache.make_key(message, context, self.model, self.temperature)
+            cached = self.cache.get(key)
+            if cached is not None:
+                return {"response": cached}
+
+        try:
+            data = self.post(self.build_payload(message, context), api_key)
+            content = data['choices'][0]['message']['content']
+            if key is not None:
+                self.cache.put(key, content)
+            return {"response": content}
+        except requests.exceptions.RequestException as e:
+            print(f"Groq API Error: {e}")
+            if hasattr(e, 'response') and e.response is not None:
+                 return {"error": f"Groq API Error: {e.response.text}"}
+            return {"error": str(e)}
+        except Exception as e:
+            print(f"General Error: {e}")
+            return {"error": str(e)}
+
+    def chat_stream(self, message, context, api_key=None):
+        """
+        Like chat(), but yields {"token": ...} pieces as the upstream produces
+        them and finishes with either {"done": True} or {"error": ...}.
+        """
+        api_key = api_key or self.api_key or os.environ.get("GROQ_API_KEY")
+        if not api_key:
+            yield {"error": "Groq API key not found. Please set the GROQ_API_KEY environment variable."}
+            return
+
+        key = None
+        if self.cache is not None:
+            key = ResponseCache.make_key(message, context, self.model, self.temperature)
+            cached = self.cache.get(key)
+            if cached is not None:
+                yield {"token": cached}
+                yield {"done": True}
+                return
+
+        pieces = []
+        try:
+            for delta in self.stream(self.build_payload(message, context, stream=True), api_key):
+                pieces.append(delta)
+                yield {"token": delta}
+        except requests.exceptions.RequestException as e:
+            print(f"Groq API Error: {e}")
+            if hasattr(e, 'response') and e.response is not None:
+                yield {"error": f"Groq API Error: {e.response.text}"}
+            else:
+                yield {"error": str(e)}
+            return
+        except Exception as e:
+            print(f"General Error: {e}")
+            yield {"error": str(e)}
+            return
+
+        content = "".join(pieces)
+        # An upstream that ends the stream without tokens is not an answer
+        if key is not None and content:
+            self.cache.put(key, content)
+        yield {"done": True}
+
+_default_client = None
+_default_client_lock = threading.Lock()
+
+def configure_default_client(**kwargs):
+    """
+    Replaces the shared client used by get_openai_response, e.g. to attach
+    a ResponseCache or change timeouts.
+    """
+    global _default_client
+    with _default_client_lock:
+        _default_client = ChatClient(**kwargs)
+        return _default_client
+
+def get_default_client():
+    global _default_client
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = ChatClient(cache=ResponseCache())
+        return _default_client
+
+def get_openai_response(message, context, api_key=None):
+    """
+    Sends a message and context to Groq API and returns the response.
+    """
+    return get_default_client().chat(message, context, api_key)
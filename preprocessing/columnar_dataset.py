@@ -0,0 +1,238 @@
+import json
+import os
+import struct
+
+import numpy as np
+
+from dataset_io import publish_dataset
+
+# File layout, all little-endian:
+#   MAGIC (8 bytes) | header length (uint32) | header JSON | padding
+#   | column 0 | padding | column 1 | ...
+# Every column starts on an ALIGN-byte boundary so it can be viewed in place
+# (np.memmap in Python, typed arrays over the ArrayBuffer in the browser).
+MAGIC = b"DDCOL\x00\x01\x00"
+ALIGN = 8
+COLUMNAR_EXT = ".bin"
+
+# Per-event fields stored as typed columns; anything else stays in JSON
+EVENT_NUMERIC = ('loss', 'fatalities', 'month', 'count')
+# Event fields stored as codes into the header's string table
+EVENT_CODED = ('type', 'name')
+
+def columnar_path(json_path):
+    return os.path.splitext(json_path)[0] + COLUMNAR_EXT
+
+def smallest_uint(max_value):
+    for dtype in (np.uint8, np.uint16, np.uint32):
+        if max_value <= np.iinfo(dtype).max:
+            return dtype
+    return np.uint64
+
+def numeric_column(values):
+    """
+    int32 (or int64) when every value is a Python int, float64 otherwise.
+    """
+    if all(isinstance(v, int) and not isinstance(v, bool) for v in values):
+        array = np.asarray(values, dtype=np.int64)
+        if not len(array) or (array.min() >= np.iinfo(np.int32).min and array.max() <= np.iinfo(np.int32).max):
+            return array.astype(np.int32)
+        return array
+    return np.asarray(values, dtype=np.float64)
+
+def encode(data, events_key=None):
+    """
+    Splits a {year: {state: {"loss", "fatalities", ["top_events"], "events"}}}
+    dataset (at data[events_key], or data itself) into a JSON header and
+    typed columns:
+
+      group_year, group_state          codes per (year, state), in key order
+      group_loss, group_fatalities     the per-(year, state) totals
+      group_top_events                 (groups, 3) string codes, -1 padded
+      group_offsets                    events of group i are rows
+                                       offsets[i]:offsets[i + 1]
+      event_type, event_name           string codes (name omitted if always
+                                       equal to type)
+      event_loss, event_fatalities, event_month, event_count
+
+    Everything else in `data` is kept as-is in the header.
+    """
+    nested = data[events_key] if events_key else data
+    years = list(nested)
+    states = sorted({state for year_data in nested.values() for state in year_data})
+    state_index = {s: i for i, s in enumerate(states)}
+
+    strings = {}
+    def code(value):
+        return strings.setdefault(value, len(strings))
+
+    group_year, group_state, group_loss, group_fatalities, group_top, offsets = [], [], [], [], [], [0]
+    event_fields = None
+    events = {field: [] for field in EVENT_NUMERIC + EVENT_CODED}
+    name_is_type = True
+    has_top_events = False
+
+    for y, year in enumerate(years):
+        for state, state_data in nested[year].items():
+            group_year.append(y)
+            group_state.append(state_index[state])
+            group_loss.append(state_data.get('loss', 0))
+            group_fatalities.append(state_data.get('fatalities', 0))
+            if 'top_events' in state_data:
+                has_top_events = True
+            top = [code(t) for t in state_data.get('top_events', [])[:3]]
+            group_top.append(top + [-1] * (3 - len(top)))
+
+            for event in state_data.get('events', []):
+                if event_fields is None:
+                    event_fields = list(event)
+                events['type'].append(code(event['type']))
+                name = event.get('name', event['type'])
+                events['name'].append(code(name))
+                name_is_type = name_is_type and name == event['type']
+                for field in EVENT_NUMERIC:
+                    events[field].append(event.get(field, 0))
+            offsets.append(offsets[-1] + len(state_data.get('events', [])))
+
+    event_fields = event_fields or ['type', 'name', 'loss', 'fatalities', 'month']
+    string_dtype = np.int16 if len(strings) < np.iinfo(np.int16).max else np.int32
+
+    columns = {
+        "group_year": np.asarray(group_year, dtype=smallest_uint(max(len(years) - 1, 0))),
+        "group_state": np.asarray(group_state, dtype=smallest_uint(max(len(states) - 1, 0))),
+        "group_loss": numeric_column(group_loss),
+        "group_fatalities": numeric_column(group_fatalities),
+        "group_offsets": np.asarray(offsets, dtype=smallest_uint(offsets[-1])),
+        "event_type": np.asarray(events['type'], dtype=smallest_uint(max(len(strings) - 1, 0)))
+    }
+    if has_top_events:
+        columns["group_top_events"] = np.asarray(group_top, dtype=string_dtype).reshape(-1, 3)
+    if not name_is_type and 'name' in event_fields:
+        columns["event_name"] = np.asarray(events['name'], dtype=columns["event_type"].dtype)
+    for field in EVENT_NUMERIC:
+        if field in event_fields:
+            values = events[field]
+            if field in ('month', 'count') and values and all(isinstance(v, int) for v in values):
+                columns[f"event_{field}"] = np.asarray(values, dtype=smallest_uint(max(max(values), 0)))
+            else:
+                columns[f"event_{field}"] = numeric_column(values)
+
+    header = {
+        "events_key": events_key,
+        "years": years,
+        "states": states,
+        "strings": list(strings),
+        "event_fields": event_fields,
+        "extra": {k: v for k, v in data.items() if k != events_key} if events_key else {}
+    }
+    return header, columns
+
+def write(path, header, columns):
+    """
+    Writes the header and columns in the layout described at the top of
+    this module. Column offsets are relative to the start of the file.
+    """
+    # Offsets depend on the header length, which depends on the offsets;
+    # iterate until the header size stops changing
+    layout = {}
+    header_len = 0
+    while True:
+        pos = len(MAGIC) + 4 + header_len
+        for name, array in columns.items():
+            pos += -pos % ALIGN
+            layout[name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": pos}
+            pos += array.nbytes
+        encoded = json.dumps({**header, "columns": layout}).encode('utf-8')
+        padded_len = len(encoded) + (-(len(MAGIC) + 4 + len(encoded)) % ALIGN)
+        if padded_len == header_len:
+            break
+        header_len = padded_len
+
+    with open(path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<I', header_len))
+        f.write(encoded.ljust(header_len, b' '))
+        for name, array in columns.items():
+            f.write(b'\0' * (layout[name]["offset"] - f.tell()))
+            f.write(np.ascontiguousarray(array).astype(array.dtype.newbyteorder('<'), copy=False).tobytes())
+
+def write_columnar_dataset(data, path, events_key=None):
+    """
+    Writes the columnar twin of a JSON dataset and publishes it (compressed
+    variants and manifest entry) like write_json_dataset does.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    header, columns = encode(data, events_key)
+    write(path, header, columns)
+    publish_dataset(path)
+
+class ColumnarDataset:
+    """
+    Read side of the columnar format. open() memory-maps the file, so the
+    columns are zero-copy views that only touch the pages actually read.
+    """
+
+    def __init__(self, header, columns):
+        self.header = header
+        self.columns = columns
+        self.years = header["years"]
+        self.states = header["states"]
+        self.strings = header["strings"]
+
+    @classmethod
+    def open(cls, path):
+        raw = np.memmap(path, dtype=np.uint8, mode='r')
+        if bytes(raw[:len(MAGIC)]) != MAGIC:
+            raise ValueError(f"{path} is not a columnar dataset")
+        (header_len,) = struct.unpack('<I', bytes(raw[len(MAGIC):len(MAGIC) + 4]))
+        start = len(MAGIC) + 4
+        header = json.loads(bytes(raw[start:start + header_len]))
+
+        columns = {}
+        for name, spec in header.pop("columns").items():
+            dtype = np.dtype(spec["dtype"])
+            count = int(np.prod(spec["shape"], dtype=np.int64))
+            view = raw[spec["offset"]:spec["offset"] + count * dtype.itemsize]
+            columns[name] = view.view(dtype).reshape(spec["shape"])
+        return cls(header, columns)
+
+    def event_types(self):
+        """
+        String code of every event's type (the same codes as self.strings).
+        """
+        return self.columns["event_type"]
+
+    def to_nested(self):
+        """
+        Rebuilds the original JSON structure (mainly for checks and
+        consumers that need the dict form).
+        """
+        cols = self.columns
+        strings = self.strings
+        fields = self.header["event_fields"]
+        offsets = cols["group_offsets"].tolist()
+
+        event_columns = {}
+        for field in fields:
+            if field in EVENT_CODED:
+                codes = cols.get(f"event_{field}", cols["event_type"]).tolist()
+                event_columns[field] = [strings[c] for c in codes]
+            else:
+                event_columns[field] = cols[f"event_{field}"].tolist()
+        rows = [dict(zip(fields, values)) for values in zip(*(event_columns[f] for f in fields))]
+
+        top = cols["group_top_events"].tolist() if "group_top_events" in cols else None
+        nested = {year: {} for year in self.years}
+        groups = zip(cols["group_year"].tolist(), cols["group_state"].tolist(),
+                     cols["group_loss"].tolist(), cols["group_fatalities"].tolist())
+        for i, (y, s, loss, fatalities) in enumerate(groups):
+            state_data = {"loss": loss, "fatalities": fatalities}
+            if top is not None:
+                state_data["top_events"] = [strings[c] for c in top[i] if c >= 0]
+            state_data["events"] = rows[offsets[i]:offsets[i + 1]]
+            nested[self.years[y]][self.states[s]] = state_data
+
+        events_key = self.header["events_key"]
+        if not events_key:
+            return nested
+        return {events_key: nested, **self.header["extra"]}
@@ -0,0 +1,88 @@
+import gzip
+import hashlib
+import json
+import os
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATASET_DIR = os.path.join(REPO_DIR, "datasets")
+MANIFEST_NAME = "manifest.json"
+
+def content_hash(data):
+    """
+    Short content hash used both as the manifest cache-busting key and as
+    the server's ETag, so the two always agree.
+    """
+    return hashlib.sha256(data).hexdigest()[:16]
+
+def write_compressed_variants(path, data):
+    """
+    Writes path.gz (and path.br when the brotli package is installed) next
+    to a dataset so the server can send them without compressing per request.
+    """
+    with open(path + ".gz", 'wb') as f:
+        # mtime=0 keeps the .gz byte-identical across runs
+        f.write(gzip.compress(data, compresslevel=9, mtime=0))
+
+    if brotli is not None:
+        with open(path + ".br", 'wb') as f:
+            f.write(brotli.compress(data, quality=11))
+
+def update_manifest(path, data):
+    manifest_path = os.path.join(os.path.dirname(path), MANIFEST_NAME)
+    manifest = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path, 'r') as f:
+            manifest = json.load(f)
+
+    manifest[os.path.basename(path)] = {
+        "hash": content_hash(data),
+        "size": len(data)
+    }
+
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+def publish_dataset(path):
+    """
+    Precompresses an already-written dataset file and records its content
+    hash in the manifest of the directory it lives in.
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+
+    write_compressed_variants(path, data)
+    update_manifest(path, data)
+
+def write_json_dataset(obj, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(obj, f, indent=2)
+
+    publish_dataset(path)
+
+def write_text_dataset(text, path):
+    """
+    Like write_json_dataset, for JSON that has already been rendered.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+
+    publish_dataset(path)
+
+def main():
+    # Precompress and hash every dataset that is not produced by a
+    # preprocessing script (e.g. us-states.json) or predates this step.
+    for name in sorted(os.listdir(DATASET_DIR)):
+        if name.endswith(".json") and name != MANIFEST_NAME:
+            path = os.path.join(DATASET_DIR, name)
+            publish_dataset(path)
+            print(f"Published {path}")
+
+if __name__ == "__main__":
+    main()
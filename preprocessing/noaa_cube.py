@@ -0,0 +1,241 @@
+import json
+import os
+
+import numpy as np
+
+METRICS = ('loss', 'fatalities')
+# Month 0 holds events without a month, as in preprocess_noaa_data
+MONTHS = list(range(13))
+# Arrays persisted by NoaaCube.save(), one .npy each
+CUBE_ARRAYS = ('values', 'by_type', 'prefix')
+CUBE_META = "meta.json"
+
+class NoaaCube:
+    """
+    Dense (metric, year, state, event_type, month) array of NOAA loss and
+    fatality sums, used to answer dashboard aggregations without scanning
+    the nested historical JSON.
+    """
+
+    def __init__(self, years, states, event_types, values, by_type=None, prefix=None):
+        self.years = list(years)
+        self.states = list(states)
+        self.event_types = list(event_types)
+        self.values = values
+        # Month-collapsed copy for the common case of no month filter
+        self.by_type = values.sum(axis=4) if by_type is None else by_type
+        # Cumulative sums of by_type along the year axis with a leading zero
+        # row, so any contiguous year range is prefix[b + 1] - prefix[a]
+        if prefix is None:
+            prefix = np.zeros((len(METRICS), len(self.years) + 1) + self.by_type.shape[2:])
+            np.cumsum(self.by_type, axis=1, out=prefix[:, 1:])
+        self.prefix = prefix
+
+        self.year_index = {y: i for i, y in enumerate(self.years)}
+        self.state_index = {s: i for i, s in enumerate(self.states)}
+        self.type_index = {t: i for i, t in enumerate(self.event_types)}
+
+    @classmethod
+    def from_historical(cls, historical):
+        years = sorted(int(y) for y in historical)
+        states = sorted({s for year_data in historical.values() for s in year_data})
+        event_types = sorted({
+            e['type']
+            for year_data in historical.values()
+            for state_data in year_data.values()
+            for e in state_data.get('events', [])
+        })
+
+        state_index = {s: i for i, s in enumerate(states)}
+        type_index = {t: i for i, t in enumerate(event_types)}
+
+        coords, loss, fatalities = [], [], []
+        for y, year in enumerate(years):
+            for state, state_data in historical[str(year)].items():
+                s = state_index[state]
+                for e in state_data.get('events', []):
+                    coords.append((y, s, type_index[e['type']], e.get('month', 0)))
+                    loss.append(e.get('loss', 0))
+                    fatalities.append(e.get('fatalities', 0))
+
+        values = np.zeros((len(METRICS), len(years), len(states), len(event_types), len(MONTHS)))
+        if coords:
+            idx = tuple(np.array(coords).T)
+            np.add.at(values[0], idx, loss)
+            np.add.at(values[1], idx, fatalities)
+
+        return cls(years, states, event_types, values)
+
+    @classmethod
+    def from_columnar(cls, dataset):
+        """
+        Builds the cube from a ColumnarDataset of noaa_data, straight from
+        its (memory-mapped) event columns without materializing any dicts.
+        """
+        cols = dataset.columns
+        years = sorted(int(y) for y in dataset.years)
+        states = sorted(dataset.states)
+        type_codes = np.unique(cols["event_type"])
+        event_types = sorted(dataset.strings[c] for c in type_codes)
+
+        # Map the file's codes onto the cube's sorted axes
+        year_map = np.array([years.index(int(y)) for y in dataset.years], dtype=int)
+        state_map = np.array([states.index(s) for s in dataset.states], dtype=int)
+        type_index = {t: i for i, t in enumerate(event_types)}
+        type_map = np.zeros(len(dataset.strings), dtype=int)
+        for c in type_codes:
+            type_map[c] = type_index[dataset.strings[c]]
+
+        offsets = cols["group_offsets"].astype(np.int64)
+        group = np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+        month = cols["event_month"] if "event_month" in cols else np.zeros(len(group), dtype=int)
+        flat = np.ravel_multi_index(
+            (year_map[cols["group_year"][group]], state_map[cols["group_state"][group]],
+             type_map[cols["event_type"]], month),
+            (len(years), len(states), len(event_types), len(MONTHS))
+        )
+
+        size = len(years) * len(states) * len(event_types) * len(MONTHS)
+        values = np.stack([
+            np.bincount(flat, weights=cols["event_loss"], minlength=size),
+            np.bincount(flat, weights=cols["event_fatalities"], minlength=size)
+        ]).reshape((len(METRICS), len(years), len(states), len(event_types), len(MONTHS)))
+        return cls(years, states, event_types, values)
+
+    @classmethod
+    def from_json(cls, path):
+        with open(path, 'r') as f:
+            data = json.load(f)
+        return cls.from_historical(data.get('historical', {}))
+
+    def save(self, directory):
+        """
+        Writes the cube arrays as .npy files plus a JSON file with the axis
+        labels, so servers can memory-map them instead of rebuilding.
+        """
+        os.makedirs(directory, exist_ok=True)
+        for name in CUBE_ARRAYS:
+            np.save(os.path.join(directory, f"{name}.npy"), getattr(self, name))
+
+        with open(os.path.join(directory, CUBE_META), 'w') as f:
+            json.dump({"years": self.years, "states": self.states, "event_types": self.event_types}, f)
+
+    @classmethod
+    def load(cls, directory, mmap_mode='r'):
+        """
+        Opens a cube written by save(). With mmap_mode='r' the arrays are
+        read-only page-cache mappings shared by every process that opens them.
+        """
+        with open(os.path.join(directory, CUBE_META), 'r') as f:
+            meta = json.load(f)
+
+        arrays = {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mmap_mode)
+                  for name in CUBE_ARRAYS}
+        return cls(meta['years'], meta['states'], meta['event_types'], **arrays)
+
+    def indices(self, years=None, states=None, event_types=None, months=None):
+        """
+        Resolves a filter to index arrays along the year, state, event_type
+        and month axes. None means "all" and stays None so that axis is not
+        copied; unknown names simply match nothing and duplicates are dropped.
+        """
+        def pick(wanted, index):
+            if wanted is None:
+                return None
+            return np.array([index[w] for w in dict.fromkeys(wanted) if w in index], dtype=int)
+
+        return (
+            pick(years, self.year_index),
+            pick(states, self.state_index),
+            pick(event_types, self.type_index),
+            pick(months, {m: m for m in MONTHS})
+        )
+
+    def select(self, years=None, states=None, event_types=None, months=None):
+        """
+        Returns the (metric, year, state, event_type[, month]) sub-array for a filter.
+        """
+        picked = self.indices(years, states, event_types, months)
+        sub = self.by_type if months is None else self.values
+        for axis, idx in enumerate(picked, start=1):
+            if idx is not None and axis < sub.ndim:
+                sub = sub.take(idx, axis=axis)
+        return sub
+
+    def year_span(self, years):
+        """
+        Returns (start, stop) positions if the year filter is one contiguous
+        ascending run, so sums over it can come from the prefix array.
+        """
+        if years is None:
+            return 0, len(self.years)
+        idx = self.indices(years=years)[0]
+        if len(idx) and np.array_equal(idx, np.arange(idx[0], idx[0] + len(idx))):
+            return int(idx[0]), int(idx[0]) + len(idx)
+        return None
+
+    def summed_over_years(self, years=None, states=None, event_types=None, months=None):
+        """
+        Returns the (metric, state, event_type[, month]) sums over the selected
+        years. Contiguous year ranges without a month filter are answered from
+        the prefix sums, touching only the selected states and types.
+        """
+        span = self.year_span(years) if months is None else None
+        if span is None:
+            return self.select(years, states, event_types, months).sum(axis=1)
+
+        _, s, t, _ = self.indices(states=states, event_types=event_types)
+        start, stop = span
+        upper, lower = self.prefix[:, stop], self.prefix[:, start]
+        for axis, idx in ((1, s), (2, t)):
+            if idx is not None:
+                upper, lower = upper.take(idx, axis=axis), lower.take(idx, axis=axis)
+        return upper - lower
+
+    @staticmethod
+    def _labels(names, idx):
+        return list(names) if idx is None else [names[i] for i in idx]
+
+    @staticmethod
+    def _metrics(loss, fatalities):
+        return {"loss": float(loss), "fatalities": int(round(fatalities))}
+
+    def totals(self, **filters):
+        sub = self.summed_over_years(**filters)
+        flat = sub.reshape(len(METRICS), -1).sum(axis=1)
+        return self._metrics(*flat)
+
+    def state_ranking(self, metric='loss', limit=None, **filters):
+        sub = self.summed_over_years(**filters)
+        per_state = sub.sum(axis=tuple(range(2, sub.ndim)))
+
+        names = self._labels(self.states, self.indices(**filters)[1])
+        order = np.argsort(-per_state[METRICS.index(metric)], kind='stable')
+        if limit is not None:
+            order = order[:limit]
+        return [{"state": names[i], **self._metrics(*per_state[:, i])} for i in order]
+
+    def yearly_series(self, **filters):
+        sub = self.select(**filters)
+        per_year = sub.sum(axis=tuple(range(2, sub.ndim)))
+
+        labels = self._labels(self.years, self.indices(**filters)[0])
+        return {
+            "years": labels,
+            "loss": per_year[0].tolist(),
+            "fatalities": [int(round(v)) for v in per_year[1]]
+        }
+
+    def monthly_series(self, **filters):
+        if filters.get('months') is None:
+            filters['months'] = MONTHS
+        sub = self.select(**filters)
+        per_month = sub.sum(axis=(1, 2, 3))
+        return {
+            "months": self._labels(MONTHS, self.indices(**filters)[3]),
+            "loss": per_month[0].tolist(),
+            "fatalities": [int(round(v)) for v in per_month[1]]
+        }
+
+    def meta(self):
+        return {"years": self.years, "states": self.states, "event_types": self.event_types}
@@ -0,0 +1,313 @@
+import json
+import os
+
+import numpy as np
+
+# Arrays persisted by NriTracts.save(), one .npy each
+TRACT_ARRAYS = ('tract_fips', 'risk', 'sovi', 'resl', 'eal_total', 'hazard_eal', 'bbox',
+                'county_keys', 'county_offsets', 'county_order', 'grid_offsets', 'grid_items')
+TRACT_META = "meta.json"
+
+# The bounding-box grid aims for about this many tracts per cell, capped
+# at GRID_MAX_SIDE cells along each axis
+GRID_TRACTS_PER_CELL = 16
+GRID_MAX_SIDE = 512
+
+# Shapefile shape types whose records store a single point instead of a bbox
+SHP_POINT_TYPES = (1, 11, 21)
+
+def read_shp_bboxes(path):
+    """
+    Returns an (n, 4) float64 array of (xmin, ymin, xmax, ymax) per record
+    of a .shp file, in record order and in the file's own coordinates.
+    Null shapes get NaNs. Record offsets come from the .shx index when it
+    is present; otherwise the record headers are walked.
+    """
+    shp = np.memmap(path, dtype=np.uint8, mode='r')
+    shx_path = os.path.splitext(path)[0] + '.shx'
+    if os.path.exists(shx_path):
+        index = np.fromfile(shx_path, dtype='>i4', offset=100).reshape(-1, 2)
+        starts = index[:, 0].astype(np.int64) * 2 + 8
+    else:
+        starts = []
+        pos, end = 100, len(shp)
+        while pos + 8 <= end:
+            content_len = int(np.frombuffer(shp[pos + 4:pos + 8], dtype='>i4')[0]) * 2
+            starts.append(pos + 8)
+            pos += 8 + content_len
+        starts = np.array(starts, dtype=np.int64)
+
+    # Shape type (int32) followed by either the bbox or a point, little-endian
+    # (a trailing null shape has only its type; the clipped bytes are ignored)
+    raw = shp[np.minimum(starts[:, None] + np.arange(36), len(shp) - 1)]
+    shape_type = raw[:, :4].copy().view('<i4').ravel()
+    coords = raw[:, 4:].copy().view('<f8')
+
+    bbox = coords.copy()
+    points = np.isin(shape_type, SHP_POINT_TYPES)
+    bbox[points, 2:] = coords[points, :2]
+    bbox[shape_type == 0] = np.nan
+    return bbox
+
+class NriTracts:
+    """
+    Tract-level NRI scores (RISK, SOVI, RESL, total and per-hazard EAL)
+    with two prebuilt indexes:
+
+      county index   tracts grouped by 5-digit county FIPS (which also
+                     groups them by state), riskiest first within a county
+      bbox grid      a uniform grid over the tracts' bounding boxes, stored
+                     as CSR arrays (cell -> tract ids)
+
+    so that county/state lookups and viewport queries never scan all tracts.
+    """
+
+    def __init__(self, hazards, tract_fips, risk, sovi, resl, eal_total, hazard_eal, bbox=None,
+                 county_keys=None, county_offsets=None, county_order=None,
+                 grid_offsets=None, grid_items=None, grid=None, names=None, crs=None):
+        self.hazards = list(hazards)
+        self.tract_fips = tract_fips
+        self.risk = risk
+        self.sovi = sovi
+        self.resl = resl
+        self.eal_total = eal_total
+        self.hazard_eal = hazard_eal
+        self.bbox = np.full((len(tract_fips), 4), np.nan) if bbox is None else bbox
+        # {"states": {fips: name}, "counties": {fips: name}}
+        self.names = names or {"states": {}, "counties": {}}
+        self.crs = crs
+
+        if county_keys is None:
+            county_keys, county_offsets, county_order = self.build_county_index()
+        self.county_keys = county_keys
+        self.county_offsets = county_offsets
+        self.county_order = county_order
+
+        if grid_offsets is None:
+            grid, grid_offsets, grid_items = self.build_grid()
+        self.grid = grid
+        self.grid_offsets = grid_offsets
+        self.grid_items = grid_items
+
+        self.hazard_index = {h: i for i, h in enumerate(self.hazards)}
+
+    def build_county_index(self):
+        """
+        Sorts tracts by (county FIPS, risk descending, missing risk last) and
+        returns the distinct counties with CSR offsets into that order.
+        """
+        county = self.tract_fips // 1_000_000
+        risk = np.where(np.isnan(self.risk), -np.inf, self.risk)
+        order = np.lexsort((-risk, county)).astype(np.int32)
+        county_keys, starts = np.unique(county[order], return_index=True)
+        offsets = np.append(starts, len(order)).astype(np.int64)
+        return county_keys, offsets, order
+
+    def build_grid(self):
+        """
+        Registers every tract in each grid cell its bbox overlaps and returns
+        (grid description, CSR offsets per cell, tract ids).
+        """
+        has_box = ~np.isnan(self.bbox).any(axis=1)
+        if not has_box.any():
+            grid = {"shape": [0, 0], "extent": [0.0, 0.0, 0.0, 0.0]}
+            return grid, np.zeros(1, dtype=np.int64), np.zeros(0, dtype=np.int32)
+
+        boxes = self.bbox[has_box]
+        ids = np.flatnonzero(has_box).astype(np.int32)
+        extent = [float(boxes[:, 0].min()), float(boxes[:, 1].min()),
+                  float(boxes[:, 2].max()), float(boxes[:, 3].max())]
+        side = int(np.clip(np.sqrt(len(ids) / GRID_TRACTS_PER_CELL), 1, GRID_MAX_SIDE))
+        grid = {"shape": [side, side], "extent": extent}
+
+        x0, y0 = self.cell_of(grid, boxes[:, 0], boxes[:, 1])
+        x1, y1 = self.cell_of(grid, boxes[:, 2], boxes[:, 3])
+        widths = x1 - x0 + 1
+        counts = widths * (y1 - y0 + 1)
+
+        # One (cell, tract) pair per covered cell, expanded without a loop
+        tract = np.repeat(np.arange(len(ids)), counts)
+        k = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        cx = x0[tract] + k % widths[tract]
+        cy = y0[tract] + k // widths[tract]
+        cells = cy * side + cx
+
+        order = np.argsort(cells, kind='stable')
+        offsets = np.zeros(side * side + 1, dtype=np.int64)
+        np.cumsum(np.bincount(cells, minlength=side * side), out=offsets[1:])
+        return grid, offsets, ids[tract[order]]
+
+    @staticmethod
+    def cell_of(grid, x, y):
+        nx, ny = grid["shape"]
+        xmin, ymin, xmax, ymax = grid["extent"]
+        cx = (np.asarray(x, dtype=float) - xmin) / max(xmax - xmin, 1e-12) * nx
+        cy = (np.asarray(y, dtype=float) - ymin) / max(ymax - ymin, 1e-12) * ny
+        return (np.clip(cx.astype(np.int64), 0, nx - 1),
+                np.clip(cy.astype(np.int64), 0, ny - 1))
+
+    @classmethod
+    def from_columns(cls, columns, hazards, bbox=None, crs=None):
+        """
+        Builds the tract table from decoded DBF columns: TRACTFIPS, STATE,
+        COUNTY, RISK_SCORE, SOVI_SCORE, RESL_SCORE, EAL_VALT and the
+        {prefix}_EALB / {prefix}_EALA pair of every hazard in `hazards`
+        ({name: prefix}). Missing numeric columns count as zero, as in
+        process_nri. Records without a usable TRACTFIPS are dropped.
+        """
+        raw_fips = np.char.strip(np.asarray(columns['TRACTFIPS']))
+        keep = np.char.isdigit(raw_fips) & (np.char.str_len(raw_fips) > 0)
+        n = int(keep.sum())
+
+        def column(name, fill=0.0):
+            return columns[name][keep] if name in columns else np.full(n, fill)
+
+        hazard_eal = np.column_stack([
+            np.nan_to_num(column(f"{prefix}_EALB")) + np.nan_to_num(column(f"{prefix}_EALA"))
+            for prefix in hazards.values()
+        ]) if hazards else np.zeros((n, 0))
+
+        tract_fips = raw_fips[keep].astype(np.int64)
+        names = {"states": {}, "counties": {}}
+        for key, field, divisor in (("states", 'STATE', 1_000_000_000), ("counties", 'COUNTY', 1_000_000)):
+            if field not in columns:
+                continue
+            codes, first = np.unique(tract_fips // divisor, return_index=True)
+            labels = column(field)[first]
+            names[key] = {int(c): label.decode('cp1252').strip().title() for c, label in zip(codes, labels)}
+
+        return cls(
+            hazards=list(hazards),
+            tract_fips=tract_fips,
+            risk=column('RISK_SCORE', np.nan),
+            sovi=column('SOVI_SCORE', np.nan),
+            resl=column('RESL_SCORE', np.nan),
+            eal_total=np.nan_to_num(column('EAL_VALT')),
+            hazard_eal=hazard_eal,
+            bbox=None if bbox is None else bbox[keep],
+            names=names,
+            crs=crs
+        )
+
+    def save(self, directory):
+        """
+        Writes the tract arrays and indexes as .npy files plus a JSON file
+        with the labels, so servers can memory-map them.
+        """
+        os.makedirs(directory, exist_ok=True)
+        for name in TRACT_ARRAYS:
+            np.save(os.path.join(directory, f"{name}.npy"), getattr(self, name))
+
+        with open(os.path.join(directory, TRACT_META), 'w') as f:
+            json.dump({"hazards": self.hazards, "grid": self.grid, "names": self.names, "crs": self.crs}, f)
+
+    @classmethod
+    def load(cls, directory, mmap_mode='r'):
+        """
+        Opens tracts written by save(), memory-mapped read-only by default.
+        """
+        with open(os.path.join(directory, TRACT_META), 'r') as f:
+            meta = json.load(f)
+
+        arrays = {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mmap_mode)
+                  for name in TRACT_ARRAYS}
+        names = {key: {int(k): v for k, v in labels.items()} for key, labels in meta['names'].items()}
+        return cls(meta['hazards'], grid=meta['grid'], names=names, crs=meta.get('crs'), **arrays)
+
+    def county_tracts(self, county_fips):
+        """
+        Tract ids of a 5-digit county FIPS, riskiest first.
+        """
+        i = np.searchsorted(self.county_keys, int(county_fips))
+        if i == len(self.county_keys) or self.county_keys[i] != int(county_fips):
+            return np.zeros(0, dtype=np.int32)
+        return self.county_order[self.county_offsets[i]:self.county_offsets[i + 1]]
+
+    def state_tracts(self, state_fips):
+        """
+        Tract ids of a 2-digit state FIPS, grouped by county.
+        """
+        lo = np.searchsorted(self.county_keys, int(state_fips) * 1000)
+        hi = np.searchsorted(self.county_keys, (int(state_fips) + 1) * 1000)
+        return self.county_order[self.county_offsets[lo]:self.county_offsets[hi]]
+
+    def metric(self, name):
+        if name == 'risk':
+            return self.risk
+        if name in ('sovi', 'resl', 'eal_total'):
+            return getattr(self, name)
+        if name in self.hazard_index:
+            return self.hazard_eal[:, self.hazard_index[name]]
+        raise ValueError(f"Unknown metric '{name}'")
+
+    def top(self, n=10, metric='risk', county=None, state=None):
+        """
+        Ids of the n highest-`metric` tracts, optionally within a county or
+        state FIPS. Risk within a county comes straight from the index.
+        """
+        if county is not None:
+            ids = self.county_tracts(county)
+            if metric == 'risk':
+                return ids[:n]
+        elif state is not None:
+            ids = self.state_tracts(state)
+        else:
+            ids = np.arange(len(self.tract_fips))
+
+        values = np.asarray(self.metric(metric))[ids]
+        values = np.where(np.isnan(values), -np.inf, values)
+        if n < len(ids):
+            part = np.argpartition(-values, n)[:n]
+        else:
+            part = np.arange(len(ids))
+        return ids[part[np.argsort(-values[part], kind='stable')]]
+
+    def in_bbox(self, xmin, ymin, xmax, ymax):
+        """
+        Ids (ascending) of the tracts whose bounding box intersects the
+        given box, in the shapefile's coordinates (see self.crs).
+        """
+        nx, ny = self.grid["shape"]
+        if nx == 0 or xmin > xmax or ymin > ymax:
+            return np.zeros(0, dtype=np.int32)
+
+        gx0, gy0, gx1, gy1 = self.grid["extent"]
+        if xmax < gx0 or xmin > gx1 or ymax < gy0 or ymin > gy1:
+            return np.zeros(0, dtype=np.int32)
+
+        x0, y0 = self.cell_of(self.grid, xmin, ymin)
+        x1, y1 = self.cell_of(self.grid, xmax, ymax)
+        # Cells x0..x1 of one grid row are contiguous in the CSR arrays
+        rows = [self.grid_items[self.grid_offsets[cy * nx + x0]:self.grid_offsets[cy * nx + x1 + 1]]
+                for cy in range(int(y0), int(y1) + 1)]
+        candidates = np.unique(np.concatenate(rows))
+
+        box = self.bbox[candidates]
+        hit = (box[:, 0] <= xmax) & (box[:, 2] >= xmin) & (box[:, 1] <= ymax) & (box[:, 3] >= ymin)
+        return candidates[hit]
+
+    def records(self, ids, hazards=True):
+        """
+        JSON-ready dicts for the given tract ids.
+        """
+        def number(value):
+            value = float(value)
+            return None if np.isnan(value) else value
+
+        records = []
+        for i in np.asarray(ids, dtype=np.int64).tolist():
+            fips = int(self.tract_fips[i])
+            record = {
+                "tract": f"{fips:011d}",
+                "state": self.names["states"].get(fips // 1_000_000_000),
+                "county": self.names["counties"].get(fips // 1_000_000),
+                "risk_score": number(self.risk[i]),
+                "sovi_score": number(self.sovi[i]),
+                "resl_score": number(self.resl[i]),
+                "eal_total": float(self.eal_total[i]),
+                "bbox": [number(v) for v in self.bbox[i]]
+            }
+            if hazards:
+                record["hazards"] = {h: float(v) for h, v in zip(self.hazards, self.hazard_eal[i])}
+            records.append(record)
+        return records
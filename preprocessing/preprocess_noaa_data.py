@@ -1,24 +1,58 @@
+import argparse
+import glob
+import hashlib
 import json
 import os
+import numpy as np
 import pandas as pd
 
-from ml.predict import predict_next_year
+from ml.predict import predict_next_year_from_totals
+from dataset_io import DATASET_DIR, write_text_dataset
+from noaa_cube import NoaaCube
+from columnar_dataset import columnar_path, write_columnar_dataset
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-DATASET_DIR = os.path.join(BASE_DIR, "datasets")
 DATA_DIR = os.path.join(BASE_DIR, "data")
 CSV_PATH = os.path.join(DATA_DIR, "US_Disasters_2000_2024.csv")
 OUTPUT_JSON = os.path.join(DATASET_DIR, "noaa_data.json")
+CUBE_DIR = os.path.join(DATASET_DIR, "noaa_cube")
+# One aggregate partition per year plus a manifest of source-file hashes,
+# so reruns only recompute the years whose source rows changed
+PARTITION_DIR = os.path.join(DATA_DIR, "noaa_partitions")
+PARTITION_MANIFEST = "manifest.json"
 
-def load_and_clean_data():
-    df = pd.read_csv(CSV_PATH)
+# Columns needed downstream, with the dtypes used by the streaming reader.
+# loss/fatalities are read as floats with thousands=',' instead of being
+# parsed as strings and cleaned afterwards.
+STREAM_DTYPES = {
+    'year': 'int32',
+    'month': 'float32',
+    'state': 'str',
+    'disaster_name': 'str',
+    'loss': 'float64',
+    'fatalities': 'float64'
+}
+GROUP_KEYS = ['year', 'state', 'disaster_name', 'month']
 
+def parse_args():
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument("--chunksize", type=int, default=None,
+                        help="Stream the CSV in chunks of this many rows instead of loading it whole")
+    parser.add_argument("--sources", nargs='+', default=[CSV_PATH],
+                        help="Source CSV files or directories of CSVs (e.g. one file per year)")
+    parser.add_argument("--rebuild", action="store_true",
+                        help="Ignore the partition manifest and recompute every year")
+
+    return parser.parse_args()
+
+def clean_data(df):
     df.columns = [c.lower().strip() for c in df.columns]
 
-    if df['loss'].dtype == 'O':
+    if not pd.api.types.is_numeric_dtype(df['loss']):
         df['loss'] = df['loss'].astype(str).str.replace(',', '').astype(float)
     
-    if df['fatalities'].dtype == 'O':
+    if not pd.api.types.is_numeric_dtype(df['fatalities']):
         df['fatalities'] = df['fatalities'].astype(str).str.replace(',', '').astype(float)
 
     df['loss'] = df['loss'].fillna(0)
@@ -33,65 +67,339 @@ def load_and_clean_data():
     
     return df
 
+def load_and_aggregate_chunks(chunksize, path=CSV_PATH, state_order=None):
+    """
+    Streams the CSV and folds each cleaned chunk into running
+    (year, state, disaster_name, month) sums, so memory is bounded by the
+    number of distinct keys rather than the number of rows. If state_order
+    is a dict, it is filled in by record_state_order.
+    """
+    header = pd.read_csv(path, nrows=0).columns
+    usecols = {c: c.lower().strip() for c in header if c.lower().strip() in STREAM_DTYPES}
+    dtypes = {raw: STREAM_DTYPES[name] for raw, name in usecols.items()}
+
+    reader = pd.read_csv(path, usecols=list(usecols), dtype=dtypes,
+                         thousands=',', chunksize=chunksize)
+
+    partial = None
+    rows = 0
+    for chunk in reader:
+        chunk = clean_data(chunk)
+        if state_order is not None:
+            record_state_order(chunk, state_order, path)
+        keys = [k for k in GROUP_KEYS if k in chunk.columns]
+        chunk_agg = chunk.groupby(keys)[['loss', 'fatalities']].sum()
+
+        if partial is None:
+            partial = chunk_agg
+        else:
+            partial = pd.concat([partial, chunk_agg]).groupby(level=keys).sum()
+
+        rows += len(chunk)
+        print(f"Processed {rows} rows ({len(partial)} partial aggregates)...")
+
+    return partial.reset_index()
+
 def aggregate_data(df):
     pre_agg = df.groupby(['year', 'state', 'disaster_name', 'month'])[['loss', 'fatalities']].sum().reset_index()
-    
-    grouped = pre_agg.groupby(['year', 'state'])
-    
+
+    # Everything below is computed column-wise over pre_agg; the only Python
+    # loop left is over (year, state) groups to assemble the nested dict.
+    keys = pre_agg.groupby(['year', 'state']).size()
+    by_type = pre_agg.groupby(['year', 'state', 'disaster_name'])['loss'].sum()
+    type_sizes = by_type.groupby(level=['year', 'state']).size().to_numpy()
+    type_offsets = np.concatenate(([0], np.cumsum(type_sizes)))
+    type_names = by_type.index.get_level_values('disaster_name').to_numpy()
+    type_loss = by_type.to_numpy()
+
+    events = pd.DataFrame({
+        'type': pre_agg['disaster_name'],
+        'name': pre_agg['disaster_name'],
+        'loss': pre_agg['loss'].astype(float),
+        'fatalities': pre_agg['fatalities'].astype(int),
+        'month': pre_agg['month'].astype(int)
+    }).to_dict('records')
+
+    # pre_agg is sorted by (year, state), so each group is a contiguous slice
+    offsets = np.concatenate(([0], np.cumsum(keys.to_numpy())))
+    loss = pre_agg['loss'].to_numpy(dtype=float)
+    fatalities = pre_agg['fatalities'].to_numpy(dtype=float)
+
     agg_data = {}
-    
-    for (year, state), group in grouped:
-        total_loss = group['loss'].sum()
-        total_fatalities = group['fatalities'].sum()
-        
-        top_events_series = group.groupby('disaster_name')['loss'].sum().sort_values(ascending=False).head(3)
-        top_events = top_events_series.index.tolist()
-
-        events_list = []
-        for _, row in group.iterrows():
-            events_list.append({
-                'type': row['disaster_name'],
-                'name': row['disaster_name'],
-                'loss': float(row['loss']),
-                'fatalities': int(row['fatalities']),
-                'month': int(row['month'])
-            })
-        
+
+    for i, (year, state) in enumerate(keys.index):
         year_str = str(year)
         if year_str not in agg_data:
             agg_data[year_str] = {}
-        
+
+        # Totals are plain ndarray sums and the top events a reversed
+        # quicksort, exactly as the original per-group Series.sum() and
+        # sort_values(ascending=False): groupby().sum() is compensated and
+        # a stable sort orders ties differently, so neither is byte-identical.
+        a, b = offsets[i], offsets[i + 1]
+        type_slice = slice(type_offsets[i], type_offsets[i + 1])
+        order = np.arange(type_sizes[i])[::-1][type_loss[type_slice][::-1].argsort(kind='quicksort')][::-1]
+
         agg_data[year_str][state] = {
-            "loss": float(total_loss),
-            "fatalities": float(total_fatalities),
-            "top_events": top_events,
-            "events": events_list
+            "loss": float(loss[a:b].sum()),
+            "fatalities": float(fatalities[a:b].sum()),
+            "top_events": type_names[type_slice][order[:3]].tolist(),
+            "events": events[a:b]
         }
-        
+
     return agg_data
 
+def record_state_order(df, state_order, source):
+    """
+    Records where each (year, state) first appears in df as
+    state_order[year][state] = (source, row), keeping earlier rows, so the
+    assembled predictions keep the state order of a full run.
+    """
+    firsts = df[['year', 'state']].drop_duplicates()
+    for row, year, state in zip(firsts.index.tolist(), firsts['year'].tolist(), firsts['state'].tolist()):
+        state_order.setdefault(year, {}).setdefault(state, (source, row))
+
+def read_source(path, chunksize=None):
+    """
+    Returns the (year, state, disaster_name, month) sums of one source CSV
+    and the first row of each (year, state) in it.
+    """
+    state_order = {}
+    if chunksize:
+        pre_agg = load_and_aggregate_chunks(chunksize, path, state_order)
+    else:
+        df = clean_data(pd.read_csv(path))
+        record_state_order(df, state_order, path)
+        pre_agg = df.groupby(GROUP_KEYS)[['loss', 'fatalities']].sum().reset_index()
+    return pre_agg[GROUP_KEYS + ['loss', 'fatalities']], state_order
+
+def source_paths(sources):
+    paths = []
+    for source in sources:
+        if os.path.isdir(source):
+            paths.extend(sorted(glob.glob(os.path.join(source, "*.csv"))))
+        else:
+            paths.append(source)
+    return [os.path.abspath(p) for p in paths]
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def frame_hash(df):
+    return hashlib.sha256(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes()).hexdigest()
+
+def partition_path(year, ext="json"):
+    return os.path.join(PARTITION_DIR, f"{year}.{ext}")
+
+def load_partition_manifest():
+    path = os.path.join(PARTITION_DIR, PARTITION_MANIFEST)
+    if not os.path.exists(path):
+        return {"sources": {}}
+    with open(path, 'r') as f:
+        return json.load(f)
+
+def render_json(obj, level):
+    """
+    json.dump(..., indent=2) output for obj as it appears `level` levels
+    deep in the final file. Raw newlines only occur between tokens (string
+    newlines are escaped), so re-indenting them is safe.
+    """
+    return json.dumps(obj, indent=2).replace("\n", "\n" + "  " * level)
+
+def write_partition(year, pre_agg, first_seen, data_hash):
+    """
+    Writes a year's partition: the aggregates as compact JSON, plus the
+    year's block of noaa_data.json pre-rendered, so unchanged years are
+    never re-encoded when the output is assembled.
+    """
+    historical = aggregate_data(pre_agg).get(str(year), {})
+    with open(partition_path(year, "fragment"), 'w') as f:
+        f.write(render_json(historical, 2))
+
+    partition = {
+        "hash": data_hash,
+        "first_seen": first_seen,
+        "event_types": get_unique_event_types(pre_agg),
+        "historical": historical
+    }
+    # json.dumps uses the C encoder; json.dump would not
+    with open(partition_path(year), 'w') as f:
+        f.write(json.dumps(partition))
+
+def update_partitions(sources, chunksize=None, rebuild=False):
+    """
+    Brings the per-year partitions up to date with the source CSVs and
+    returns the years whose partition was rewritten or removed.
+
+    Only sources whose content hash differs from the manifest are read,
+    plus any unchanged source that shares a year with them. A year is
+    re-aggregated from the combined rows of those sources, and its
+    partition is left alone if the aggregated rows hash the same as before.
+    """
+    os.makedirs(PARTITION_DIR, exist_ok=True)
+    manifest = {"sources": {}} if rebuild else load_partition_manifest()
+    known = manifest["sources"]
+
+    hashes = {path: file_hash(path) for path in source_paths(sources)}
+    changed = [p for p in hashes if known.get(p, {}).get("hash") != hashes[p]]
+    removed = [p for p in known if p not in hashes]
+    if not changed and not removed:
+        print("All sources unchanged since the last run.")
+        return []
+
+    read = {}
+    for path in changed:
+        print(f"Reading changed source {path}...")
+        read[path] = read_source(path, chunksize)
+
+    dirty_years = {int(y) for path in changed + removed for y in known.get(path, {}).get("years", [])}
+    for pre_agg, _ in read.values():
+        dirty_years.update(pre_agg['year'].unique().tolist())
+
+    # Unchanged sources that hold rows for a dirty year are needed to
+    # rebuild that year in full
+    for path in hashes:
+        if path not in read and dirty_years & set(known.get(path, {}).get("years", [])):
+            print(f"Reading {path} for shared years...")
+            read[path] = read_source(path, chunksize)
+
+    if read:
+        combined = pd.concat([pre_agg for pre_agg, _ in read.values()], ignore_index=True)
+    else:
+        # Only removed sources covered the dirty years, so their
+        # partitions are dropped below
+        combined = pd.DataFrame(columns=GROUP_KEYS + ['loss', 'fatalities'])
+    combined = combined[combined['year'].isin(dirty_years)]
+    combined = combined.groupby(GROUP_KEYS)[['loss', 'fatalities']].sum().reset_index()
+
+    rewritten = []
+    for year in sorted(dirty_years):
+        year_rows = combined[combined['year'] == year].reset_index(drop=True)
+        if year_rows.empty:
+            for ext in ("json", "fragment"):
+                if os.path.exists(partition_path(year, ext)):
+                    os.remove(partition_path(year, ext))
+            rewritten.append(year)
+            continue
+
+        data_hash = frame_hash(year_rows)
+        if os.path.exists(partition_path(year)) and os.path.exists(partition_path(year, "fragment")):
+            with open(partition_path(year), 'r') as f:
+                if json.load(f).get("hash") == data_hash:
+                    continue
+
+        first_seen = {}
+        for _, state_order in read.values():
+            for state, seen in state_order.get(year, {}).items():
+                first_seen.setdefault(state, seen)
+        write_partition(year, year_rows, first_seen, data_hash)
+        rewritten.append(year)
+
+    for path in removed:
+        del known[path]
+    for path in hashes:
+        if path in read:
+            known[path] = {"hash": hashes[path], "years": sorted(read[path][0]['year'].unique().tolist())}
+
+    # The manifest goes last: a crash before this point just means the
+    # same sources are read again next time
+    with open(os.path.join(PARTITION_DIR, PARTITION_MANIFEST), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+    print(f"Recomputed {len(rewritten)} of {len(dirty_years)} affected years.")
+    return rewritten
+
+def load_partitions(sources):
+    """
+    Reads the cached partitions back. Returns the historical dict, the
+    event types, the (state, year) totals used for predictions, the states
+    in order of first appearance across `sources`, and the pre-rendered
+    historical blocks by year.
+    """
+    years = sorted(
+        int(name[:-len(".json")]) for name in os.listdir(PARTITION_DIR)
+        if name.endswith(".json") and name != PARTITION_MANIFEST
+    )
+    rank = {path: i for i, path in enumerate(source_paths(sources))}
+
+    historical = {}
+    fragments = {}
+    event_types = set()
+    first_seen = {}
+    rows = []
+    for year in years:
+        with open(partition_path(year), 'r') as f:
+            partition = json.load(f)
+        with open(partition_path(year, "fragment"), 'r') as f:
+            fragments[str(year)] = f.read()
+
+        historical[str(year)] = partition["historical"]
+        event_types.update(partition["event_types"])
+        for state, (path, row) in partition["first_seen"].items():
+            key = (rank.get(path, len(rank)), row)
+            if state not in first_seen or key < first_seen[state]:
+                first_seen[state] = key
+        for state, data in partition["historical"].items():
+            rows.append((state, year, data["loss"], data["fatalities"]))
+
+    yearly = pd.DataFrame(rows, columns=['state', 'year', 'loss', 'fatalities']).set_index(['state', 'year'])
+    states = sorted(first_seen, key=first_seen.get)
+    return historical, sorted(event_types), yearly, states, fragments
+
+def render_output(fragments, predictions, event_types):
+    """
+    Stitches noaa_data.json from the pre-rendered yearly blocks. The result
+    is byte-identical to json.dump(final_output, f, indent=2).
+    """
+    if fragments:
+        blocks = ",\n".join(f"    {json.dumps(year)}: {text}" for year, text in fragments.items())
+        historical = "{\n" + blocks + "\n  }"
+    else:
+        historical = "{}"
+
+    return (
+        "{\n"
+        f'  "historical": {historical},\n'
+        f'  "predictions": {render_json(predictions, 1)},\n'
+        f'  "unique_event_types": {render_json(event_types, 1)}\n'
+        "}"
+    )
+
 def get_unique_event_types(df):
     if 'disaster_name' in df.columns:
         return sorted(df['disaster_name'].unique().tolist())
     return []
 
 def main():
+    args = parse_args()
     try:
-        df = load_and_clean_data()
-        historical_data = aggregate_data(df)
-        event_types = get_unique_event_types(df)
-        predictions = predict_next_year(df)
+        rewritten = update_partitions(args.sources, args.chunksize, args.rebuild)
+        outputs = (OUTPUT_JSON, columnar_path(OUTPUT_JSON), CUBE_DIR)
+        if not rewritten and all(os.path.exists(p) for p in outputs):
+            print(f"{OUTPUT_JSON} is up to date.")
+            return
+
+        historical_data, event_types, yearly, states, fragments = load_partitions(args.sources)
+        predictions = predict_next_year_from_totals(yearly, states)
+
+        write_text_dataset(render_output(fragments, predictions, event_types), OUTPUT_JSON)
+            
+        print(f"Successfully created {OUTPUT_JSON}")
 
         final_output = {
             "historical": historical_data,
             "predictions": predictions,
             "unique_event_types": event_types
         }
-        
-        with open(OUTPUT_JSON, 'w') as f:
-            json.dump(final_output, f, indent=2)
-            
-        print(f"Successfully created {OUTPUT_JSON}")
+        write_columnar_dataset(final_output, columnar_path(OUTPUT_JSON), events_key="historical")
+        print(f"Successfully created {columnar_path(OUTPUT_JSON)}")
+
+        NoaaCube.from_historical(historical_data).save(CUBE_DIR)
+        print(f"Successfully created {CUBE_DIR}")
         
     except Exception as e:
         print(f"An error occurred: {e}")
@@ -1,12 +1,19 @@
-import json
+import argparse
 import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
 from dbfread import DBF
-from collections import defaultdict
+
+from dataset_io import DATASET_DIR, write_json_dataset
+from nri_tracts import NriTracts, read_shp_bboxes
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-DATASET_DIR = os.path.join(BASE_DIR, "datasets")
 DBF_PATH = os.path.join(BASE_DIR, "data/NRI_Shapefile_CensusTracts/NRI_Shapefile_CensusTracts.dbf")
+SHP_PATH = os.path.splitext(DBF_PATH)[0] + ".shp"
 OUTPUT_JSON = os.path.join(DATASET_DIR, "nri_data.json")
+TRACTS_DIR = os.path.join(DATASET_DIR, "nri_tracts")
 
 # Hazards to process
 HAZARDS = {
@@ -20,77 +27,190 @@ HAZARDS = {
     'Hail': 'HAIL'
 }
 
-def process_nri():
-    state_data = defaultdict(lambda: {
-        'count': 0,
-        'sovi_sum': 0.0,
-        'resl_sum': 0.0,
-        'risk_sum': 0.0,
-        'eal_total': 0.0,
-        'hazards': defaultdict(float)
-    })
-    
+SCORE_FIELDS = {
+    'sovi_sum': 'SOVI_SCORE',
+    'resl_sum': 'RESL_SCORE',
+    'risk_sum': 'RISK_SCORE',
+    'eal_total': 'EAL_VALT'
+}
+
+# Extra per-tract fields kept for the tract-level output
+TRACT_FIELDS = ('TRACTFIPS', 'COUNTY')
+
+# Records handed to each worker process
+RECORDS_PER_TASK = 20000
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Number of processes used to decode the DBF (default: CPU count)")
+    parser.add_argument("--no-tracts", action="store_true",
+                        help=f"Only write the state averages, not the tract-level {TRACTS_DIR}")
+
+    return parser.parse_args()
+
+def read_dbf_layout(path, columns):
+    """
+    Reads the DBF header and returns the record geometry plus the
+    (offset, length) of each requested column that exists in the file.
+    """
+    table = DBF(path, load=False, encoding='cp1252')
+    header = table.header
+
+    offsets = {}
+    offset = 1  # byte 0 of every record is the deletion flag
+    for field in table.fields:
+        if field.name in columns:
+            offsets[field.name] = (offset, field.length)
+        offset += field.length
+
+    file_records = (os.path.getsize(path) - header.headerlen) // header.recordlen
+    numrecords = min(header.numrecords, file_records)
+    return header.headerlen, header.recordlen, numrecords, offsets
+
+def decode_numeric(raw):
+    # Same rules as dbfread's N/F parser: strip padding, blank -> missing
+    raw = np.char.strip(raw, b' *')
+    raw = np.where(raw == b'', b'nan', np.char.replace(raw, b',', b'.'))
+    return raw.astype(np.float64)
+
+def decode_records(path, headerlen, recordlen, start, stop, offsets, char_fields):
+    """
+    Decodes records [start, stop) of a memory-mapped DBF into one NumPy
+    array per column. Runs in a worker process.
+    """
+    records = np.memmap(path, dtype=np.uint8, mode='r', offset=headerlen + start * recordlen,
+                        shape=(stop - start, recordlen))
+
+    columns = {'_valid': records[:, 0] == ord(' ')}
+    for name, (offset, length) in offsets.items():
+        raw = np.ascontiguousarray(records[:, offset:offset + length]).view(f'S{length}').ravel()
+        if name in char_fields:
+            columns[name] = np.char.rstrip(raw, b'\0 ')
+        else:
+            columns[name] = decode_numeric(raw)
+
+    del records
+    return columns
+
+def read_nri_columns(path, columns, char_fields=(), workers=None, with_valid=False):
+    """
+    Decodes the requested columns of every live (not deleted) record. With
+    with_valid=True also returns the per-record liveness mask, which lines
+    the columns up with the shapefile's .shp records.
+    """
+    headerlen, recordlen, numrecords, offsets = read_dbf_layout(path, columns)
+
+    bounds = list(range(0, numrecords, RECORDS_PER_TASK)) + [numrecords]
+    tasks = list(zip(bounds[:-1], bounds[1:]))
+
+    parts = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(decode_records, path, headerlen, recordlen, start, stop, offsets, char_fields)
+            for start, stop in tasks
+        ]
+        for (start, stop), future in zip(tasks, futures):
+            parts.append(future.result())
+            print(f"Processed {stop} records...")
+
+    if not parts:
+        columns = {name: np.array([]) for name in offsets}
+        return (columns, np.zeros(0, dtype=bool)) if with_valid else columns
+
+    valid = np.concatenate([p['_valid'] for p in parts])
+    columns = {name: np.concatenate([p[name] for p in parts])[valid] for name in offsets}
+    return (columns, valid) if with_valid else columns
+
+def write_tracts(columns, valid, directory=TRACTS_DIR, shp_path=SHP_PATH):
+    """
+    Saves the tract-level table with its county and bbox indexes. The bbox
+    index is left empty when the .shp is missing or doesn't line up.
+    """
+    bbox = None
+    crs = None
+    if os.path.exists(shp_path):
+        boxes = read_shp_bboxes(shp_path)
+        if len(boxes) == len(valid):
+            bbox = boxes[valid]
+            prj_path = os.path.splitext(shp_path)[0] + ".prj"
+            if os.path.exists(prj_path):
+                with open(prj_path, 'r') as f:
+                    crs = f.read().strip()
+        else:
+            print(f"WARNING: {shp_path} has {len(boxes)} records but the DBF has {len(valid)}; skipping the bbox index.")
+    else:
+        print(f"WARNING: {shp_path} not found; skipping the bbox index.")
+
+    tracts = NriTracts.from_columns(columns, HAZARDS, bbox=bbox, crs=crs)
+    tracts.save(directory)
+    print(f"Wrote {len(tracts.tract_fips)} tracts in {len(tracts.county_keys)} counties to {directory}")
+    return tracts
+
+def process_nri(workers=None, tracts=True):
+    hazard_fields = {h_name: (f"{prefix}_EALB", f"{prefix}_EALA") for h_name, prefix in HAZARDS.items()}
+    wanted = {'STATE', *SCORE_FIELDS.values(), *(f for pair in hazard_fields.values() for f in pair)}
+    if tracts:
+        wanted.update(TRACT_FIELDS)
+
     try:
-        table = DBF(DBF_PATH, load=False, encoding='cp1252')
-        fields = set(table.field_names)
-        
-        for i, record in enumerate(table):
-            if i % 10000 == 0:
-                print(f"Processed {i} records...")
-                
-            state = record['STATE']
-            if not state: continue
-            state = state.title()
-            
-            sovi = record.get('SOVI_SCORE')
-            resl = record.get('RESL_SCORE')
-            risk = record.get('RISK_SCORE')
-            eal_t = record.get('EAL_VALT')
-            
-            s_data = state_data[state]
-            s_data['count'] += 1
-            
-            if sovi is not None: s_data['sovi_sum'] += float(sovi)
-            if resl is not None: s_data['resl_sum'] += float(resl)
-            if risk is not None: s_data['risk_sum'] += float(risk)
-            if eal_t is not None: s_data['eal_total'] += float(eal_t)
-            
-            for h_name, prefix in HAZARDS.items():
-                val = 0.0
-                if f"{prefix}_EALB" in fields:
-                    v = record.get(f"{prefix}_EALB")
-                    if v: val += float(v)
-                    
-                if f"{prefix}_EALA" in fields:
-                    v = record.get(f"{prefix}_EALA")
-                    if v: val += float(v)
-                    
-                s_data['hazards'][h_name] += val
-                
+        columns, valid = read_nri_columns(DBF_PATH, wanted, char_fields={'STATE', *TRACT_FIELDS},
+                                          workers=workers, with_valid=True)
     except Exception as e:
         print(f"Error processing DBF: {e}")
         return
 
     print("Aggregating final results...")
+    n = len(columns['STATE'])
+
+    # Title-case each distinct raw state once, then number states in order
+    # of first appearance so the output keeps the original key order.
+    raw_states, inverse = np.unique(columns['STATE'], return_inverse=True)
+    titled = np.array([s.decode('cp1252').title() for s in raw_states], dtype=object)
+    state_names = titled[inverse.ravel()]
+    keep = state_names != ''
+    codes, states = pd.factorize(state_names[keep])
+
+    def state_sums(values):
+        # bincount adds in record order, matching a sequential += per state
+        return np.bincount(codes, weights=np.nan_to_num(values[keep]), minlength=len(states))
+
+    def column(name):
+        return columns[name] if name in columns else np.zeros(n)
+
+    counts = np.bincount(codes, minlength=len(states))
+    sums = {key: state_sums(column(field)) for key, field in SCORE_FIELDS.items()}
+    hazards = {
+        h_name: state_sums(np.nan_to_num(column(b_field)) + np.nan_to_num(column(a_field)))
+        for h_name, (b_field, a_field) in hazard_fields.items()
+    }
+
     final_output = {}
     
-    for state, data in state_data.items():
-        count = data['count']
+    for i, state in enumerate(states):
+        count = int(counts[i])
         if count == 0: continue
         
         final_output[state] = {
-            "risk_score": data['risk_sum'] / count,
-            "sovi_score": data['sovi_sum'] / count,
-            "resl_score": data['resl_sum'] / count,
-            "eal_total": data['eal_total'],
-            "hazards": dict(data['hazards'])
+            "risk_score": float(sums['risk_sum'][i]) / count,
+            "sovi_score": float(sums['sovi_sum'][i]) / count,
+            "resl_score": float(sums['resl_sum'][i]) / count,
+            "eal_total": float(sums['eal_total'][i]),
+            "hazards": {h_name: float(values[i]) for h_name, values in hazards.items()}
         }
         
     print(f"Writing to {OUTPUT_JSON}...")
-    with open(OUTPUT_JSON, 'w') as f:
-        json.dump(final_output, f, indent=2)
+    write_json_dataset(final_output, OUTPUT_JSON)
+
+    if tracts:
+        if 'TRACTFIPS' in columns:
+            write_tracts(columns, valid, TRACTS_DIR, SHP_PATH)
+        else:
+            print(f"WARNING: {DBF_PATH} has no TRACTFIPS field; skipping the tract-level output.")
         
     print("Done!")
 
 if __name__ == "__main__":
-    process_nri()
+    args = parse_args()
+    process_nri(args.workers, tracts=not args.no_tracts)
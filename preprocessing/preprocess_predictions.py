@@ -1,77 +1,122 @@
+import argparse
 import csv
-import json
-from collections import defaultdict
+import os
 
-# Read the CSV file
-input_file = 'US_Disasters_Prediction_2025.csv'
-output_file = 'datasets/predictions_data.json'
+from dataset_io import REPO_DIR, DATASET_DIR, write_json_dataset
+from columnar_dataset import columnar_path, write_columnar_dataset
 
-# Data structure: {"2025": {"State": {"loss": X, "fatalities": Y, "events": [...]}}}
-predictions_data = {}
-predictions_data["2025"] = {}
+INPUT_FILE = os.path.join(REPO_DIR, 'US_Disasters_Prediction_2025.csv')
+OUTPUT_FILE = os.path.join(DATASET_DIR, 'predictions_data.json')
+DEFAULT_YEAR = "2025"
 
-with open(input_file, 'r', encoding='utf-8') as f:
-    reader = csv.DictReader(f)
-    
-    for row in reader:
+def parse_args():
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument("--input", type=str, default=INPUT_FILE,
+                        help="Prediction CSV (STATE, month, most_likely_disaster, predicted_* columns)")
+    parser.add_argument("--output", type=str, default=OUTPUT_FILE)
+    parser.add_argument("--year", type=str, default=DEFAULT_YEAR,
+                        help="Year for rows without a 'year' column value")
+
+    return parser.parse_args()
+
+def aggregate_predictions(rows, default_year=DEFAULT_YEAR):
+    """
+    Folds prediction rows (dicts as read by csv.DictReader) into
+    {"year": {"State": {"loss": X, "fatalities": Y, "events": [...]}}}, with
+    one event per (type, month) of a state, sorted by loss (descending).
+
+    Events are found through a (year, state, type, month) index, so each
+    row costs the same however many events a state already has.
+    """
+    predictions_data = {}
+    events_index = {}
+
+    for row in rows:
+        year = (row.get('year') or default_year).strip()
         state = row['STATE'].title()  # Convert to Title Case
-        
+        year_data = predictions_data.setdefault(year, {})
+
         # Initialize state if not exists
-        if state not in predictions_data["2025"]:
-            predictions_data["2025"][state] = {
+        if state not in year_data:
+            year_data[state] = {
                 "loss": 0,
                 "fatalities": 0,
                 "events": []
             }
-        
+        state_data = year_data[state]
+
         # Parse values
         try:
             loss = float(row['predicted_loss']) if row['predicted_loss'] else 0
             fatalities = int(float(row['predicted_fatalities'])) if row['predicted_fatalities'] else 0
             event_type = row['most_likely_disaster']
             month = int(row['month'])
-            
+
             # Add to state totals
-            predictions_data["2025"][state]["loss"] += loss
-            predictions_data["2025"][state]["fatalities"] += fatalities
-            
+            state_data["loss"] += loss
+            state_data["fatalities"] += fatalities
+
             # Add event (aggregating by event type AND month per state)
-            # Find if this event type+month already exists
-            event_found = False
-            for event in predictions_data["2025"][state]["events"]:
-                if event["type"] == event_type and event.get("month") == month:
-                    event["loss"] += loss
-                    event["fatalities"] += fatalities
-                    event["count"] = event.get("count", 0) + 1
-                    event_found = True
-                    break
-            
-            if not event_found:
-                predictions_data["2025"][state]["events"].append({
+            key = (year, state, event_type, month)
+            event = events_index.get(key)
+            if event is not None:
+                event["loss"] += loss
+                event["fatalities"] += fatalities
+                event["count"] += 1
+            else:
+                event = {
                     "type": event_type,
                     "month": month,
                     "loss": loss,
                     "fatalities": fatalities,
                     "count": 1
-                })
-        
+                }
+                state_data["events"].append(event)
+                events_index[key] = event
+
         except (ValueError, KeyError) as e:
             print(f"Error processing row for {state}: {e}")
             continue
 
-# Sort events by loss (descending) for each state
-for state in predictions_data["2025"]:
-    predictions_data["2025"][state]["events"].sort(key=lambda x: x["loss"], reverse=True)
+    if not predictions_data:
+        predictions_data[default_year] = {}
+    predictions_data = dict(sorted(predictions_data.items()))
+
+    # Sort events by loss (descending) for each state
+    for year_data in predictions_data.values():
+        for state_data in year_data.values():
+            state_data["events"].sort(key=lambda x: x["loss"], reverse=True)
+
+    return predictions_data
+
+def preprocess_predictions(input_file=INPUT_FILE, output_file=OUTPUT_FILE, default_year=DEFAULT_YEAR):
+    """
+    Converts the prediction CSV into the dashboard's predictions_data.json
+    and returns the written data.
+    """
+    with open(input_file, 'r', encoding='utf-8') as f:
+        predictions_data = aggregate_predictions(csv.DictReader(f), default_year)
+
+    # Write to JSON file, plus its columnar twin
+    write_json_dataset(predictions_data, output_file)
+    write_columnar_dataset(predictions_data, columnar_path(output_file))
+
+    print(f"✓ Converted prediction data to {output_file} (and {columnar_path(output_file)})")
+    for year, year_data in predictions_data.items():
+        print(f"✓ Total states for {year}: {len(year_data)}")
+
+        # Calculate total loss and fatalities
+        total_loss = sum(state["loss"] for state in year_data.values())
+        total_fatalities = sum(state["fatalities"] for state in year_data.values())
+        print(f"✓ Total predicted loss for {year}: ${total_loss:,.0f}")
+        print(f"✓ Total predicted fatalities for {year}: {total_fatalities}")
 
-# Write to JSON file
-with open(output_file, 'w', encoding='utf-8') as f:
-    json.dump(predictions_data, f, indent=2)
+    return predictions_data
 
-print(f"✓ Converted prediction data to {output_file}")
-print(f"✓ Total states: {len(predictions_data['2025'])}")
+def main():
+    args = parse_args()
+    preprocess_predictions(args.input, args.output, args.year)
 
-# Calculate total loss and fatalities
-total_loss = sum(state["loss"] for state in predictions_data["2025"].values())
-total_fatalities = sum(state["fatalities"] for state in predictions_data["2025"].values())
-print(f"✓ Total predicted loss for 2025: ${total_loss:,.0f}")
-print(f"✓ Total predicted fatalities for 2025: {total_fatalities}")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+import argparse
+import json
+import os
+
+import numpy as np
+
+from dataset_io import DATASET_DIR, write_text_dataset
+
+INPUT_GEOJSON = os.path.join(DATASET_DIR, "us-states.json")
+TOPO_SUFFIX = ".topo.json"
+
+# Levels of detail as (name, minimum map zoom, Douglas-Peucker tolerance in
+# input units (degrees), quantization steps per axis). The server serves
+# the last level whose minimum zoom the requested zoom reaches.
+LEVELS = (
+    ("low", 0, 0.05, 10000),
+    ("medium", 5, 0.01, 100000),
+    ("high", 8, 0.0, 1000000),
+)
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument("--input", type=str, nargs='+', default=[INPUT_GEOJSON],
+                        help="GeoJSON FeatureCollections to convert (one set of levels each)")
+
+    return parser.parse_args()
+
+def level_path(geojson_path, level):
+    """
+    datasets/us-states.json -> datasets/us-states-low.topo.json
+    """
+    return f"{os.path.splitext(geojson_path)[0]}-{level}{TOPO_SUFFIX}"
+
+def level_for_zoom(zoom):
+    name = LEVELS[0][0]
+    for level, min_zoom, _, _ in LEVELS:
+        if zoom >= min_zoom:
+            name = level
+    return name
+
+def polygons_of(geometry):
+    if not geometry:
+        return []
+    if geometry['type'] == 'Polygon':
+        return [geometry['coordinates']]
+    if geometry['type'] == 'MultiPolygon':
+        return geometry['coordinates']
+    return []
+
+def closed_ring(ring):
+    ring = [tuple(p[:2]) for p in ring]
+    if ring and ring[0] != ring[-1]:
+        ring.append(ring[0])
+    return ring
+
+def find_junctions(rings):
+    """
+    Points where a shared boundary starts or ends: points visited more than
+    once with different neighbours (in either direction).
+    """
+    neighbours = {}
+    junctions = set()
+    for ring in rings:
+        n = len(ring) - 1
+        for i in range(n):
+            point = ring[i]
+            pair = tuple(sorted((ring[i - 1] if i else ring[n - 1], ring[i + 1])))
+            seen = neighbours.setdefault(point, pair)
+            if seen != pair:
+                junctions.add(point)
+    return junctions
+
+def cut_ring(ring, junctions):
+    """
+    Splits a closed ring into arcs that start and end at junctions. Rings
+    without junctions become one closed arc starting at their smallest
+    point, so identical rings (e.g. an enclave and its hole) match.
+    """
+    body = ring[:-1]
+    cuts = [i for i, p in enumerate(body) if p in junctions]
+    if not cuts:
+        start = body.index(min(body))
+        body = body[start:] + body[:start]
+        return [body + [body[0]]]
+
+    body = body[cuts[0]:] + body[:cuts[0]]
+    cuts = [c - cuts[0] for c in cuts] + [len(body)]
+    body = body + [body[0]]
+    return [body[a:b + 1] for a, b in zip(cuts[:-1], cuts[1:])]
+
+def build_topology(features):
+    """
+    Turns GeoJSON features into shared arcs plus, per feature, its polygons
+    as lists of rings of arc references (~i means arc i reversed).
+    """
+    polygons = [[[closed_ring(r) for r in poly] for poly in polygons_of(f.get('geometry'))] for f in features]
+    junctions = find_junctions([r for feature in polygons for poly in feature for r in poly if len(r) > 1])
+
+    arcs = []
+    arc_index = {}
+
+    def reference(points):
+        key = tuple(points)
+        if key in arc_index:
+            return arc_index[key]
+        reverse = key[::-1]
+        if reverse in arc_index:
+            return ~arc_index[reverse]
+        arc_index[key] = len(arcs)
+        arcs.append(np.array(points, dtype=float))
+        return arc_index[key]
+
+    geometries = [
+        [rings for rings in ([[reference(a) for a in cut_ring(r, junctions)] for r in poly if len(r) > 3]
+                             for poly in feature) if rings]
+        for feature in polygons
+    ]
+    return arcs, geometries
+
+def douglas_peucker(points, tolerance):
+    """
+    Boolean mask of the points kept by Douglas-Peucker; both ends are kept.
+    Closed arcs are split at the point farthest from their start first.
+    """
+    keep = np.zeros(len(points), dtype=bool)
+    keep[0] = keep[-1] = True
+    if tolerance <= 0:
+        keep[:] = True
+        return keep
+
+    stack = [(0, len(points) - 1)]
+    if len(points) > 2 and np.array_equal(points[0], points[-1]):
+        far = int(np.argmax(np.hypot(*(points - points[0]).T)))
+        keep[far] = True
+        stack = [(0, far), (far, len(points) - 1)]
+
+    while stack:
+        a, b = stack.pop()
+        if b - a < 2:
+            continue
+        start, end = points[a], points[b]
+        inner = points[a + 1:b]
+        dx, dy = end - start
+        length = np.hypot(dx, dy)
+        if length == 0:
+            dist = np.hypot(*(inner - start).T)
+        else:
+            dist = np.abs(dx * (inner[:, 1] - start[1]) - dy * (inner[:, 0] - start[0])) / length
+        i = int(np.argmax(dist))
+        if dist[i] > tolerance:
+            mid = a + 1 + i
+            keep[mid] = True
+            stack.append((a, mid))
+            stack.append((mid, b))
+    return keep
+
+def simplify(arcs, geometries, tolerance):
+    """
+    Simplifies every arc once, so shared borders stay shared. Arcs of rings
+    that would drop below a triangle are kept at full detail.
+    """
+    simplified = [arc[douglas_peucker(arc, tolerance)] for arc in arcs]
+
+    for feature in geometries:
+        for poly in feature:
+            for ring in poly:
+                points = sum(len(simplified[a if a >= 0 else ~a]) - 1 for a in ring)
+                if points < 3:
+                    for a in ring:
+                        simplified[a if a >= 0 else ~a] = arcs[a if a >= 0 else ~a]
+    return simplified
+
+def quantize(arcs, bbox, steps):
+    """
+    Delta-encodes arcs on a steps x steps integer grid over bbox and
+    returns (transform, encoded arcs). Points that collapse onto the
+    previous one are dropped, keeping at least two per arc.
+    """
+    x0, y0, x1, y1 = bbox
+    kx = (x1 - x0) / (steps - 1) or 1.0
+    ky = (y1 - y0) / (steps - 1) or 1.0
+
+    encoded = []
+    for arc in arcs:
+        q = np.rint((arc - (x0, y0)) / (kx, ky)).astype(np.int64)
+        deltas = np.diff(q, axis=0)
+        moved = deltas.any(axis=1)
+        if not moved.any():
+            moved[-1] = True
+        encoded.append([q[0].tolist()] + deltas[moved].tolist())
+    return {"scale": [kx, ky], "translate": [x0, y0]}, encoded
+
+def to_topology(features, object_name, arcs, geometries, tolerance, steps):
+    """
+    Builds a TopoJSON Topology (quantized, delta-encoded arcs) holding the
+    features as one GeometryCollection named object_name.
+    """
+    simplified = simplify(arcs, geometries, tolerance)
+    points = np.concatenate(arcs) if arcs else np.zeros((0, 2))
+    bbox = [float(v) for v in (*points.min(axis=0), *points.max(axis=0))] if len(points) else [0.0, 0.0, 1.0, 1.0]
+    transform, encoded = quantize(simplified, bbox, steps)
+
+    collection = []
+    for feature, polys in zip(features, geometries):
+        geometry = {"type": "Polygon" if len(polys) == 1 else "MultiPolygon",
+                    "arcs": polys[0] if len(polys) == 1 else polys}
+        if 'id' in feature:
+            geometry["id"] = feature["id"]
+        geometry["properties"] = feature.get("properties", {})
+        collection.append(geometry)
+
+    return {
+        "type": "Topology",
+        "bbox": bbox,
+        "transform": transform,
+        "objects": {object_name: {"type": "GeometryCollection", "geometries": collection}},
+        "arcs": encoded
+    }
+
+def to_geojson(topology):
+    """
+    Decodes a Topology written by to_topology back into a GeoJSON
+    FeatureCollection of its first object (the dashboard does the same in JS).
+    """
+    (kx, ky), (x0, y0) = topology["transform"]["scale"], topology["transform"]["translate"]
+    arcs = [np.cumsum(np.array(arc, dtype=np.int64), axis=0) * (kx, ky) + (x0, y0) for arc in topology["arcs"]]
+
+    def ring(refs):
+        coords = []
+        for a in refs:
+            points = arcs[a] if a >= 0 else arcs[~a][::-1]
+            coords.extend(points[1:].tolist() if coords else points.tolist())
+        return coords
+
+    collection = next(iter(topology["objects"].values()))
+    features = []
+    for geometry in collection["geometries"]:
+        if geometry["type"] == "Polygon":
+            coordinates = [ring(r) for r in geometry["arcs"]]
+        else:
+            coordinates = [[ring(r) for r in poly] for poly in geometry["arcs"]]
+        feature = {"type": "Feature"}
+        if "id" in geometry:
+            feature["id"] = geometry["id"]
+        feature["properties"] = geometry.get("properties", {})
+        feature["geometry"] = {"type": geometry["type"], "coordinates": coordinates}
+        features.append(feature)
+    return {"type": "FeatureCollection", "features": features}
+
+def write_levels(geojson_path):
+    """
+    Writes one TopoJSON file per level of detail next to geojson_path and
+    returns {level: path}.
+    """
+    with open(geojson_path, 'r', encoding='utf-8') as f:
+        features = json.load(f).get('features', [])
+
+    arcs, geometries = build_topology(features)
+    object_name = os.path.splitext(os.path.basename(geojson_path))[0]
+
+    paths = {}
+    for level, _, tolerance, steps in LEVELS:
+        topology = to_topology(features, object_name, arcs, geometries, tolerance, steps)
+        path = level_path(geojson_path, level)
+        write_text_dataset(json.dumps(topology, separators=(',', ':')), path)
+        print(f"✓ {path}: {len(topology['arcs'])} arcs, "
+              f"{sum(len(a) for a in topology['arcs'])} points, {os.path.getsize(path):,} bytes")
+        paths[level] = path
+    return paths
+
+def main():
+    args = parse_args()
+    for path in args.input:
+        write_levels(path)
+
+if __name__ == "__main__":
+    main()
@@ -4,65 +4,602 @@ import os
 import webbrowser
 import json
 import sys
+import argparse
+import select
+import threading
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
 
 # Add preprocessing directory to path to import chatbot_api
 sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "preprocessing"))
 import chatbot_api
+import dataset_io
+from noaa_cube import NoaaCube, CUBE_META
+from columnar_dataset import ColumnarDataset, columnar_path
+from nri_tracts import NriTracts, TRACT_META
+from topology import LEVELS, TOPO_SUFFIX, level_for_zoom
 
 PORT = 8000
 DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+NOAA_JSON = os.path.join(DIRECTORY, "datasets", "noaa_data.json")
+NOAA_CUBE_DIR = os.path.join(DIRECTORY, "datasets", "noaa_cube")
+NOAA_COLUMNAR = columnar_path(NOAA_JSON)
+NRI_TRACTS_DIR = os.path.join(DIRECTORY, "datasets", "nri_tracts")
+# Most tracts one /api/tracts response may carry; larger ?n= are capped
+MAX_TRACTS = 1000
+
+# Defaults for the concurrent server; see parse_args()
+DEFAULT_WORKERS = 32
+DEFAULT_MAX_CHATS = 4
+CHAT_QUEUE_TIMEOUT = 30
+# Socket timeout while a request is being read or answered
+REQUEST_TIMEOUT = 30
+# An idle kept-alive connection still holds a pool worker, so it is closed
+# after KEEPALIVE_TIMEOUT seconds, or after KEEPALIVE_YIELD seconds when
+# other connections are queued for a worker (checked every KEEPALIVE_POLL)
+KEEPALIVE_TIMEOUT = 5
+KEEPALIVE_YIELD = 0.25
+KEEPALIVE_POLL = 0.05
+
+# Precompressed variants written by preprocessing/dataset_io.py, in order of preference
+PRECOMPRESSED = (('br', '.br'), ('gzip', '.gz'))
+# Requests carrying the file's manifest hash (?v=...) can be cached forever
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE = "no-cache"
+
+class ThreadPoolHTTPServer(socketserver.TCPServer):
+    """
+    TCPServer that hands each connection to a bounded thread pool, so a
+    slow request (e.g. /api/chat) only ties up one worker.
+    """
+    allow_reuse_address = True
+    # TCPServer's default listen backlog of 5 resets bursts of new connections
+    request_queue_size = 128
+
+    def __init__(self, server_address, handler_class, workers=DEFAULT_WORKERS, max_chats=DEFAULT_MAX_CHATS,
+                 noaa_cube=None, prediction_service=None, nri_tracts=None):
+        super().__init__(server_address, handler_class)
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="http")
+        # Accepted connections still waiting for a worker
+        self.queued = 0
+        self.queued_lock = threading.Lock()
+        self.chat_slots = threading.BoundedSemaphore(max_chats)
+        self.noaa_cube = noaa_cube
+        self.prediction_service = prediction_service
+        self.nri_tracts = nri_tracts
+
+    def process_request(self, request, client_address):
+        with self.queued_lock:
+            self.queued += 1
+        self.pool.submit(self.process_request_thread, request, client_address)
+
+    def process_request_thread(self, request, client_address):
+        with self.queued_lock:
+            self.queued -= 1
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+def parse_aggregate_filters(query, year_range=None):
+    """
+    Turns ?years=2000-2010&states=Texas,Florida&events=Hail&months=6,7 into
+    NoaaCube filter kwargs. Values may be comma-separated or repeated. Year
+    ranges are clamped to year_range (first, last) before being expanded.
+    """
+    params = urllib.parse.parse_qs(query, keep_blank_values=True)
+
+    def values(name):
+        # Absent -> None (no filter); present but blank -> [] (match nothing)
+        if name not in params:
+            return None
+        return [v.strip() for raw in params[name] for v in raw.split(',') if v.strip()]
+
+    def to_years(items):
+        years = []
+        for item in items:
+            start, _, end = item.partition('-')
+            start, end = int(start), int(end or start)
+            if year_range is not None:
+                start, end = max(start, year_range[0]), min(end, year_range[1])
+            years.extend(range(start, end + 1))
+        return years
+
+    years, months = values('years'), values('months')
+    filters = {
+        "years": None if years is None else to_years(years),
+        "states": values('states'),
+        "event_types": values('events'),
+        "months": None if months is None else [int(m) for m in months]
+    }
+    options = {
+        "metric": (values('metric') or ['loss'])[0],
+        "limit": int(values('limit')[0]) if values('limit') else None
+    }
+    if options["metric"] not in ('loss', 'fatalities'):
+        raise ValueError(f"Unknown metric '{options['metric']}'")
+    if options["limit"] is not None and options["limit"] < 0:
+        raise ValueError("'limit' must not be negative")
+    return filters, options
+
+def parse_tract_query(query):
+    """
+    Reads ?county=48201 / ?state=48, ?bbox=xmin,ymin,xmax,ymax, ?metric=
+    and ?n= (result cap, at most MAX_TRACTS) from a /api/tracts query string.
+    """
+    params = {k: v[-1].strip() for k, v in urllib.parse.parse_qs(query).items()}
+    bbox = None
+    if 'bbox' in params:
+        bbox = [float(v) for v in params['bbox'].split(',')]
+        if len(bbox) != 4:
+            raise ValueError("'bbox' must be xmin,ymin,xmax,ymax")
+    n = int(params.get('n', 10))
+    if n < 0:
+        raise ValueError("'n' must not be negative")
+    return {
+        "county": int(params['county']) if params.get('county') else None,
+        "state": int(params['state']) if params.get('state') else None,
+        "bbox": bbox,
+        "metric": params.get('metric', 'risk'),
+        "n": min(n, MAX_TRACTS)
+    }
 
 class Handler(http.server.SimpleHTTPRequestHandler):
+    # HTTP/1.1 keeps connections alive between requests; see
+    # wait_for_request() for how long an idle one may keep its worker.
+    protocol_version = "HTTP/1.1"
+    timeout = REQUEST_TIMEOUT
+    # Headers and body go out in separate writes; without TCP_NODELAY a
+    # kept-alive connection stalls ~40ms per response on delayed ACKs.
+    disable_nagle_algorithm = True
+
+    # path -> ((mtime_ns, size), content hash), shared by all handler threads
+    etag_cache = {}
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, directory=DIRECTORY, **kwargs)
 
+    def handle(self):
+        self.close_connection = True
+        self.handle_one_request()
+        while not self.close_connection and self.wait_for_request():
+            self.handle_one_request()
+
+    def request_buffered(self):
+        """
+        True if bytes of a next request have arrived, without blocking.
+        """
+        self.connection.settimeout(0)
+        try:
+            return bool(self.rfile.peek(1))
+        finally:
+            self.connection.settimeout(self.timeout)
+
+    def wait_for_request(self):
+        """
+        Waits for the next request on a kept-alive connection. Returns False
+        (close it) when the client hangs up, after KEEPALIVE_TIMEOUT, or
+        after KEEPALIVE_YIELD while other connections are queued for a
+        worker, so idle connections never starve active ones.
+        """
+        start = time.monotonic()
+        try:
+            while not self.request_buffered():
+                idle = time.monotonic() - start
+                if idle >= KEEPALIVE_TIMEOUT or (idle >= KEEPALIVE_YIELD and getattr(self.server, 'queued', 0)):
+                    return False
+                readable, _, _ = select.select([self.connection], [], [], KEEPALIVE_POLL)
+                if readable:
+                    # Readable with nothing to peek means the client closed
+                    return self.request_buffered()
+        except OSError:
+            return False
+        return True
+
+    def file_etag(self, path, stat):
+        key = (stat.st_mtime_ns, stat.st_size)
+        cached = self.etag_cache.get(path)
+        if cached is None or cached[0] != key:
+            with open(path, 'rb') as f:
+                cached = (key, dataset_io.content_hash(f.read()))
+            self.etag_cache[path] = cached
+        return cached[1]
+
+    def accepted_encodings(self):
+        accepted = set()
+        for item in self.headers.get('Accept-Encoding', '').split(','):
+            coding, _, params = item.strip().partition(';')
+            q = params.strip()
+            if q.startswith('q='):
+                try:
+                    if float(q[2:]) == 0:
+                        continue
+                except ValueError:
+                    continue
+            accepted.add(coding.strip().lower())
+        return accepted
+
+    def choose_variant(self, path, stat):
+        accepted = self.accepted_encodings()
+        for encoding, suffix in PRECOMPRESSED:
+            variant = path + suffix
+            if encoding in accepted and os.path.isfile(variant) and os.stat(variant).st_mtime_ns >= stat.st_mtime_ns:
+                return encoding, variant
+        return None, path
+
+    def etag_matches(self, etag):
+        header = self.headers.get('If-None-Match')
+        if not header:
+            return False
+        tags = [t.strip() for t in header.split(',')]
+        return '*' in tags or etag in tags or f"W/{etag}" in tags
+
+    def detail_level_path(self, path, query):
+        """
+        Maps a request for a generic boundary file such as
+        datasets/us-states.topo.json?zoom=6 onto the level-of-detail file
+        preprocessing/topology.py wrote for that zoom. Without a (valid)
+        zoom the most detailed level is served.
+        """
+        params = urllib.parse.parse_qs(query)
+        try:
+            level = level_for_zoom(float(params['zoom'][-1]))
+        except (KeyError, ValueError):
+            level = LEVELS[-1][0]
+        return f"{path[:-len(TOPO_SUFFIX)]}-{level}{TOPO_SUFFIX}", level
+
+    def cache_control(self, query, paths):
+        """
+        Cache-Control for a response built from `paths`. It may be cached
+        forever only when ?v= is the content hash of those files (the hash
+        dataset_io.py records in the manifest), joined by '.' in file name
+        order for level-of-detail requests as app.js builds it. Any other
+        ?v=, such as app.js's timestamp fallback, must revalidate.
+        """
+        versions = urllib.parse.parse_qs(query).get('v')
+        if not versions:
+            return REVALIDATE_CACHE
+        expected = '.'.join(self.file_etag(p, os.stat(p)) for p in sorted(paths))
+        return IMMUTABLE_CACHE if versions[-1] == expected else REVALIDATE_CACHE
+
+    def send_head(self):
+        """
+        Serves regular files with a strong content-hash ETag, answers
+        If-None-Match with 304, and sends a precompressed .br/.gz variant
+        when the client accepts it. Boundary .topo.json requests are served
+        at the level of detail for their ?zoom=.
+        """
+        url_path, _, query = self.path.partition('?')
+        path = self.translate_path(self.path)
+        level = None
+        version_paths = [path]
+        if url_path.endswith(TOPO_SUFFIX) and not os.path.isfile(path):
+            generic = path[:-len(TOPO_SUFFIX)]
+            version_paths = [p for p in (f"{generic}-{name}{TOPO_SUFFIX}" for name, _, _, _ in LEVELS)
+                             if os.path.isfile(p)]
+            path, level = self.detail_level_path(path, query)
+        if url_path.endswith('/') or not os.path.isfile(path):
+            return super().send_head()
+
+        stat = os.stat(path)
+        encoding, send_path = self.choose_variant(path, stat)
+        tag = self.file_etag(path, stat)
+        etag = f'"{tag}-{encoding}"' if encoding else f'"{tag}"'
+        cache_control = self.cache_control(query, version_paths)
+
+        if self.etag_matches(etag):
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            if level:
+                self.send_header("X-Detail-Level", level)
+            self.send_header("Vary", "Accept-Encoding")
+            self.send_header("Cache-Control", cache_control)
+            self.end_headers()
+            return None
+
+        try:
+            f = open(send_path, 'rb')
+        except OSError:
+            self.send_error(404, "File not found")
+            return None
+
+        self.send_response(200)
+        self.send_header("Content-type", self.guess_type(path))
+        if encoding:
+            self.send_header("Content-Encoding", encoding)
+        self.send_header("Content-Length", str(os.fstat(f.fileno()).st_size))
+        self.send_header("Last-Modified", self.date_time_string(stat.st_mtime))
+        self.send_header("ETag", etag)
+        if level:
+            self.send_header("X-Detail-Level", level)
+        self.send_header("Vary", "Accept-Encoding")
+        self.send_header("Cache-Control", cache_control)
+        self.end_headers()
+        return f
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_event_stream(self, events):
+        """
+        Relays chat_stream() events to the browser as Server-Sent Events over
+        a chunked response, flushing each one as soon as it arrives.
+        """
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream; charset=utf-8')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+
+        def send_event(name, event):
+            data = f"event: {name}\ndata: {json.dumps(event)}\n\n".encode('utf-8')
+            self.wfile.write(f"{len(data):X}\r\n".encode('ascii') + data + b"\r\n")
+
+        try:
+            try:
+                for event in events:
+                    send_event('error' if 'error' in event else 'done' if event.get('done') else 'token', event)
+            except (BrokenPipeError, ConnectionResetError):
+                raise
+            except Exception as e:
+                # The 200 headers are out, so a failure can only be reported
+                # in-band: send an error event and end the stream
+                print(f"Chat stream error: {e}")
+                self.close_connection = True
+                send_event('error', {"error": str(e)})
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            # Browser went away mid-answer; stop pulling from the upstream
+            self.close_connection = True
+        finally:
+            events.close()
+
+    def do_GET(self):
+        if self.path.startswith('/api/aggregate'):
+            self.handle_aggregate()
+        elif self.path.startswith('/api/tracts'):
+            self.handle_tracts()
+        elif self.path == '/api/chat/stats':
+            cache = chatbot_api.get_default_client().cache
+            self.send_json(200, cache.stats() if cache is not None else {"enabled": False})
+        else:
+            super().do_GET()
+
+    def handle_aggregate(self):
+        url_path, _, query = self.path.partition('?')
+        cube = getattr(self.server, 'noaa_cube', None)
+        if cube is None:
+            self.send_json(503, {"error": "NOAA data is not loaded on this server."})
+            return
+
+        try:
+            filters, options = parse_aggregate_filters(query, (min(cube.years), max(cube.years)))
+        except ValueError as e:
+            self.send_json(400, {"error": str(e)})
+            return
+
+        route = url_path[len('/api/aggregate'):].strip('/')
+        if route == 'totals':
+            self.send_json(200, cube.totals(**filters))
+        elif route == 'states':
+            self.send_json(200, cube.state_ranking(options['metric'], options['limit'], **filters))
+        elif route == 'yearly':
+            self.send_json(200, cube.yearly_series(**filters))
+        elif route == 'monthly':
+            self.send_json(200, cube.monthly_series(**filters))
+        elif route == 'meta':
+            self.send_json(200, cube.meta())
+        else:
+            self.send_json(404, {"error": f"Unknown aggregate '{route}'"})
+
+    def handle_tracts(self):
+        url_path, _, query = self.path.partition('?')
+        tracts = getattr(self.server, 'nri_tracts', None)
+        if tracts is None:
+            self.send_json(503, {"error": "Tract-level NRI data is not loaded on this server."})
+            return
+
+        route = url_path[len('/api/tracts'):].strip('/')
+        try:
+            q = parse_tract_query(query)
+            if route == 'top':
+                ids = tracts.top(q['n'], q['metric'], county=q['county'], state=q['state'])
+            elif route == 'bbox':
+                if q['bbox'] is None:
+                    raise ValueError("Missing 'bbox'")
+                ids = tracts.in_bbox(*q['bbox'])
+                total = len(ids)
+                ids = ids[:q['n']]
+            else:
+                self.send_json(404, {"error": f"Unknown tract query '{route}'"})
+                return
+        except ValueError as e:
+            self.send_json(400, {"error": str(e)})
+            return
+
+        payload = {"tracts": tracts.records(ids)}
+        if route == 'bbox':
+            payload["total"] = total
+        self.send_json(200, payload)
+
+    def handle_predict(self):
+        content_length = int(self.headers['Content-Length'])
+        post_data = self.rfile.read(content_length)
+
+        service = getattr(self.server, 'prediction_service', None)
+        if service is None:
+            self.send_json(503, {"error": "Prediction models are not loaded (start the server with --predict)."})
+            return
+
+        try:
+            data = json.loads(post_data)
+            if not isinstance(data, dict):
+                raise ValueError("The request body must be a JSON object")
+            predictions = service.predict(
+                data.get('instances'),
+                explain=data.get('explain', 'none'),
+                explain_sample_rate=data.get('explain_sample_rate', 1.0)
+            )
+        except ValueError as e:
+            self.send_json(400, {"error": str(e)})
+            return
+        except Exception as e:
+            self.send_json(500, {"error": str(e)})
+            return
+
+        self.send_json(200, {"predictions": predictions})
+
     def do_POST(self):
-        if self.path == '/api/chat':
+        if self.path == '/api/predict':
+            self.handle_predict()
+        elif self.path == '/api/chat':
             content_length = int(self.headers['Content-Length'])
             post_data = self.rfile.read(content_length)
-            
+
+            chat_slots = getattr(self.server, 'chat_slots', None)
+            if chat_slots is not None and not chat_slots.acquire(timeout=CHAT_QUEUE_TIMEOUT):
+                self.send_json(503, {"error": "The chatbot is busy, please try again shortly."})
+                return
+
             try:
                 data = json.loads(post_data)
                 message = data.get('message')
                 context = data.get('context')
-                
-                response_data = chatbot_api.get_openai_response(message, context)
-                
-                self.send_response(200)
-                self.send_header('Content-type', 'application/json')
-                self.end_headers()
-                self.wfile.write(json.dumps(response_data).encode('utf-8'))
+
+                if data.get('stream'):
+                    # Reports its own errors: once the stream has started, a
+                    # JSON error response can no longer be sent
+                    events = chatbot_api.get_default_client().chat_stream(message, context)
+                else:
+                    response_data = chatbot_api.get_openai_response(message, context)
                 
             except Exception as e:
-                self.send_response(500)
-                self.send_header('Content-type', 'application/json')
-                self.end_headers()
-                self.wfile.write(json.dumps({"error": str(e)}).encode('utf-8'))
+                self.send_json(500, {"error": str(e)})
+            else:
+                if data.get('stream'):
+                    self.send_event_stream(events)
+                else:
+                    self.send_json(200, response_data)
+            finally:
+                if chat_slots is not None:
+                    chat_slots.release()
         else:
             self.send_error(404, "File not found")
 
-# Check for API Key
-api_key = os.environ.get("GROQ_API_KEY")
-if not api_key:
-    print("\n" + "="*60)
-    print("WARNING: GROQ_API_KEY environment variable not found!")
-    print("The chatbot feature will not work without it.")
-    print("Please set it using:")
-    print("  PowerShell: $env:GROQ_API_KEY = 'your-key'")
-    print("  CMD: set GROQ_API_KEY=your-key")
-    print("Then RESTART this server.")
-    print("="*60 + "\n")
-else:
-    print(f"\nSUCCESS: GROQ_API_KEY found (starts with {api_key[:5]}...)\n")
-
-print(f"Serving dashboard at http://localhost:{PORT}")
-print("Press Ctrl+C to stop.")
-
-# Open browser automatically
-webbrowser.open(f"http://localhost:{PORT}")
-
-with socketserver.TCPServer(("", PORT), Handler) as httpd:
-    try:
-        httpd.serve_forever()
-    except KeyboardInterrupt:
-        print("\nStopping server.")
+def load_noaa_cube():
+    """
+    Memory-maps the .npy cube written by preprocess_noaa_data when it is at
+    least as new as noaa_data.json. Otherwise builds the cube from the
+    memory-mapped columnar noaa_data.bin if it is current, and from the
+    JSON as a last resort.
+    """
+    def is_current(path):
+        return os.path.exists(path) and (
+            not os.path.exists(NOAA_JSON) or os.path.getmtime(path) >= os.path.getmtime(NOAA_JSON)
+        )
+
+    meta_path = os.path.join(NOAA_CUBE_DIR, CUBE_META)
+    if is_current(meta_path):
+        return NoaaCube.load(NOAA_CUBE_DIR)
+    if os.path.exists(meta_path):
+        print(f"WARNING: {NOAA_CUBE_DIR} is older than {NOAA_JSON}; rebuilding the cube in memory.")
+
+    if is_current(NOAA_COLUMNAR):
+        return NoaaCube.from_columnar(ColumnarDataset.open(NOAA_COLUMNAR))
+    if os.path.exists(NOAA_JSON):
+        return NoaaCube.from_json(NOAA_JSON)
+    return None
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help="Maximum number of connections served concurrently")
+    parser.add_argument("--max-chats", type=int, default=DEFAULT_MAX_CHATS,
+                        help="Maximum number of /api/chat calls in flight at once")
+    parser.add_argument("--chat-cache-size", type=int, default=1024,
+                        help="Number of chat answers kept in the response cache (0 disables it)")
+    parser.add_argument("--chat-cache-ttl", type=float, default=3600,
+                        help="Seconds a cached chat answer stays valid")
+    parser.add_argument("--chat-cache-file", type=str, default=None,
+                        help="Optional JSON-lines file that persists the chat cache across restarts")
+    parser.add_argument("--predict", action="store_true",
+                        help="Load the trained models once and serve POST /api/predict")
+    parser.add_argument("--model-dir", type=str, default=None,
+                        help="Directory with the trained .joblib models (default: models/)")
+    parser.add_argument("--batch-wait-ms", type=float, default=5,
+                        help="How long /api/predict waits to group concurrent requests into one batch")
+    parser.add_argument("--no-browser", action="store_true")
+
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+
+    # Check for API Key
+    api_key = os.environ.get("GROQ_API_KEY")
+    if not api_key:
+        print("\n" + "="*60)
+        print("WARNING: GROQ_API_KEY environment variable not found!")
+        print("The chatbot feature will not work without it.")
+        print("Please set it using:")
+        print("  PowerShell: $env:GROQ_API_KEY = 'your-key'")
+        print("  CMD: set GROQ_API_KEY=your-key")
+        print("Then RESTART this server.")
+        print("="*60 + "\n")
+    else:
+        print(f"\nSUCCESS: GROQ_API_KEY found (starts with {api_key[:5]}...)\n")
+
+    print(f"Serving dashboard at http://localhost:{args.port} ({args.workers} workers, {args.max_chats} concurrent chats)")
+    print("Press Ctrl+C to stop.")
+
+    # Open browser automatically
+    if not args.no_browser:
+        webbrowser.open(f"http://localhost:{args.port}")
+
+    cache = None
+    if args.chat_cache_size > 0:
+        cache = chatbot_api.ResponseCache(args.chat_cache_size, args.chat_cache_ttl, args.chat_cache_file)
+    chatbot_api.configure_default_client(cache=cache)
+
+    noaa_cube = load_noaa_cube()
+    if noaa_cube is not None:
+        print(f"Loaded NOAA cube: {len(noaa_cube.years)} years, {len(noaa_cube.states)} states, "
+              f"{len(noaa_cube.event_types)} event types")
+    else:
+        print(f"WARNING: {NOAA_JSON} not found; /api/aggregate is disabled.")
+
+    nri_tracts = None
+    if os.path.exists(os.path.join(NRI_TRACTS_DIR, TRACT_META)):
+        nri_tracts = NriTracts.load(NRI_TRACTS_DIR)
+        print(f"Loaded NRI tracts: {len(nri_tracts.tract_fips)} tracts in {len(nri_tracts.county_keys)} counties")
+
+    prediction_service = None
+    if args.predict:
+        sys.path.append(os.path.join(DIRECTORY, "src"))
+        from model_server import PredictionService
+        prediction_service = PredictionService(args.model_dir, max_wait=args.batch_wait_ms / 1000)
+
+    with ThreadPoolHTTPServer(("", args.port), Handler, workers=args.workers, max_chats=args.max_chats,
+                              noaa_cube=noaa_cube, prediction_service=prediction_service,
+                              nri_tracts=nri_tracts) as httpd:
+        try:
+            httpd.serve_forever()
+        except KeyboardInterrupt:
+            print("\nStopping server.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+import pandas as pd
+import utils
+from predict import EXPLAIN_MODES, explain_rows, load_models, predict_full_package
+
+
+class MicroBatcher:
+    """
+    Collects prediction requests arriving within `max_wait` seconds of each
+    other (up to `max_batch_rows` rows) and scores them with a single
+    predict_fn(features_df, sizes, *options) call, so concurrent callers
+    share one model pass. sizes holds each request's row count, in the
+    order the frames were concatenated.
+    """
+
+    def __init__(self, predict_fn, max_wait=0.005, max_batch_rows=1024):
+        self.predict_fn = predict_fn
+        self.max_wait = max_wait
+        self.max_batch_rows = max_batch_rows
+        self.queue = queue.Queue()
+        self.batches = 0
+        self.requests = 0
+
+        self.thread = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self.thread.start()
+
+    def submit(self, features_df, options=()):
+        """
+        Queues a frame for scoring and returns a Future for its result list.
+        Requests are only batched with others that use the same options.
+        """
+        future = Future()
+        self.queue.put((features_df, tuple(options), future))
+        return future
+
+    def close(self):
+        self.queue.put(None)
+        self.thread.join()
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+
+            batch = [item]
+            rows = len(item[0])
+            deadline = time.monotonic() + self.max_wait
+            closing = False
+            while rows < self.max_batch_rows:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self.queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if item is None:
+                    closing = True
+                    break
+                batch.append(item)
+                rows += len(item[0])
+
+            groups = {}
+            for features_df, options, future in batch:
+                groups.setdefault(options, []).append((features_df, future))
+            for options, items in groups.items():
+                self._score(items, options)
+
+            if closing:
+                return
+
+    def _score(self, items, options):
+        self.batches += 1
+        self.requests += len(items)
+
+        frames = [features_df for features_df, _ in items]
+        try:
+            results = self.predict_fn(pd.concat(frames, ignore_index=True), [len(f) for f in frames], *options)
+            # predict_full_package reports failures as a single {"error": ...}
+            if len(results) == 1 and "error" in results[0]:
+                raise RuntimeError(results[0]["error"])
+        except Exception as e:
+            for _, future in items:
+                future.set_exception(e)
+            return
+
+        offset = 0
+        for features_df, future in items:
+            part = results[offset:offset + len(features_df)]
+            for i, package in enumerate(part):
+                package["input_index"] = i
+            future.set_result(part)
+            offset += len(features_df)
+
+
+class PredictionService:
+    """
+    Loads the trained models once and serves batched predictions from them
+    for the lifetime of the process.
+    """
+
+    def __init__(self, model_dir=None, max_wait=0.005, max_batch_rows=1024):
+        utils.init_paths(model_dir=model_dir)
+        self.models = load_models()
+        if self.models is None:
+            raise RuntimeError("Models could not be loaded. Please run train.py first.")
+
+        clf = self.models['classification']
+        self.feature_names = list(getattr(clf, 'feature_names_in_', [])) or None
+        self.batcher = MicroBatcher(self._predict, max_wait=max_wait, max_batch_rows=max_batch_rows)
+
+    def _predict(self, features_df, sizes, explain, explain_sample_rate):
+        # Sample the explained rows per request, so a request gets the same
+        # explanations however it was batched
+        offsets = np.cumsum([0] + sizes[:-1])
+        positions = np.concatenate([explain_rows(n, explain_sample_rate) + offset
+                                    for n, offset in zip(sizes, offsets)])
+        return predict_full_package(self.models, features_df, explain=explain,
+                                    explain_sample_rate=explain_sample_rate, explain_positions=positions)
+
+    def to_frame(self, instances):
+        """
+        Builds a feature frame from a list of {feature: value} records in
+        the column order the models were trained on.
+        """
+        if not isinstance(instances, list) or not instances:
+            raise ValueError("'instances' must be a non-empty list of feature records")
+        if not all(isinstance(record, dict) for record in instances):
+            raise ValueError("Each of 'instances' must be a {feature: value} object")
+
+        features_df = pd.DataFrame.from_records(instances)
+        if self.feature_names is not None:
+            missing = [c for c in self.feature_names if c not in features_df.columns]
+            if missing:
+                raise ValueError(f"Missing features: {missing}")
+            features_df = features_df[self.feature_names]
+        return features_df
+
+    def predict(self, instances, explain='none', explain_sample_rate=1.0, timeout=30):
+        """
+        Scores a list of feature records. Raises ValueError for a bad request
+        and RuntimeError if the models fail on it.
+        """
+        if explain not in EXPLAIN_MODES:
+            raise ValueError(f"Unknown explain mode '{explain}', expected one of {EXPLAIN_MODES}")
+        try:
+            explain_sample_rate = float(explain_sample_rate)
+        except (TypeError, ValueError):
+            raise ValueError("'explain_sample_rate' must be a number")
+        if not 0 <= explain_sample_rate <= 1:
+            raise ValueError("'explain_sample_rate' must be between 0 and 1")
+
+        features_df = self.to_frame(instances)
+        future = self.batcher.submit(features_df, (explain, explain_sample_rate))
+        return future.result(timeout=timeout)
+
+    def close(self):
+        self.batcher.close()
@@ -1,4 +1,3 @@
-import pandas as pd
 import shap
 import warnings
 import os
@@ -19,16 +18,18 @@ def load_models():
         'total_population_affected', 'total_fatalities', 
         'total_injuries', 'total_socio_economic_loss'
     ]
-    for target in reg_targets:
-        model_file = f"best_regression_model_{target}.joblib"
-        models[target] = utils.load_object(model_file)
-        
-    try:
+    # Either one model per target, or a single multi-output model trained
+    # with train.py --multi_output ({"targets": [...], "model": estimator})
+    multi_output_file = "best_regression_model_multi_output.joblib"
+    if os.path.exists(os.path.join(utils.MODEL_DIR, multi_output_file)):
+        models['multi_output'] = utils.load_object(multi_output_file)
+    else:
+        for target in reg_targets:
+            model_file = f"best_regression_model_{target}.joblib"
+            models[target] = utils.load_object(model_file)
 
-        models['shap_explainer'] = shap.TreeExplainer(models['classification'])
-    except Exception as e:
-        print(f"Warning: Could not create SHAP explainer. Is the model tree-based? Error: {e}")
-        models['shap_explainer'] = None
+    # The SHAP explainer is built on first use by get_shap_explainer(), so
+    # scoring-only callers never pay for it.
 
     if any(v is None for v in models.values()):
         print("Error: One or more model files are missing. Please run train.py first.")
@@ -37,53 +38,140 @@ def load_models():
     print("All models loaded successfully.")
     return models
 
-def predict_full_package(models, features_df):
+EXPLAIN_MODES = ('none', 'top_k', 'full')
+
+def get_shap_explainer(models):
+    """
+    Returns the TreeExplainer for the classifier, creating it on first use
+    and caching it in `models`. None if the model is not tree-based.
+    """
+    if 'shap_explainer' not in models:
+        try:
+            models['shap_explainer'] = shap.TreeExplainer(models['classification'])
+        except Exception as e:
+            print(f"Warning: Could not create SHAP explainer. Is the model tree-based? Error: {e}")
+            models['shap_explainer'] = None
+    return models['shap_explainer']
+
+def explain_rows(n_rows, sample_rate, seed=0):
+    """
+    Positions of the rows that get an explanation: all of them at rate 1,
+    otherwise a reproducible random subset of about n_rows * sample_rate.
+    """
+    if sample_rate >= 1:
+        return np.arange(n_rows)
+    rng = np.random.default_rng(seed)
+    return np.flatnonzero(rng.random(n_rows) < sample_rate)
+
+def shap_importances(shap_values):
+    """
+    Per-row feature importance as the mean |SHAP| across classes, for the
+    whole batch at once. Returns an (n_rows, n_features) array.
+    """
+    values = np.abs(shap_values.values)
+    if values.ndim == 3:
+        values = values.mean(axis=2)
+    return values
+
+def top_k_indices(importances, k=3):
+    """
+    Column indices of the k largest importances per row, largest first.
+    Ties are broken by column order, the same as Series.nlargest(keep='first').
+    """
+    n_rows, n_features = importances.shape
+    k = min(k, n_features)
+    if k == 0:
+        return np.empty((n_rows, 0), dtype=int)
+
+    # k-th largest value per row, then everything above it plus the first
+    # few columns equal to it
+    kth = -np.partition(-importances, k - 1, axis=1)[:, k - 1:k]
+    above = importances > kth
+    at = importances == kth
+    needed = k - above.sum(axis=1, keepdims=True)
+    selected = above | (at & (np.cumsum(at, axis=1) <= needed))
+
+    cols = np.nonzero(selected)[1].reshape(n_rows, k)
+    vals = np.take_along_axis(importances, cols, axis=1)
+    order = np.argsort(-vals, axis=1, kind='stable')
+    return np.take_along_axis(cols, order, axis=1)
+
+def predict_full_package(models, features_df, explain='full', explain_sample_rate=1.0, explain_positions=None):
+    """
+    Scores a batch and returns one result package per row.
+
+    explain controls the SHAP output: 'none' skips the explainer entirely,
+    'top_k' fills only top_3_factors and 'full' also fills full_details.
+    With explain_sample_rate < 1 only that fraction of rows is explained;
+    the rest get an empty explainability block. explain_positions, if given,
+    lists the row positions to explain instead of sampling them.
+    """
+    if explain not in EXPLAIN_MODES:
+        return [{"error": f"Unknown explain mode '{explain}', expected one of {EXPLAIN_MODES}"}]
+
     if not models:
         return [{"error": "Models are not loaded."}]
 
     try:
         clf_model = models['classification']
         le = models['label_encoder']
+        n_rows = len(features_df)
         
         class_pred_numeric = clf_model.predict(features_df)
         
-        class_pred_string = le.inverse_transform(class_pred_numeric)
+        class_pred_string = le.inverse_transform(class_pred_numeric).tolist()
         
         class_pred_proba = clf_model.predict_proba(features_df)
+        confidences = class_pred_proba[np.arange(n_rows), class_pred_numeric]
         
         reg_predictions = {}
+        if 'multi_output' in models:
+            # One pass for all targets
+            multi_output = models['multi_output']
+            preds = np.asarray(multi_output['model'].predict(features_df)).reshape(n_rows, -1)
+            for i, target in enumerate(multi_output['targets']):
+                reg_predictions[target] = preds[:, i].tolist()
         for target, model in models.items():
             if target.startswith('total_'):
-                reg_predictions[target] = model.predict(features_df)
-        shap_values = None
-        if models['shap_explainer']:
-            shap_values = models['shap_explainer'](features_df)
+                reg_predictions[target] = np.asarray(model.predict(features_df)).tolist()
+
+        # Explanations, keyed by row position, for the sampled rows only
+        explained = {}
+        explainer = get_shap_explainer(models) if explain != 'none' else None
+        if explainer:
+            if explain_positions is None:
+                rows = explain_rows(n_rows, explain_sample_rate)
+            else:
+                rows = np.asarray(explain_positions, dtype=int)
+            if len(rows):
+                subset = features_df if len(rows) == n_rows else features_df.iloc[rows]
+                importances = shap_importances(explainer(subset))
+                top_factors = top_k_indices(importances, 3).tolist()
+                importances = importances.tolist() if explain == 'full' else None
+                for pos, row in enumerate(rows.tolist()):
+                    explained[row] = (top_factors[pos], importances[pos] if importances else None)
+        feature_names = list(features_df.columns)
+
+        # Everything is computed column-wise above; this loop only builds
+        # the per-row dicts for serialization
         results = []
-        for i in range(len(features_df)):
-            pred_index_numeric = class_pred_numeric[i]
-            
-            confidence = class_pred_proba[i][pred_index_numeric]
-            
-            regression_output = {
-                target: reg_predictions[target][i] for target in reg_predictions
-            }
+        for i in range(n_rows):
             explain_output = {"top_3_factors": [], "full_details": {}}
-            if shap_values is not None:
-                shap_row = shap_values[i]
-                mean_abs_shap_values = np.abs(shap_row.values).mean(axis=1)
-                shap_importances = pd.Series(mean_abs_shap_values, index=features_df.columns)
-                top_3_factors = shap_importances.abs().nlargest(3).index.tolist()
-                explain_output["top_3_factors"] = top_3_factors
-                explain_output["full_details"] = shap_importances.to_dict()
+            if i in explained:
+                top, details = explained[i]
+                explain_output["top_3_factors"] = [feature_names[j] for j in top]
+                if details is not None:
+                    explain_output["full_details"] = dict(zip(feature_names, details))
 
-            
             result_package = {
                 "input_index": i,
                 "classification": {
                     "rank": class_pred_string[i],
-                    "confidence": f"{confidence:.2%}"
+                    "confidence": f"{confidences[i]:.2%}"
+                },
+                "regression_predictions": {
+                    target: preds[i] for target, preds in reg_predictions.items()
                 },
-                "regression_predictions": regression_output,
                 "explainability": explain_output
             }
             results.append(result_package)
@@ -92,4 +180,4 @@ def predict_full_package(models, features_df):
 
     except Exception as e:
         print(f"An error occurred during prediction: {e}")
-        return [{"error": str(e)}]
\ No newline at end of file
+        return [{"error": str(e)}]
@@ -11,6 +11,8 @@ def parse_args():
     parser.add_argument("--data_dir", type=str, default=None)
     parser.add_argument("--model_dir", type=str, default=None)
     parser.add_argument("--reports_dir", type=str, default=None)
+    parser.add_argument("--explain", type=str, default="full", choices=["none", "top_k", "full"])
+    parser.add_argument("--explain_sample_rate", type=float, default=1.0)
 
     return parser.parse_args()
 def run_example():
@@ -49,7 +51,9 @@ def run_example():
     print("\nSample Input Features:")
     print(sample_df)
     
-    prediction_results = predict_full_package(models, sample_df)
+    prediction_results = predict_full_package(
+        models, sample_df, explain=args.explain, explain_sample_rate=args.explain_sample_rate
+    )
     
     print("\n--- Full Prediction Package (Output) ---")
     print(json.dumps(prediction_results, indent=4))
@@ -2,8 +2,13 @@
 import pandas as pd
 import warnings
 import argparse
+import os
+import math
+import time
 import utils 
-from sklearn.model_selection import train_test_split, GridSearchCV
+from concurrent.futures import ProcessPoolExecutor, wait
+from scipy.stats import loguniform, uniform
+from sklearn.model_selection import train_test_split, ParameterSampler
 from sklearn.preprocessing import LabelEncoder
 from sklearn.metrics import (
     accuracy_score, precision_score, recall_score, f1_score,
@@ -18,40 +23,351 @@ from xgboost import XGBClassifier, XGBRegressor
 
 warnings.filterwarnings('ignore')
 
+# --- 0. candidate grid ---
+CLASSIFICATION_MODELS = ("LogisticRegression", "DecisionTree", "RandomForest", "XGBoost")
+REGRESSION_MODELS = ("DecisionTree", "RandomForest", "XGBoost")
+MULTI_OUTPUT_MODEL_FILE = "best_regression_model_multi_output.joblib"
+
+def make_classifier(name, n_jobs=1, params=None):
+    if name == "LogisticRegression":
+        model = LogisticRegression(max_iter=1000)
+    elif name == "DecisionTree":
+        model = DecisionTreeClassifier(random_state=42)
+    elif name == "RandomForest":
+        model = RandomForestClassifier(random_state=42, n_jobs=n_jobs)
+    elif name == "XGBoost":
+        model = XGBClassifier(random_state=42, use_label_encoder=False, eval_metric='mlogloss', n_jobs=n_jobs)
+    else:
+        raise ValueError(f"Unknown classifier '{name}'")
+    return model.set_params(**params) if params else model
+
+def make_regressor(name, n_jobs=1, multi_output=False, params=None):
+    # The sklearn trees handle a 2-D target natively; XGBoost needs to be
+    # told to grow one tree per round with a leaf vector over all targets
+    if name == "DecisionTree":
+        model = DecisionTreeRegressor(random_state=42)
+    elif name == "RandomForest":
+        model = RandomForestRegressor(random_state=42, n_jobs=n_jobs)
+    elif name == "XGBoost" and multi_output:
+        model = XGBRegressor(random_state=42, n_jobs=n_jobs, tree_method='hist',
+                             multi_strategy='multi_output_tree')
+    elif name == "XGBoost":
+        model = XGBRegressor(random_state=42, n_jobs=n_jobs)
+    else:
+        raise ValueError(f"Unknown regressor '{name}'")
+    return model.set_params(**params) if params else model
+
+def make_model(task, name, n_jobs=1, params=None):
+    if task == "classification":
+        return make_classifier(name, n_jobs, params)
+    return make_regressor(name, n_jobs, multi_output=task == "multi_output", params=params)
+
+def classification_metrics(y_test, y_pred):
+    return {
+        "accuracy": accuracy_score(y_test, y_pred),
+        "precision_macro": precision_score(y_test, y_pred, average='macro'),
+        "recall_macro": recall_score(y_test, y_pred, average='macro'),
+        "f1_macro": f1_score(y_test, y_pred, average='macro')
+    }
+
+def regression_metrics(y_test, y_pred):
+    return {
+        "mae": mean_absolute_error(y_test, y_pred),
+        "rmse": np.sqrt(mean_squared_error(y_test, y_pred))
+    }
+
+def split_jobs(n_candidates, n_jobs=None):
+    """
+    Splits n_jobs cores between candidates trained side by side (outer
+    processes) and the n_jobs each model gets for itself (inner threads).
+    """
+    n_jobs = n_jobs or os.cpu_count() or 1
+    outer = max(1, min(n_candidates, n_jobs))
+    inner = max(1, n_jobs // outer)
+    return outer, inner
+
+# Training data for the current grid; set once per worker process by
+# init_grid_worker so it isn't pickled with every candidate
+_GRID_DATA = {}
+
+def init_grid_worker(data):
+    warnings.filterwarnings('ignore')
+    _GRID_DATA.clear()
+    _GRID_DATA.update(data)
+
+def run_in_pool(fn, calls, data, outer, deadline=None):
+    """
+    Runs fn(*args) for every args tuple in calls, in `outer` worker processes
+    (or in-process when outer is 1) that see `data` through _GRID_DATA.
+    Returns the results in call order. Calls not started before `deadline`
+    (a time.monotonic() value) are skipped and give None; calls already
+    running are allowed to finish.
+    """
+    if outer == 1:
+        init_grid_worker(data)
+        try:
+            results = []
+            for args in calls:
+                if deadline is not None and time.monotonic() >= deadline:
+                    results.append(None)
+                else:
+                    results.append(fn(*args))
+            return results
+        finally:
+            _GRID_DATA.clear()
+
+    with ProcessPoolExecutor(max_workers=outer, initializer=init_grid_worker, initargs=(data,)) as pool:
+        futures = [pool.submit(fn, *args) for args in calls]
+        if deadline is not None:
+            wait(futures, timeout=max(0.0, deadline - time.monotonic()))
+            for future in futures:
+                future.cancel()
+        return [None if future.cancelled() else future.result() for future in futures]
+
+def fit_candidate(task, name, target, inner_jobs, params=None):
+    """
+    Trains and evaluates one (model, target) candidate. target is None for
+    classification and multi-output regression. Returns the fitted model and
+    its metrics ({target: metrics} for multi-output).
+    """
+    X_train, X_test = _GRID_DATA['X_train'], _GRID_DATA['X_test']
+    y_train, y_test = _GRID_DATA['y_train'], _GRID_DATA['y_test']
+    model = make_model(task, name, inner_jobs, params)
+
+    if task == "classification":
+        print(f"\nTraining {name}...")
+        model.fit(X_train, y_train)
+        metrics = classification_metrics(y_test, model.predict(X_test))
+        print(f"Metrics for {name}: {metrics}")
+    elif task == "multi_output":
+        print(f"Training multi-output {name}...")
+        model.fit(X_train, y_train)
+        y_pred = np.asarray(model.predict(X_test)).reshape(len(X_test), -1)
+        metrics = {
+            target: regression_metrics(y_test[target], y_pred[:, i])
+            for i, target in enumerate(y_test.columns)
+        }
+        print(f"Metrics for multi-output {name}: {metrics}")
+    else:
+        print(f"Training {name} for {target}...")
+        model.fit(X_train, y_train[target])
+        metrics = regression_metrics(y_test[target], model.predict(X_test))
+        print(f"Metrics for {name} ({target}): {metrics}")
+
+    return model, metrics
+
+def run_candidate_grid(task, candidates, data, n_jobs=None, params=None):
+    """
+    Trains every (name, target) candidate, in a process pool when more than
+    one core is available. params optionally maps (task, name, target) to
+    tuned hyperparameters. Returns {(name, target): (model, metrics)} in
+    candidate order, so winner selection doesn't depend on finish order.
+    """
+    params = params or {}
+    outer, inner = split_jobs(len(candidates), n_jobs)
+    print(f"Training {len(candidates)} candidates: {outer} in parallel, n_jobs={inner} each")
+
+    calls = [(task, name, target, inner, params.get((task, name, target))) for name, target in candidates]
+    results = run_in_pool(fit_candidate, calls, data, outer)
+    return dict(zip(candidates, results))
+
+# --- 0b. hyperparameter search ---
+# Search spaces sampled by tune_hyperparameters. XGBoost's n_estimators is
+# not searched: it is found by early stopping on the validation split.
+PARAM_SPACES = {
+    "LogisticRegression": {
+        "C": loguniform(1e-3, 1e2)
+    },
+    "DecisionTree": {
+        "max_depth": [None, 4, 6, 8, 12, 16],
+        "min_samples_leaf": [1, 2, 5, 10, 20, 50]
+    },
+    "RandomForest": {
+        "n_estimators": [100, 200, 400],
+        "max_depth": [None, 8, 12, 16],
+        "min_samples_leaf": [1, 2, 5, 10],
+        "max_features": ["sqrt", 0.5, 1.0]
+    },
+    "XGBoost": {
+        "learning_rate": loguniform(0.01, 0.3),
+        "max_depth": [3, 4, 5, 6, 8, 10],
+        "min_child_weight": [1, 3, 5, 10],
+        "subsample": uniform(0.6, 0.4),
+        "colsample_bytree": uniform(0.6, 0.4),
+        "reg_lambda": loguniform(0.1, 10.0)
+    }
+}
+XGB_MAX_ROUNDS = 2000
+XGB_EARLY_STOPPING_ROUNDS = 30
+
+def sample_configs(name, n_candidates, seed=42):
+    """
+    The default hyperparameters plus n_candidates - 1 random draws from
+    PARAM_SPACES, so tuning can never pick something worse than the
+    defaults on the validation split.
+    """
+    sampled = ParameterSampler(PARAM_SPACES[name], n_iter=max(0, n_candidates - 1), random_state=seed)
+    return [{}] + [dict(config) for config in sampled]
+
+def validation_score(task, y_val, y_pred, scales=None):
+    """
+    Higher is better: macro F1 for classification, -RMSE for regression and
+    the negative mean RMSE/std over targets for multi-output.
+    """
+    if task == "classification":
+        return f1_score(y_val, y_pred, average='macro')
+    if task == "multi_output":
+        y_pred = np.asarray(y_pred).reshape(len(y_val), -1)
+        return -np.mean([
+            np.sqrt(mean_squared_error(y_val[target], y_pred[:, i])) / scales[target]
+            for i, target in enumerate(y_val.columns)
+        ])
+    return -np.sqrt(mean_squared_error(y_val, y_pred))
+
+def evaluate_config(task, name, target, params, n_rows, inner_jobs):
+    """
+    Fits one hyperparameter configuration on the first n_rows of the fit
+    split and scores it on the validation split. Returns (score, found),
+    where found holds values learned during the fit (XGBoost's early-stopped
+    n_estimators), or (-inf, {}) if the fit fails on this subset.
+    """
+    X_fit, X_val = _GRID_DATA['X_fit'][:n_rows], _GRID_DATA['X_val']
+    y_fit, y_val = _GRID_DATA['y_fit'][task], _GRID_DATA['y_val'][task]
+    if target is not None:
+        y_fit, y_val = y_fit[target], y_val[target]
+    y_fit = y_fit[:n_rows]
+
+    model = make_model(task, name, inner_jobs, params)
+    try:
+        if name == "XGBoost":
+            model.set_params(n_estimators=XGB_MAX_ROUNDS, early_stopping_rounds=XGB_EARLY_STOPPING_ROUNDS)
+            model.fit(X_fit, y_fit, eval_set=[(X_val, y_val)], verbose=False)
+            found = {"n_estimators": int(model.best_iteration) + 1}
+        else:
+            model.fit(X_fit, y_fit)
+            found = {}
+        score = validation_score(task, y_val, model.predict(X_val), _GRID_DATA['scales'])
+    except ValueError as e:
+        # e.g. a small subset missing one of the classes
+        print(f"Skipping {name} {params} on {n_rows} rows: {e}")
+        return float('-inf'), {}
+
+    return float(score), found
+
+def tune_hyperparameters(X_train, targets, n_jobs=None, budget=None,
+                         n_candidates=27, eta=3, min_rows=500):
+    """
+    Successive halving over random configurations for every (task, model,
+    target) bracket at once. Each rung fits the surviving configurations on
+    eta times more training rows than the last and keeps the best 1/eta,
+    until the last rung uses the whole fit split. All fits of a rung run in
+    one process pool.
+
+    targets maps a task ("classification", "regression", "multi_output") to
+    its training labels. budget is a wall-clock limit in seconds: once it
+    runs out no new fits are started and each bracket keeps the best
+    configuration it has scored so far (or the defaults if none).
+
+    Returns ({(task, name, target): params}, report).
+    """
+    started = time.monotonic()
+    deadline = started + budget if budget else None
+
+    X_fit, X_val, *splits = train_test_split(
+        X_train, *targets.values(), test_size=0.2, random_state=42
+    )
+    y_fit = dict(zip(targets, splits[0::2]))
+    y_val = dict(zip(targets, splits[1::2]))
+    scales = None
+    if "multi_output" in targets:
+        scales = y_val["multi_output"].std().replace(0, 1)
+    data = {"X_fit": X_fit, "X_val": X_val, "y_fit": y_fit, "y_val": y_val, "scales": scales}
+
+    brackets = {}
+    for task in targets:
+        if task == "classification":
+            keys = [(task, name, None) for name in CLASSIFICATION_MODELS]
+        elif task == "multi_output":
+            keys = [(task, name, None) for name in REGRESSION_MODELS]
+        else:
+            keys = [(task, name, target) for target in targets[task].columns for name in REGRESSION_MODELS]
+        for key in keys:
+            brackets[key] = sample_configs(key[1], n_candidates)
+
+    # Rung sizes: the last rung uses every fit row, earlier ones 1/eta of
+    # the next, but never fewer than min_rows
+    n_fit = len(X_fit)
+    n_rungs = 1 + max(0, min(
+        math.ceil(math.log(max(len(c) for c in brackets.values()), eta)),
+        math.floor(math.log(max(n_fit / min_rows, 1), eta))
+    ))
+
+    best = {key: ({}, None) for key in brackets}
+    for rung in range(n_rungs):
+        n_rows = max(1, n_fit // eta ** (n_rungs - 1 - rung))
+        # Interleave brackets so a tight budget still scores a few
+        # configurations (the defaults first) for every one of them
+        calls = [
+            (key, configs[i])
+            for i in range(max(len(configs) for configs in brackets.values()))
+            for key, configs in brackets.items() if i < len(configs)
+        ]
+        outer, inner = split_jobs(len(calls), n_jobs)
+        print(f"Tuning rung {rung + 1}/{n_rungs}: {len(calls)} fits on {n_rows} rows, {outer} in parallel")
+
+        results = run_in_pool(
+            evaluate_config,
+            [(task, name, target, config, n_rows, inner) for (task, name, target), config in calls],
+            data, outer, deadline
+        )
+
+        scored = {key: [] for key in brackets}
+        for i, ((key, config), result) in enumerate(zip(calls, results)):
+            if result is not None:
+                score, found = result
+                scored[key].append((score, i, config, found))
+
+        for key, entries in scored.items():
+            if not entries:
+                continue
+            # Highest score first; ties go to the earlier configuration
+            entries.sort(key=lambda entry: (-entry[0], entry[1]))
+            score, _, config, found = entries[0]
+            if score > float('-inf'):
+                best[key] = ({**config, **found}, score)
+            keep = max(1, math.ceil(len(brackets[key]) / eta))
+            brackets[key] = [config for _, _, config, _ in entries[:keep]]
+
+        if deadline is not None and time.monotonic() >= deadline:
+            print("Tuning budget exhausted; keeping the best configurations found so far.")
+            break
+
+    print(f"Tuning took {time.monotonic() - started:.1f}s")
+
+    report = {
+        "/".join(part for part in key if part): {"params": params, "validation_score": score}
+        for key, (params, score) in best.items()
+    }
+    return {key: params for key, (params, _) in best.items()}, report
+
 # --- 1. classification ---
-def run_classification_pipeline(X_train, y_train, X_test, y_test):
+def run_classification_pipeline(X_train, y_train, X_test, y_test, n_jobs=None, params=None):
     """
     Trains, evaluates, and saves classification models.
     """
     print("\n--- 🚀 Starting Classification Pipeline ---")
     
-    models = {
-        "LogisticRegression": LogisticRegression(max_iter=1000, solver='liblinear'),
-        "DecisionTree": DecisionTreeClassifier(random_state=42),
-        "RandomForest": RandomForestClassifier(random_state=42),
-        "XGBoost": XGBClassifier(random_state=42, use_label_encoder=False, eval_metric='mlogloss')
-    }
+    candidates = [(name, None) for name in CLASSIFICATION_MODELS]
+    data = {"X_train": X_train, "y_train": y_train, "X_test": X_test, "y_test": y_test}
+    results = run_candidate_grid("classification", candidates, data, n_jobs, params)
     
     metrics_report = {}
     best_model = None
     best_f1 = 0.0
-    for name, model in models.items():
-        print(f"\nTraining {name}...")
-        model.fit(X_train, y_train)
-        y_pred = model.predict(X_test)
-        
-        # evaluate
-        metrics = {
-            "accuracy": accuracy_score(y_test, y_pred),
-            "precision_macro": precision_score(y_test, y_pred, average='macro'),
-            "recall_macro": recall_score(y_test, y_pred, average='macro'),
-            "f1_macro": f1_score(y_test, y_pred, average='macro')
-        }
-        
-        print(f"Metrics for {name}: {metrics}")
+    for (name, _), (model, metrics) in results.items():
         metrics_report[name] = metrics
         
-        # tract the best model
+        # tract the best model (first one wins ties, as in candidate order)
         if metrics["f1_macro"] > best_f1:
             best_f1 = metrics["f1_macro"]
             best_model = model
@@ -67,46 +383,30 @@ def run_classification_pipeline(X_train, y_train, X_test, y_test):
 
 
 # --- 2. regression pipeline ---
-def run_regression_pipeline(X_train, y_train_dict, X_test, y_test_dict):
+def run_regression_pipeline(X_train, y_train_dict, X_test, y_test_dict, n_jobs=None, params=None):
     """
     Trains, evaluates, and saves regression models for each target.
     """
     print("\n--- 🚀 Starting Regression Pipeline ---")
     
-    models_to_test = {
-        "DecisionTree": DecisionTreeRegressor(random_state=42),
-        "RandomForest": RandomForestRegressor(random_state=42),
-        "XGBoost": XGBRegressor(random_state=42)
-    }
-    
     # regression target
-    regression_targets = y_train_dict.columns
+    regression_targets = list(y_train_dict.columns)
+    candidates = [(name, target) for target in regression_targets for name in REGRESSION_MODELS]
+    data = {"X_train": X_train, "y_train": y_train_dict, "X_test": X_test, "y_test": y_test_dict}
+    results = run_candidate_grid("regression", candidates, data, n_jobs, params)
+
     metrics_report = {}
     best_models = {}
 
-    # train model for different targets
+    # pick the model for different targets
     for target in regression_targets:
-        print(f"\n--- Training for Target: {target} ---")
-        y_train = y_train_dict[target]
-        y_test = y_test_dict[target]
         metrics_report[target] = {}
         
         best_model_for_target = None
         best_rmse = float('inf')
 
-        # find all the model
-        for name, model in models_to_test.items():
-            print(f"Training {name} for {target}...")
-            model.fit(X_train, y_train)
-            y_pred = model.predict(X_test)
-            
-            # evaluate
-            metrics = {
-                "mae": mean_absolute_error(y_test, y_pred),
-                "rmse": np.sqrt(mean_squared_error(y_test, y_pred))
-            }
-            
-            print(f"Metrics for {name} ({target}): {metrics}")
+        for name in REGRESSION_MODELS:
+            model, metrics = results[(name, target)]
             metrics_report[target][name] = metrics
             
             # track the best model
@@ -118,6 +418,10 @@ def run_regression_pipeline(X_train, y_train_dict, X_test, y_test_dict):
         utils.save_model(best_model_for_target, f"best_regression_model_{target}.joblib")
         best_models[target] = best_model_for_target
 
+    # predict.load_models prefers a multi-output model, so drop one left
+    # over from an earlier --multi_output run
+    utils.remove_model(MULTI_OUTPUT_MODEL_FILE)
+
     # store all the regression metrics
     utils.save_metrics(metrics_report, "regression_metrics.json")
     
@@ -125,10 +429,52 @@ def run_regression_pipeline(X_train, y_train_dict, X_test, y_test_dict):
     return best_models
 
 
+def run_multi_output_regression_pipeline(X_train, y_train_dict, X_test, y_test_dict, n_jobs=None, params=None):
+    """
+    Trains one model per algorithm on all regression targets at once and
+    saves the best as a single multi-output model. Metrics are reported per
+    target in the same shape as run_regression_pipeline.
+    """
+    print("\n--- 🚀 Starting Multi-Output Regression Pipeline ---")
+
+    regression_targets = list(y_train_dict.columns)
+    candidates = [(name, None) for name in REGRESSION_MODELS]
+    data = {"X_train": X_train, "y_train": y_train_dict, "X_test": X_test, "y_test": y_test_dict}
+    results = run_candidate_grid("multi_output", candidates, data, n_jobs, params)
+
+    metrics_report = {target: {} for target in regression_targets}
+    for (name, _), (model, metrics) in results.items():
+        for target in regression_targets:
+            metrics_report[target][name] = metrics[target]
+
+    # One model has to serve every target, so rank candidates by RMSE
+    # relative to each target's spread (the loss target would otherwise
+    # decide on its own); first one wins ties
+    scales = y_test_dict.std().replace(0, 1)
+    best_name = None
+    best_score = float('inf')
+    for name, _ in candidates:
+        metrics = results[(name, None)][1]
+        score = np.mean([metrics[target]["rmse"] / scales[target] for target in regression_targets])
+        if score < best_score:
+            best_score = score
+            best_name = name
+    print(f"Best multi-output model: {best_name} (mean normalized RMSE {best_score:.4f})")
+
+    best_model = results[(best_name, None)][0]
+    utils.save_model({"targets": regression_targets, "model": best_model}, MULTI_OUTPUT_MODEL_FILE)
+
+    utils.save_metrics(metrics_report, "regression_metrics.json")
+
+    print("--- ✅ Multi-Output Regression Pipeline Finished ---")
+    return best_model
+
+
 # --- 3. explanation ---
-def generate_explanations(clf_model, reg_models, X_data, X_data_sampled):
+def generate_explanations(clf_model, reg_models, X_data, X_data_sampled, multi_output_model=None):
     """
-    Generates and saves SHAP plots for the best models.
+    Generates and saves SHAP plots for the best models. With a multi-output
+    regressor the fatalities plot is taken from its fatalities output.
     """
     print("\n--- 🚀 Starting Explainability Pipeline ---")
     
@@ -143,6 +489,9 @@ def generate_explanations(clf_model, reg_models, X_data, X_data_sampled):
         model_to_explain = reg_models.get('total_fatalities')
         if model_to_explain:
             utils.save_shap_plot(model_to_explain, X_data_sampled, "shap_plot_regression_fatalities.png")
+        elif multi_output_model is not None:
+            utils.save_shap_plot(multi_output_model["model"], X_data_sampled, "shap_plot_regression_fatalities.png",
+                                 output_index=multi_output_model["targets"].index('total_fatalities'))
     except Exception as e:
         print(f"Error generating SHAP for regression model: {e}")
         
@@ -154,6 +503,18 @@ def parse_args():
     parser.add_argument("--data_dir", type=str, default=None)
     parser.add_argument("--model_dir", type=str, default=None)
     parser.add_argument("--reports_dir", type=str, default=None)
+    parser.add_argument("--n_jobs", type=int, default=None,
+                        help="Total cores for training candidates (default: all)")
+    parser.add_argument("--multi_output", action="store_true",
+                        help="Train one regressor for all impact targets instead of one per target")
+    parser.add_argument("--tune", action="store_true",
+                        help="Tune hyperparameters with successive halving before training")
+    parser.add_argument("--tune_budget", type=float, default=None,
+                        help="Wall-clock limit for tuning in seconds (default: no limit)")
+    parser.add_argument("--tune_candidates", type=int, default=27,
+                        help="Configurations sampled per model and target")
+    parser.add_argument("--no_data_cache", action="store_true",
+                        help="Parse the CSVs directly instead of using the typed column cache")
 
     return parser.parse_args()
 
@@ -172,7 +533,11 @@ def main():
         model_dir=args.model_dir,
         reports_dir=args.reports_dir,
     )
-    X, y = utils.load_data()
+    y_reg_cols = [
+        'total_population_affected', 'total_fatalities', 
+        'total_injuries', 'total_socio_economic_loss'
+    ]
+    X, y = utils.load_data(target_columns=['impact_rank'] + y_reg_cols, use_cache=not args.no_data_cache)
     if X is None:
         return  
     # 2. load feature
@@ -187,10 +552,6 @@ def main():
     utils.save_model(le, "label_encoder.joblib")
 
 
-    y_reg_cols = [
-        'total_population_affected', 'total_fatalities', 
-        'total_injuries', 'total_socio_economic_loss'
-    ]
     y_reg = y[y_reg_cols]
 
     # 4. divide trainning/testing
@@ -198,15 +559,34 @@ def main():
         X_features, y_class_encoded, y_reg, test_size=0.2, random_state=42
     )
     
-    # 5. run-classification
-    best_clf = run_classification_pipeline(X_train, y_train_class, X_test, y_test_class)
+    # 5. tune hyperparameters on a validation split of the training set
+    tuned_params = None
+    if args.tune:
+        print("\n--- 🚀 Starting Hyperparameter Search ---")
+        reg_task = "multi_output" if args.multi_output else "regression"
+        tuned_params, tuning_report = tune_hyperparameters(
+            X_train, {"classification": y_train_class, reg_task: y_train_reg},
+            n_jobs=args.n_jobs, budget=args.tune_budget, n_candidates=args.tune_candidates
+        )
+        utils.save_metrics(tuning_report, "tuning_results.json")
+        print("--- ✅ Hyperparameter Search Finished ---")
+
+    # 6. run-classification
+    best_clf = run_classification_pipeline(X_train, y_train_class, X_test, y_test_class, args.n_jobs, tuned_params)
     
-    # 6. run-regression
-    best_reg_models = run_regression_pipeline(X_train, y_train_reg, X_test, y_test_reg)
+    # 7. run-regression
+    best_reg_models = {}
+    multi_output_model = None
+    if args.multi_output:
+        best_model = run_multi_output_regression_pipeline(X_train, y_train_reg, X_test, y_test_reg,
+                                                          args.n_jobs, tuned_params)
+        multi_output_model = {"targets": y_reg_cols, "model": best_model}
+    else:
+        best_reg_models = run_regression_pipeline(X_train, y_train_reg, X_test, y_test_reg, args.n_jobs, tuned_params)
     
-    # 7. SHAP
+    # 8. SHAP
     X_train_sampled = X_train.sample(n=min(1000, len(X_train)), random_state=42)
-    generate_explanations(best_clf, best_reg_models, X_train, X_train_sampled)
+    generate_explanations(best_clf, best_reg_models, X_train, X_train_sampled, multi_output_model)
 
     print("===== ✅ FULL ML PIPELINE FINISHED SUCCESSFULLY =====")
 if __name__ == "__main__":
@@ -1,11 +1,19 @@
 
 
 import pandas as pd
+import numpy as np
+import hashlib
 import joblib
 import json
 import shap
 import matplotlib.pyplot as plt
 import os
+import threading
+
+# Objects returned by load_object, keyed by path and reused while the
+# file's (mtime, size) is unchanged
+_OBJECT_CACHE = {}
+_OBJECT_CACHE_LOCK = threading.Lock()
 
 
 def init_paths(data_dir=None, model_dir=None, reports_dir=None):
@@ -37,27 +45,182 @@ def init_paths(data_dir=None, model_dir=None, reports_dir=None):
 def load_object(filename):
     """
     Loads a Python object from the /models directory.
+    Loading an unchanged file again returns the cached object.
     """
     path = os.path.join(MODEL_DIR, filename)
     if not os.path.exists(path):
         print(f"Error: Object file not found at {path}")
         return None
+
+    stat = os.stat(path)
+    key = (stat.st_mtime_ns, stat.st_size)
+    with _OBJECT_CACHE_LOCK:
+        cached = _OBJECT_CACHE.get(path)
+        if cached is not None and cached[0] == key:
+            return cached[1]
     
     print(f"Loading object from {path}...")
-    return joblib.load(path)
+    obj = joblib.load(path)
+    with _OBJECT_CACHE_LOCK:
+        _OBJECT_CACHE[path] = (key, obj)
+    return obj
 
 # --- 2. (Data Loading) ---
-def load_data():
+# Typed column caches of the CSVs live here, one directory per file.
+# Caches written with another CACHE_VERSION are rebuilt.
+CACHE_DIRNAME = '.cache'
+CACHE_VERSION = 2
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def frame_memory_mb(df):
+    return df.memory_usage(deep=True).sum() / 1e6
+
+def downcast_frame(df):
+    """
+    Returns a copy of df with integer columns in the smallest integer type
+    that holds them and text columns as categoricals. Float columns keep
+    float64, so every model sees exactly the values a CSV parse gives it.
+    """
+    out = {}
+    for col in df.columns:
+        series = df[col]
+        if pd.api.types.is_bool_dtype(series):
+            out[col] = series
+        elif pd.api.types.is_integer_dtype(series):
+            out[col] = pd.to_numeric(series, downcast='integer')
+        elif pd.api.types.is_float_dtype(series):
+            out[col] = series
+        else:
+            out[col] = series.astype('category')
+    return pd.DataFrame(out, index=df.index)
+
+def cache_is_fresh(meta, source_path):
+    """
+    A cache is fresh if it has the current CACHE_VERSION and the CSV's
+    mtime and size are unchanged, or, if only
+    the mtime moved (e.g. the file was copied or touched), its content hash
+    still matches.
+    """
+    stat = os.stat(source_path)
+    if meta.get("version") != CACHE_VERSION or stat.st_size != meta["source_size"]:
+        return False
+    if stat.st_mtime_ns == meta["source_mtime_ns"]:
+        return True
+    return file_hash(source_path) == meta["source_hash"]
+
+def write_column_cache(df, cache_dir, source_path, source_mb):
+    """
+    Writes each column of df to its own .npy file (categoricals as integer
+    codes plus their categories) and a meta.json describing the columns and
+    the CSV they came from.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    meta_path = os.path.join(cache_dir, 'meta.json')
+    if os.path.exists(meta_path):
+        os.remove(meta_path)
+
+    stat = os.stat(source_path)
+    columns = []
+    for i, col in enumerate(df.columns):
+        series = df[col]
+        entry = {"name": col, "file": f"col_{i}.npy"}
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            values = series.cat.codes.to_numpy()
+            entry["categories"] = series.cat.categories.tolist()
+        else:
+            values = series.to_numpy()
+        np.save(os.path.join(cache_dir, entry["file"]), values)
+        columns.append(entry)
+
+    meta = {
+        "version": CACHE_VERSION,
+        "source_mtime_ns": stat.st_mtime_ns,
+        "source_size": stat.st_size,
+        "source_hash": file_hash(source_path),
+        "source_memory_mb": source_mb,
+        "columns": columns
+    }
+    # meta.json goes last, so an interrupted write leaves no usable cache
+    with open(meta_path, 'w') as f:
+        json.dump(meta, f)
+
+def read_column_cache(cache_dir, columns=None):
+    """
+    Loads the cached columns (all, or just `columns`) as a DataFrame.
+    """
+    with open(os.path.join(cache_dir, 'meta.json'), 'r') as f:
+        meta = json.load(f)
+
+    entries = {entry["name"]: entry for entry in meta["columns"]}
+    missing = [col for col in (columns or []) if col not in entries]
+    if missing:
+        raise KeyError(f"Columns not found: {missing}")
+
+    out = {}
+    for col in (columns if columns is not None else entries):
+        entry = entries[col]
+        values = np.load(os.path.join(cache_dir, entry["file"]))
+        if "categories" in entry:
+            values = pd.Categorical.from_codes(values, entry["categories"])
+        out[col] = values
+    return pd.DataFrame(out), meta
+
+def load_table(path, columns=None, use_cache=True):
+    """
+    Reads a CSV through its typed column cache, building the cache on the
+    first read and whenever the CSV changes. Prints the memory footprint of
+    the plain CSV parse next to the typed one.
+    """
+    name = os.path.basename(path)
+    if not use_cache:
+        return pd.read_csv(path, usecols=columns)
+
+    cache_dir = os.path.join(os.path.dirname(path), CACHE_DIRNAME, name)
+    meta_path = os.path.join(cache_dir, 'meta.json')
+    if os.path.exists(meta_path):
+        with open(meta_path, 'r') as f:
+            meta = json.load(f)
+        if cache_is_fresh(meta, path):
+            # Only the mtime moved: remember it so the next run skips the hash
+            mtime_ns = os.stat(path).st_mtime_ns
+            if meta["source_mtime_ns"] != mtime_ns:
+                meta["source_mtime_ns"] = mtime_ns
+                with open(meta_path, 'w') as f:
+                    json.dump(meta, f)
+            df, meta = read_column_cache(cache_dir, columns)
+            print(f"Loaded {name} from cache: {frame_memory_mb(df):.1f} MB "
+                  f"(full CSV parse: {meta['source_memory_mb']:.1f} MB)")
+            return df
+        print(f"{name} changed since it was cached; rebuilding the cache...")
+
+    raw = pd.read_csv(path)
+    raw_mb = frame_memory_mb(raw)
+    typed = downcast_frame(raw)
+    print(f"Memory for {name}: {raw_mb:.1f} MB as parsed, {frame_memory_mb(typed):.1f} MB typed")
+    write_column_cache(typed, cache_dir, path, raw_mb)
+    return typed[columns] if columns is not None else typed
+
+def load_data(feature_columns=None, target_columns=None, use_cache=True):
     """
     Loads features and targets based on the data contract.
+
+    The CSVs are parsed once into a typed column cache under
+    DATA_DIR/.cache; later runs load only the requested columns from it.
+    Integers are stored in their smallest type; floats keep full precision.
     """
     print("Loading data...")
     try:
         features_path = os.path.join(DATA_DIR, 'features.csv')
         targets_path = os.path.join(DATA_DIR, 'targets.csv')
         
-        X = pd.read_csv(features_path)
-        y = pd.read_csv(targets_path)
+        X = load_table(features_path, feature_columns, use_cache=use_cache)
+        y = load_table(targets_path, target_columns, use_cache=use_cache)
         
         print("Data loaded successfully.")
         return X, y
@@ -73,9 +236,22 @@ def save_model(model, filename):
     """
     path = os.path.join(MODEL_DIR, filename)
     print(f"Saving model to {path}...")
-    joblib.dump(model, path)
+    # Written to a temp file first so a process loading the old file never
+    # sees it half-written
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    joblib.dump(model, tmp_path)
+    os.replace(tmp_path, path)
     print("Model saved.")
 
+def remove_model(filename):
+    """
+    Deletes a model file from the /models directory if it exists.
+    """
+    path = os.path.join(MODEL_DIR, filename)
+    if os.path.exists(path):
+        print(f"Removing stale model {path}...")
+        os.remove(path)
+
 # --- 4. (Report Saving) ---
 def save_metrics(metrics_dict, filename):
     """
@@ -87,15 +263,18 @@ def save_metrics(metrics_dict, filename):
         json.dump(metrics_dict, f, indent=4)
     print("Metrics saved.")
 
-def save_shap_plot(model, X_data, filename):
+def save_shap_plot(model, X_data, filename, output_index=None):
     """
-    Generates, saves, and closes a SHAP summary plot.
+    Generates, saves, and closes a SHAP summary plot. For multi-output
+    models, output_index selects the output to plot.
     """
     print(f"Generating SHAP plot for {filename}...")
     path = os.path.join(FIGURES_DIR, filename)
     
     explainer = shap.TreeExplainer(model, X_data)
     shap_values = explainer(X_data)
+    if output_index is not None:
+        shap_values = shap_values[..., output_index]
     
     plt.figure()
     shap.summary_plot(shap_values, X_data, show=False, plot_type="dot")
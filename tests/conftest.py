@@ -0,0 +1,41 @@
+import http.client
+import os
+import sys
+import threading
+
+import pytest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [REPO_DIR, os.path.join(REPO_DIR, "preprocessing"), os.path.join(REPO_DIR, "src")]
+
+@pytest.fixture
+def start_server():
+    """
+    Starts serve_dashboard in-process on a free port and returns a
+    function making one request against it: (status, headers, body).
+    """
+    import serve_dashboard
+
+    servers = []
+
+    def start(**kwargs):
+        server = serve_dashboard.ThreadPoolHTTPServer(("127.0.0.1", 0), serve_dashboard.Handler,
+                                                      workers=4, **kwargs)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+
+        def request(method, path, body=None, headers=None):
+            conn = http.client.HTTPConnection("127.0.0.1", server.server_address[1], timeout=10)
+            try:
+                conn.request(method, path, body, headers or {})
+                response = conn.getresponse()
+                return response.status, dict(response.getheaders()), response.read()
+            finally:
+                conn.close()
+        return request
+
+    serve_dashboard.Handler.log_message = lambda *a: None
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,82 @@
+import json
+
+import pytest
+
+import chatbot_api
+from chatbot_api import ChatClient, ResponseCache
+
+@pytest.fixture
+def clock(monkeypatch):
+    """
+    Replaces time.time() in chatbot_api with a settable clock.
+    """
+    now = [1000.0]
+    monkeypatch.setattr(chatbot_api.time, "time", lambda: now[0])
+    return now
+
+def log_records(path):
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+def test_entries_expire_after_ttl(clock):
+    cache = ResponseCache(max_entries=4, ttl=60)
+    cache.put("a", "answer")
+
+    clock[0] += 60
+    assert cache.get("a") == "answer"
+    clock[0] += 1
+    assert cache.get("a") is None
+    assert cache.stats() == {"enabled": True, "hits": 1, "misses": 1, "hit_rate": 0.5, "size": 0}
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ResponseCache(max_entries=2)
+    cache.put("a", "1")
+    cache.put("b", "2")
+    assert cache.get("a") == "1"
+
+    cache.put("c", "3")
+    assert cache.get("b") is None
+    assert cache.get("a") == "1"
+    assert cache.get("c") == "3"
+
+def test_log_is_compacted_to_live_entries(tmp_path, clock):
+    path = str(tmp_path / "chat_cache.jsonl")
+    cache = ResponseCache(max_entries=2, ttl=60, persist_path=path)
+
+    for i in range(4):
+        cache.put("a", f"answer {i}")
+    assert len(log_records(path)) == 4
+
+    # The fifth line passes CACHE_LOG_FACTOR lines per entry
+    cache.put("b", "other")
+    assert [(r["key"], r["value"]) for r in log_records(path)] == [("a", "answer 3"), ("b", "other")]
+    assert not (tmp_path / "chat_cache.jsonl.tmp").exists()
+
+    reloaded = ResponseCache(max_entries=2, ttl=60, persist_path=path)
+    assert reloaded.get("a") == "answer 3"
+    assert reloaded.get("b") == "other"
+
+def test_load_drops_expired_lines(tmp_path, clock):
+    path = str(tmp_path / "chat_cache.jsonl")
+    cache = ResponseCache(max_entries=8, ttl=60, persist_path=path)
+    for key in "abc":
+        cache.put(key, key.upper())
+    clock[0] += 30
+    cache.put("d", "D")
+
+    clock[0] += 45
+    reloaded = ResponseCache(max_entries=8, ttl=60, persist_path=path)
+    assert reloaded.stats()["size"] == 1
+    assert [r["key"] for r in log_records(path)] == ["d"]
+
+def test_empty_stream_answer_is_not_cached():
+    cache = ResponseCache()
+    client = ChatClient(api_key="test", cache=cache)
+    client.stream = lambda payload, api_key: iter(())
+
+    assert list(client.chat_stream("Hi", "context")) == [{"done": True}]
+    assert cache.stats()["size"] == 0
+
+    client.stream = lambda payload, api_key: iter(["Hel", "lo"])
+    list(client.chat_stream("Hi", "context"))
+    assert list(client.chat_stream("Hi", "context")) == [{"token": "Hello"}, {"done": True}]
@@ -0,0 +1,105 @@
+import json
+
+import numpy as np
+
+from columnar_dataset import ColumnarDataset, columnar_path, write_columnar_dataset
+
+def noaa_like():
+    # Events whose name equals their type, a NaN loss, a state without
+    # events and fewer than three top events
+    return {
+        "historical": {
+            "2000": {
+                "Texas": {
+                    "loss": 1500.25,
+                    "fatalities": 3.0,
+                    "top_events": ["Hail", "Flood"],
+                    "events": [
+                        {"type": "Hail", "name": "Hail", "loss": 1000.25, "fatalities": 1, "month": 5},
+                        {"type": "Flood", "name": "Flood", "loss": 500.0, "fatalities": 2, "month": 0}
+                    ]
+                },
+                "Maine": {"loss": 0.0, "fatalities": 0.0, "top_events": [], "events": []}
+            },
+            "2001": {
+                "Texas": {
+                    "loss": float("nan"),
+                    "fatalities": 0.0,
+                    "top_events": ["Tornado"],
+                    "events": [
+                        {"type": "Tornado", "name": "Tornado", "loss": float("nan"), "fatalities": 0, "month": 12}
+                    ]
+                },
+                "Florida": {
+                    "loss": 2.5,
+                    "fatalities": 0.0,
+                    "top_events": ["Hurricane", "Flood", "Hail"],
+                    "events": [
+                        {"type": "Hurricane", "name": "Hurricane", "loss": 1.5, "fatalities": 0, "month": 9},
+                        {"type": "Flood", "name": "Flood", "loss": 0.5, "fatalities": 0, "month": 9},
+                        {"type": "Hail", "name": "Hail", "loss": 0.5, "fatalities": 0, "month": 4}
+                    ]
+                }
+            }
+        },
+        "predictions": {"Texas": {"loss": 12.5, "fatalities": 1}},
+        "unique_event_types": ["Flood", "Hail", "Hurricane", "Tornado"]
+    }
+
+def predictions_like():
+    # No top events, a count field, non-ASCII and names that differ from types
+    return {
+        "2025": {
+            "Texas": {
+                "loss": 300.5,
+                "fatalities": 2,
+                "events": [
+                    {"type": "Hail", "name": "Großer Hagel", "month": 1, "loss": 200.5, "fatalities": 2, "count": 3},
+                    {"type": "Flood", "name": "Flood", "month": 2, "loss": 100.0, "fatalities": 0, "count": 1}
+                ]
+            },
+            "São Paulo": {
+                "loss": 0.0,
+                "fatalities": 0,
+                "events": [
+                    {"type": "Hail", "name": "Hail", "month": 7, "loss": 0.0, "fatalities": 0, "count": 1}
+                ]
+            }
+        }
+    }
+
+def round_trip(data, path, events_key=None):
+    write_columnar_dataset(data, str(path), events_key=events_key)
+    return ColumnarDataset.open(str(path))
+
+def test_noaa_round_trip(tmp_path):
+    data = noaa_like()
+    dataset = round_trip(data, tmp_path / "noaa_data.bin", events_key="historical")
+
+    # json.dumps renders NaN as NaN, so it also compares those exactly
+    assert json.dumps(dataset.to_nested()) == json.dumps(data)
+    assert "event_name" not in dataset.columns
+    assert dataset.strings[:2] == ["Hail", "Flood"]
+    assert [dataset.strings[c] for c in dataset.event_types()] == [
+        "Hail", "Flood", "Tornado", "Hurricane", "Flood", "Hail"]
+    assert np.isnan(dataset.columns["event_loss"][2])
+
+def test_predictions_round_trip(tmp_path):
+    data = predictions_like()
+    dataset = round_trip(data, tmp_path / "predictions_data.bin")
+
+    assert json.dumps(dataset.to_nested()) == json.dumps(data)
+    assert "event_name" in dataset.columns
+    assert "group_top_events" not in dataset.columns
+    assert dataset.columns["event_count"].dtype == np.uint8
+    assert dataset.columns["group_fatalities"].dtype == np.int32
+
+def test_columns_are_aligned_views(tmp_path):
+    # The mapping starts on a page boundary, so aligned offsets give
+    # aligned column addresses
+    dataset = round_trip(noaa_like(), tmp_path / "noaa_data.bin", events_key="historical")
+    for name, column in dataset.columns.items():
+        assert column.__array_interface__['data'][0] % 8 == 0, name
+
+def test_columnar_path():
+    assert columnar_path("datasets/noaa_data.json") == "datasets/noaa_data.bin"
@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LinearRegression
+
+from ml.predict import predict_next_year, predict_next_year_from_totals, predict_years
+
+def baseline_predict_next_year(df, year=2025):
+    """
+    The original per-state LinearRegression fit that the closed-form
+    least squares replaced, with the forecast year as a parameter.
+    """
+    predictions = {}
+
+    for state in df['state'].unique():
+        yearly_state = df[df['state'] == state].groupby('year')[['loss', 'fatalities']].sum().reset_index()
+
+        if len(yearly_state) < 3:
+            predictions[state] = {"loss": 0, "fatalities": 0}
+            continue
+
+        X = yearly_state['year'].values.reshape(-1, 1)
+        pred_loss = LinearRegression().fit(X, yearly_state['loss'].values).predict([[year]])[0]
+        pred_fat = LinearRegression().fit(X, yearly_state['fatalities'].values).predict([[year]])[0]
+
+        predictions[state] = {
+            "loss": float(max(0, pred_loss)),
+            "fatalities": int(max(0, pred_fat))
+        }
+
+    return predictions
+
+def make_events(seed, rows=400):
+    """
+    Event rows for states with 1 to 6 distinct years, some with gaps and
+    some with falling trends that extrapolate below zero.
+    """
+    rng = np.random.default_rng(seed)
+    frames = []
+    for i, n_years in enumerate([1, 2, 3, 4, 6, 6]):
+        years = np.sort(rng.choice(np.arange(2000, 2025), n_years, replace=False))
+        n = rows // 6
+        frames.append(pd.DataFrame({
+            'state': f"State {i}",
+            'year': rng.choice(years, n),
+            'loss': rng.gamma(1.0, 1e6, n) * (1 if i % 2 else np.linspace(3, 0.1, n)),
+            'fatalities': rng.integers(0, 5, n).astype(float)
+        }))
+    return pd.concat(frames, ignore_index=True).sample(frac=1, random_state=seed)
+
+def assert_predictions_equal(actual, expected):
+    assert list(actual) == list(expected)
+    for state, pred in expected.items():
+        assert actual[state]["loss"] == pytest.approx(pred["loss"], rel=1e-9, abs=1e-6)
+        assert actual[state]["fatalities"] == pred["fatalities"]
+
+@pytest.mark.parametrize("seed", range(5))
+def test_closed_form_matches_linear_regression(seed):
+    df = make_events(seed)
+    assert_predictions_equal(predict_next_year(df), baseline_predict_next_year(df))
+
+def test_states_with_fewer_than_three_years_predict_zero():
+    df = make_events(0)
+    predictions = predict_next_year(df)
+    years = df.groupby('state')['year'].nunique()
+    assert sorted(years.unique()) == [1, 2, 3, 4, 6]
+    for state, n in years.items():
+        if n < 3:
+            assert predictions[state] == {"loss": 0, "fatalities": 0}
+    assert any(predictions[state]["loss"] > 0 for state in years[years >= 3].index)
+
+def test_forecast_year_is_a_parameter():
+    df = make_events(1)
+    by_year = predict_years(df, [2025, 2030])
+    for year in (2025, 2030):
+        assert_predictions_equal(predict_next_year(df, year), baseline_predict_next_year(df, year))
+        assert_predictions_equal(by_year[year], baseline_predict_next_year(df, year))
+
+def test_totals_path_matches_event_path():
+    df = make_events(2)
+    yearly = df.groupby(['state', 'year'])[['loss', 'fatalities']].sum()
+    states = list(df['state'].unique())
+    assert_predictions_equal(predict_next_year_from_totals(yearly, states, 2027),
+                             baseline_predict_next_year(df, 2027))
@@ -0,0 +1,84 @@
+import json
+
+import pandas as pd
+import pytest
+
+from model_server import MicroBatcher, PredictionService
+
+def echo_predict(features_df, sizes, *options):
+    """
+    predict_fn stand-in: one package per row carrying the row's 'id' and
+    the batch it was scored in.
+    """
+    echo_predict.calls.append((list(sizes), options))
+    return [{"id": int(i), "batch_rows": len(features_df), "options": list(options)} for i in features_df['id']]
+
+@pytest.fixture
+def batcher():
+    echo_predict.calls = []
+    batcher = MicroBatcher(echo_predict, max_wait=0.2)
+    yield batcher
+    batcher.close()
+
+def test_micro_batcher_splits_results_per_request(batcher):
+    # All three arrive within max_wait, so they are scored as one batch
+    sizes = [3, 1, 2]
+    futures = [batcher.submit(pd.DataFrame({'id': range(100 * r, 100 * r + n)}), ('none',))
+               for r, n in enumerate(sizes)]
+
+    for r, (n, future) in enumerate(zip(sizes, futures)):
+        part = future.result(timeout=5)
+        assert [p["id"] for p in part] == list(range(100 * r, 100 * r + n))
+        assert [p["input_index"] for p in part] == list(range(n))
+    assert echo_predict.calls == [(sizes, ('none',))]
+    assert batcher.batches == 1 and batcher.requests == 3
+
+def test_micro_batcher_only_batches_equal_options(batcher):
+    first = batcher.submit(pd.DataFrame({'id': [1, 2]}), ('none', 1.0))
+    second = batcher.submit(pd.DataFrame({'id': [3]}), ('full', 1.0))
+
+    assert [p["options"] for p in first.result(timeout=5)] == [['none', 1.0]] * 2
+    assert [p["options"] for p in second.result(timeout=5)] == [['full', 1.0]]
+    assert sorted(echo_predict.calls) == [([1], ('full', 1.0)), ([2], ('none', 1.0))]
+
+def test_micro_batcher_reports_error_packages_as_exceptions():
+    batcher = MicroBatcher(lambda df, sizes, *options: [{"error": "model failed"}], max_wait=0)
+    try:
+        with pytest.raises(RuntimeError, match="model failed"):
+            batcher.submit(pd.DataFrame({'id': [1, 2]})).result(timeout=5)
+    finally:
+        batcher.close()
+
+@pytest.fixture
+def service(batcher):
+    # A PredictionService around the echo batcher, without loading models
+    service = PredictionService.__new__(PredictionService)
+    service.feature_names = ['id']
+    service.batcher = batcher
+    return service
+
+@pytest.mark.parametrize("body, message", [
+    ("[1, 2]", "must be a JSON object"),
+    ("3", "must be a JSON object"),
+    ('{"instances": {"id": 1}}', "non-empty list"),
+    ('{"instances": []}', "non-empty list"),
+    ('{"instances": [1, 2]}', "must be a {feature: value} object"),
+    ('{"instances": [{"id": 1}, "x"]}', "must be a {feature: value} object"),
+    ('{"instances": [{"other": 1}]}', "Missing features"),
+    ('{"instances": [{"id": 1}], "explain": "all"}', "Unknown explain mode"),
+    ('{"instances": [{"id": 1}], "explain_sample_rate": "x"}', "must be a number"),
+    ('{"instances": [{"id": 1}], "explain_sample_rate": 2}', "between 0 and 1"),
+    ("{", "Expecting"),
+])
+def test_predict_rejects_bad_requests_with_400(start_server, service, body, message):
+    request = start_server(prediction_service=service)
+    status, _, payload = request("POST", "/api/predict", body, {"Content-Type": "application/json"})
+    assert status == 400
+    assert message in json.loads(payload)["error"]
+
+def test_predict_scores_valid_requests(start_server, service):
+    request = start_server(prediction_service=service)
+    body = json.dumps({"instances": [{"id": 7}, {"id": 8}], "explain": "top_k"})
+    status, _, payload = request("POST", "/api/predict", body, {"Content-Type": "application/json"})
+    assert status == 200
+    assert [p["id"] for p in json.loads(payload)["predictions"]] == [7, 8]
@@ -0,0 +1,146 @@
+import http.client
+import json
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import serve_dashboard
+from noaa_cube import NoaaCube
+from preprocess_noaa_data import aggregate_data
+
+STATES = ['Florida', 'Iowa', 'Maine', 'Texas']
+TYPES = ['Flood', 'Hail', 'Tornado', 'Wind']
+
+@pytest.fixture(scope="module")
+def events():
+    # 2004 has no events, so it is not on the cube's year axis
+    rng = np.random.default_rng(7)
+    rows = 3000
+    return pd.DataFrame({
+        'year': rng.choice([y for y in range(2000, 2010) if y != 2004], rows),
+        'state': rng.choice(STATES, rows),
+        'disaster_name': rng.choice(TYPES, rows),
+        'month': rng.integers(0, 13, rows),
+        'loss': rng.gamma(1.0, 5e4, rows).round(2),
+        'fatalities': rng.choice([0.0, 0.0, 1.0, 3.0], rows)
+    })
+
+@pytest.fixture(scope="module")
+def cube(events, tmp_path_factory):
+    # The server memory-maps the saved cube, so test that one
+    directory = str(tmp_path_factory.mktemp("cube"))
+    NoaaCube.from_historical(aggregate_data(events)).save(directory)
+    return NoaaCube.load(directory)
+
+def expand_years(spec):
+    # The same clamping as parse_aggregate_filters, against the data's years
+    years = []
+    for item in spec.split(','):
+        start, _, end = item.partition('-')
+        years.extend(range(max(int(start), 2000), min(int(end or start), 2009) + 1))
+    return years
+
+# (query string, expected pandas filter)
+FILTERS = [
+    ("", {}),
+    ("years=2002-2006", {'year': expand_years("2002-2006")}),
+    ("years=2001,2003-2005,2008", {'year': expand_years("2001,2003-2005,2008")}),
+    ("years=1990-2001", {'year': [2000, 2001]}),
+    ("years=2008-2030", {'year': [2008, 2009]}),
+    ("years=1980-1990", {'year': []}),
+    ("years=2007-2003", {'year': []}),
+    ("years=2004", {'year': [2004]}),
+    ("states=Texas,Florida", {'state': ['Texas', 'Florida']}),
+    ("states=Atlantis", {'state': []}),
+    ("events=Hail", {'disaster_name': ['Hail']}),
+    ("years=2003-2007&states=Iowa&events=Flood,Wind", {'year': expand_years("2003-2007"),
+                                                       'state': ['Iowa'], 'disaster_name': ['Flood', 'Wind']}),
+    ("years=2001-2008&months=6,7,8", {'year': expand_years("2001-2008"), 'month': [6, 7, 8]}),
+    ("months=0", {'month': [0]}),
+]
+
+def filtered(events, expected):
+    mask = np.ones(len(events), dtype=bool)
+    for column, values in expected.items():
+        mask &= events[column].isin(values).to_numpy()
+    return events[mask]
+
+@pytest.fixture(scope="module")
+def aggregate(cube):
+    # One server for the whole module; see conftest.start_server
+    serve_dashboard.Handler.log_message = lambda *a: None
+    server = serve_dashboard.ThreadPoolHTTPServer(("127.0.0.1", 0), serve_dashboard.Handler,
+                                                  workers=2, noaa_cube=cube)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    def get(route, query):
+        conn = http.client.HTTPConnection("127.0.0.1", server.server_address[1], timeout=10)
+        try:
+            conn.request("GET", f"/api/aggregate/{route}?{query}")
+            response = conn.getresponse()
+            assert response.status == 200
+            return json.loads(response.read())
+        finally:
+            conn.close()
+
+    yield get
+    server.shutdown()
+    server.server_close()
+
+@pytest.mark.parametrize("query, expected", FILTERS)
+def test_totals_match_groupby(events, aggregate, query, expected):
+    rows = filtered(events, expected)
+    result = aggregate("totals", query)
+    assert result["loss"] == pytest.approx(rows['loss'].sum(), rel=1e-12, abs=1e-6)
+    assert result["fatalities"] == int(rows['fatalities'].sum())
+
+@pytest.mark.parametrize("query, expected", FILTERS)
+def test_state_ranking_matches_groupby(events, aggregate, query, expected):
+    rows = filtered(events, expected)
+    result = aggregate("states", query + "&metric=fatalities&limit=3")
+
+    per_state = rows.groupby('state')[['loss', 'fatalities']].sum()
+    wanted = expected.get('state', STATES)
+    per_state = per_state.reindex([s for s in STATES if s in wanted], fill_value=0)
+    top = per_state.sort_values('fatalities', ascending=False, kind='stable').head(3)
+
+    assert [r["fatalities"] for r in result] == top['fatalities'].astype(int).tolist()
+    for r in result:
+        assert r["loss"] == pytest.approx(per_state.loc[r["state"], 'loss'], rel=1e-12, abs=1e-6)
+
+@pytest.mark.parametrize("query, expected", FILTERS)
+def test_yearly_series_matches_groupby(events, aggregate, query, expected):
+    rows = filtered(events, expected)
+    result = aggregate("yearly", query)
+
+    years = [y for y in sorted(events['year'].unique()) if y in expected.get('year', [y])]
+    per_year = rows.groupby('year')[['loss', 'fatalities']].sum().reindex(years, fill_value=0)
+    assert result["years"] == years
+    assert result["loss"] == pytest.approx(per_year['loss'].tolist(), rel=1e-12, abs=1e-6)
+    assert result["fatalities"] == per_year['fatalities'].astype(int).tolist()
+
+@pytest.mark.parametrize("query, expected", FILTERS)
+def test_monthly_series_matches_groupby(events, aggregate, query, expected):
+    rows = filtered(events, expected)
+    result = aggregate("monthly", query)
+
+    months = expected.get('month', list(range(13)))
+    per_month = rows.groupby('month')[['loss', 'fatalities']].sum().reindex(months, fill_value=0)
+    assert result["months"] == months
+    assert result["loss"] == pytest.approx(per_month['loss'].tolist(), rel=1e-12, abs=1e-6)
+    assert result["fatalities"] == per_month['fatalities'].astype(int).tolist()
+
+def test_prefix_sums_match_direct_sums(cube):
+    for start in range(len(cube.years)):
+        for stop in range(start, len(cube.years) + 1):
+            years = cube.years[start:stop]
+            direct = cube.select(years=years, states=['Texas']).sum(axis=1)
+            np.testing.assert_allclose(cube.summed_over_years(years=years, states=['Texas']), direct,
+                                       rtol=1e-12, atol=1e-6)
+
+def test_bad_filters_are_rejected(cube):
+    for query in ("years=abc", "limit=-1", "metric=damage"):
+        with pytest.raises(ValueError):
+            serve_dashboard.parse_aggregate_filters(query, (min(cube.years), max(cube.years)))
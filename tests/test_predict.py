@@ -0,0 +1,43 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from predict import shap_importances, top_k_indices
+
+def baseline_top_factors(importances, columns, k=3):
+    """
+    The original per-row top factors: a Series of the row's importances
+    and nlargest(k), which keeps the first column among ties.
+    """
+    return [pd.Series(row, index=columns).abs().nlargest(k).index.tolist() for row in importances]
+
+def tied_importances(seed, rows=200, features=12):
+    # Few distinct values, so most rows have ties at and around the k-th place
+    rng = np.random.default_rng(seed)
+    return rng.choice([0.0, 0.25, 0.5, 0.5000000001, 1.0], size=(rows, features))
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("k", [1, 3, 5])
+def test_top_k_matches_nlargest_with_ties(seed, k):
+    importances = tied_importances(seed)
+    columns = [f"f{i}" for i in range(importances.shape[1])]
+
+    top = top_k_indices(importances, k)
+    assert [[columns[j] for j in row] for row in top.tolist()] == baseline_top_factors(importances, columns, k)
+
+def test_top_k_edge_cases():
+    importances = np.array([[0.5, 0.5], [0.0, 0.0], [0.1, 0.3]])
+    assert top_k_indices(importances, 3).tolist() == [[0, 1], [0, 1], [1, 0]]
+    assert top_k_indices(importances, 0).shape == (3, 0)
+    assert top_k_indices(np.zeros((0, 4)), 3).shape == (0, 3)
+
+def test_shap_importances_match_per_row_mean():
+    # (rows, features, classes) SHAP values, as for the multi-class model
+    rng = np.random.default_rng(0)
+    values = rng.normal(size=(20, 6, 4))
+    importances = shap_importances(SimpleNamespace(values=values))
+
+    for i in range(len(values)):
+        np.testing.assert_array_equal(importances[i], np.abs(values[i]).mean(axis=1))
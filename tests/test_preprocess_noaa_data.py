@@ -0,0 +1,152 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+import preprocess_noaa_data
+from preprocess_noaa_data import aggregate_data
+
+def baseline_aggregate_data(df):
+    """
+    The original per-group implementation of aggregate_data, kept as the
+    reference its vectorized replacement must reproduce exactly.
+    """
+    pre_agg = df.groupby(['year', 'state', 'disaster_name', 'month'])[['loss', 'fatalities']].sum().reset_index()
+
+    grouped = pre_agg.groupby(['year', 'state'])
+
+    agg_data = {}
+
+    for (year, state), group in grouped:
+        total_loss = group['loss'].sum()
+        total_fatalities = group['fatalities'].sum()
+
+        top_events_series = group.groupby('disaster_name')['loss'].sum().sort_values(ascending=False).head(3)
+        top_events = top_events_series.index.tolist()
+
+        events_list = []
+        for _, row in group.iterrows():
+            events_list.append({
+                'type': row['disaster_name'],
+                'name': row['disaster_name'],
+                'loss': float(row['loss']),
+                'fatalities': int(row['fatalities']),
+                'month': int(row['month'])
+            })
+
+        year_str = str(year)
+        if year_str not in agg_data:
+            agg_data[year_str] = {}
+
+        agg_data[year_str][state] = {
+            "loss": float(total_loss),
+            "fatalities": float(total_fatalities),
+            "top_events": top_events,
+            "events": events_list
+        }
+
+    return agg_data
+
+def make_events(seed, rows=1500, types=30):
+    """
+    Cleaned NOAA-like rows with fractional losses and many tied per-type
+    totals: most rows lose nothing and the rest draw from four amounts.
+    With 30 event types per state-year the top-3 sort leaves numpy's
+    small-array insertion sort, so a stable sort would order ties
+    differently from the baseline's quicksort.
+    """
+    rng = np.random.default_rng(seed)
+    amounts = np.array([0.1, 0.2, 0.3, 1234.56])
+    return pd.DataFrame({
+        'year': rng.integers(2000, 2003, rows),
+        'state': rng.choice(['Florida', 'Texas', 'Iowa', 'Maine'], rows),
+        'disaster_name': rng.choice([f"Event {i:02d}" for i in range(types)], rows),
+        'month': rng.integers(0, 13, rows),
+        'loss': np.where(rng.random(rows) < 0.8, 0.0, rng.choice(amounts, rows)),
+        'fatalities': rng.choice([0.0, 0.0, 1.0], rows)
+    })
+
+def test_aggregate_data_matches_baseline():
+    for seed in range(5):
+        df = make_events(seed)
+        expected = json.dumps(baseline_aggregate_data(df), indent=2)
+        assert json.dumps(aggregate_data(df), indent=2) == expected
+
+def test_aggregate_data_sums_fractional_losses_like_baseline():
+    # Compensated (groupby) summation gives 0.6 here; a plain float sum,
+    # like the baseline's Series.sum, gives 0.6000000000000001
+    df = pd.DataFrame({
+        'year': [2000] * 3,
+        'state': ['Florida'] * 3,
+        'disaster_name': ['Flood', 'Hail', 'Wind'],
+        'month': [1, 1, 1],
+        'loss': [0.1, 0.2, 0.3],
+        'fatalities': [0.0, 0.0, 0.0]
+    })
+    result = aggregate_data(df)["2000"]["Florida"]
+    assert result["loss"] == baseline_aggregate_data(df)["2000"]["Florida"]["loss"]
+    assert result["top_events"] == ['Wind', 'Hail', 'Flood']
+
+def write_year_csv(path, year):
+    pd.DataFrame({
+        'YEAR': [year, year],
+        'MONTH': [1, 2],
+        'STATE': ['FLORIDA', 'TEXAS'],
+        'DISASTER_NAME': ['Flood', 'Hail'],
+        'LOSS': ['1,000', '250'],
+        'FATALITIES': [1, 0]
+    }).to_csv(path, index=False)
+
+def test_update_partitions_drops_years_of_removed_source(tmp_path, monkeypatch):
+    partition_dir = tmp_path / "partitions"
+    monkeypatch.setattr(preprocess_noaa_data, "PARTITION_DIR", str(partition_dir))
+    sources = tmp_path / "by_year"
+    sources.mkdir()
+    write_year_csv(sources / "2000.csv", 2000)
+    write_year_csv(sources / "2001.csv", 2001)
+
+    assert preprocess_noaa_data.update_partitions([str(sources)]) == [2000, 2001]
+
+    # No remaining source covers 2001, so nothing is read at all
+    os.remove(sources / "2001.csv")
+    assert preprocess_noaa_data.update_partitions([str(sources)]) == [2001]
+    assert not (partition_dir / "2001.json").exists()
+    assert not (partition_dir / "2001.fragment").exists()
+
+    with open(partition_dir / preprocess_noaa_data.PARTITION_MANIFEST) as f:
+        manifest = json.load(f)
+    assert list(manifest["sources"]) == [str(sources / "2000.csv")]
+
+    historical, _, _, _, _ = preprocess_noaa_data.load_partitions([str(sources)])
+    assert list(historical) == ["2000"]
+    assert preprocess_noaa_data.update_partitions([str(sources)]) == []
+
+def test_outputs_are_where_the_server_reads_them():
+    import serve_dashboard
+
+    assert preprocess_noaa_data.OUTPUT_JSON == serve_dashboard.NOAA_JSON
+    assert preprocess_noaa_data.CUBE_DIR == serve_dashboard.NOAA_CUBE_DIR
+
+def test_chunked_aggregation_matches_whole_file(tmp_path):
+    # Rows of the same (year, state, type, month) key on both sides of the
+    # 4-row chunk boundary, raw comma-formatted losses and blank values
+    path = tmp_path / "events.csv"
+    pd.DataFrame({
+        'YEAR': [2000, 2000, 2001, 2000, 2000, 2001, 2000, 2001],
+        'MONTH': [1, 2, 1, None, 1, 1, 2, None],
+        'STATE': ['FLORIDA', 'texas', 'FLORIDA', 'FLORIDA', 'FLORIDA', 'FLORIDA', 'TEXAS', 'IOWA'],
+        'DISASTER_NAME': ['Flood', 'Hail', 'Flood', 'Wind', 'Flood', 'Flood', 'Hail', 'Wind'],
+        'LOSS': ['1,000', '250', None, '3,500,000', '20', '7', '1,250', '0'],
+        'FATALITIES': [1, None, 0, 2, 3, 0, 1, 0],
+        'UNUSED': ['x'] * 8
+    }).to_csv(path, index=False)
+
+    whole, whole_order = preprocess_noaa_data.read_source(str(path))
+    chunked, chunked_order = preprocess_noaa_data.read_source(str(path), chunksize=4)
+
+    assert len(chunked) == 5
+    pd.testing.assert_frame_equal(chunked.reset_index(drop=True), whole.reset_index(drop=True),
+                                  check_dtype=False)
+    assert chunked_order == whole_order
+    assert json.dumps(aggregate_data(chunked)) == json.dumps(aggregate_data(whole))
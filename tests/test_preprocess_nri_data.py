@@ -0,0 +1,75 @@
+import math
+import os
+import struct
+
+from dbfread import DBF
+
+import preprocess_nri_data
+
+# (name, type, length, decimals)
+FIELDS = [
+    ('STATE', 'C', 16, 0),
+    ('TRACTFIPS', 'C', 11, 0),
+    ('RISK_SCORE', 'N', 10, 2),
+    ('SOVI_SCORE', 'F', 12, 4),
+    ('EAL_VALT', 'N', 14, 1),
+]
+
+# (deleted, values) with blank, '*'-padded and comma-decimal numbers
+RECORDS = [
+    (False, ['texas', '48201000100', '12.50', '0.1234', '1000.5']),
+    (False, ['TEXAS', '48201000200', '', '-1.5000', '**********']),
+    (True, ['Florida', '12086000100', '99.00', '9.0000', '9.0']),
+    (False, ['Florida', '12086000200', '*****', '', '12,5']),
+    (False, ['São Tomé', '00000000000', '7', '3', '0']),
+    (False, ['', '', '0.00', '0.0000', '0.0']),
+]
+
+def write_dbf(path, fields, records):
+    """
+    Writes a minimal dBase III table: header, field descriptors and
+    fixed-width records, numbers right-aligned and text left-aligned.
+    """
+    recordlen = 1 + sum(length for _, _, length, _ in fields)
+    headerlen = 32 + 32 * len(fields) + 1
+    with open(path, 'wb') as f:
+        f.write(struct.pack('<B3BIHH20x', 3, 124, 1, 1, len(records), headerlen, recordlen))
+        for name, kind, length, decimals in fields:
+            f.write(struct.pack('<11sc4xBB14x', name.encode('ascii'), kind.encode('ascii'), length, decimals))
+        f.write(b'\r')
+        for deleted, values in records:
+            f.write(b'*' if deleted else b' ')
+            for (_, kind, length, _), value in zip(fields, values):
+                raw = value.encode('cp1252')
+                f.write(raw.ljust(length) if kind == 'C' else raw.rjust(length))
+        f.write(b'\x1a')
+
+def test_outputs_are_where_the_server_reads_them():
+    import serve_dashboard
+
+    assert preprocess_nri_data.TRACTS_DIR == serve_dashboard.NRI_TRACTS_DIR
+    assert preprocess_nri_data.OUTPUT_JSON == os.path.join(serve_dashboard.DIRECTORY, "datasets", "nri_data.json")
+
+def test_memmap_reader_matches_dbfread_records(tmp_path, monkeypatch):
+    # Several worker tasks, so records are decoded across task boundaries
+    monkeypatch.setattr(preprocess_nri_data, "RECORDS_PER_TASK", 2)
+    path = str(tmp_path / "tracts.dbf")
+    write_dbf(path, FIELDS, RECORDS)
+
+    names = {name for name, _, _, _ in FIELDS} | {'MISSING_FIELD'}
+    columns, valid = preprocess_nri_data.read_nri_columns(
+        path, names, char_fields={'STATE', 'TRACTFIPS'}, workers=1, with_valid=True)
+
+    assert valid.tolist() == [not deleted for deleted, _ in RECORDS]
+    assert 'MISSING_FIELD' not in columns
+
+    records = list(DBF(path, encoding='cp1252'))
+    assert len(records) == len(columns['STATE']) == 5
+    for i, record in enumerate(records):
+        for name, kind, _, _ in FIELDS:
+            if kind == 'C':
+                assert columns[name][i].decode('cp1252') == record[name]
+            elif record[name] is None:
+                assert math.isnan(columns[name][i])
+            else:
+                assert columns[name][i] == float(record[name])
@@ -0,0 +1,88 @@
+import csv
+import json
+
+import dataset_io
+import preprocess_predictions
+
+def baseline_predictions(input_file):
+    """
+    The original script's aggregation, which scanned a state's event list
+    for each row.
+    """
+    predictions_data = {"2025": {}}
+
+    with open(input_file, 'r', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            state = row['STATE'].title()
+            if state not in predictions_data["2025"]:
+                predictions_data["2025"][state] = {"loss": 0, "fatalities": 0, "events": []}
+
+            try:
+                loss = float(row['predicted_loss']) if row['predicted_loss'] else 0
+                fatalities = int(float(row['predicted_fatalities'])) if row['predicted_fatalities'] else 0
+                event_type = row['most_likely_disaster']
+                month = int(row['month'])
+
+                predictions_data["2025"][state]["loss"] += loss
+                predictions_data["2025"][state]["fatalities"] += fatalities
+
+                event_found = False
+                for event in predictions_data["2025"][state]["events"]:
+                    if event["type"] == event_type and event.get("month") == month:
+                        event["loss"] += loss
+                        event["fatalities"] += fatalities
+                        event["count"] = event.get("count", 0) + 1
+                        event_found = True
+                        break
+
+                if not event_found:
+                    predictions_data["2025"][state]["events"].append({
+                        "type": event_type, "month": month, "loss": loss, "fatalities": fatalities, "count": 1
+                    })
+            except (ValueError, KeyError):
+                continue
+
+    for state in predictions_data["2025"]:
+        predictions_data["2025"][state]["events"].sort(key=lambda x: x["loss"], reverse=True)
+
+    return json.dumps(predictions_data, indent=2)
+
+def write_rows(path, rows):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['month', 'STATE', 'predicted_fatalities', 'predicted_loss', 'most_likely_disaster'])
+        writer.writerows(rows)
+
+def test_output_is_byte_identical_to_original_script(tmp_path):
+    # Repeated (state, type, month) keys, tied losses, blank and bad values
+    input_file = tmp_path / "predictions.csv"
+    write_rows(input_file, [
+        [1, 'TEXAS', '1', '100.5', 'Hail'],
+        [1, 'texas', '2.7', '100.5', 'Flood'],
+        [2, 'TEXAS', '', '0.1', 'Hail'],
+        [1, 'TEXAS', '0', '0.2', 'Hail'],
+        [1, 'FLORIDA', '0', '', 'Hurricane'],
+        ['x', 'FLORIDA', '3', '5', 'Hurricane'],
+        [3, 'FLORIDA', '0', '5', 'Tornado'],
+        [3, 'NEW YORK', '0', '5', 'Tornado'],
+        [3, 'Florida', '1', '0.3', 'Tornado'],
+    ])
+    output_file = tmp_path / "predictions_data.json"
+
+    preprocess_predictions.preprocess_predictions(str(input_file), str(output_file))
+    assert output_file.read_text(encoding='utf-8') == baseline_predictions(input_file)
+
+def test_committed_dataset_regenerates_byte_identical(tmp_path):
+    output_file = tmp_path / "predictions_data.json"
+    preprocess_predictions.preprocess_predictions(preprocess_predictions.INPUT_FILE, str(output_file))
+
+    with open(preprocess_predictions.OUTPUT_FILE, 'rb') as f:
+        committed = f.read()
+    assert output_file.read_bytes() == committed
+    assert output_file.read_text(encoding='utf-8') == baseline_predictions(preprocess_predictions.INPUT_FILE)
+
+    # So are its columnar twin and manifest entry
+    with open(preprocess_predictions.columnar_path(preprocess_predictions.OUTPUT_FILE), 'rb') as f:
+        assert (tmp_path / "predictions_data.bin").read_bytes() == f.read()
+    with open(f"{dataset_io.DATASET_DIR}/{dataset_io.MANIFEST_NAME}") as f:
+        assert json.load(f)["predictions_data.json"]["hash"] == dataset_io.content_hash(committed)
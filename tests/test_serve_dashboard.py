@@ -0,0 +1,65 @@
+import json
+import os
+
+import dataset_io
+import preprocess_noaa_data
+import preprocess_nri_data
+import preprocess_predictions
+import serve_dashboard
+
+def manifest():
+    with open(os.path.join(dataset_io.DATASET_DIR, dataset_io.MANIFEST_NAME)) as f:
+        return json.load(f)
+
+def test_all_outputs_share_the_served_manifest():
+    for path in (preprocess_noaa_data.OUTPUT_JSON, preprocess_nri_data.OUTPUT_JSON,
+                 preprocess_predictions.OUTPUT_FILE):
+        assert os.path.dirname(path) == dataset_io.DATASET_DIR
+    assert dataset_io.DATASET_DIR == os.path.join(serve_dashboard.DIRECTORY, "datasets")
+
+def test_only_the_manifest_hash_is_cached_forever(start_server):
+    request = start_server()
+    version = manifest()["nri_data.json"]["hash"]
+
+    for query, expected in ((f"?v={version}", serve_dashboard.IMMUTABLE_CACHE),
+                            ("?v=1760000000000", serve_dashboard.REVALIDATE_CACHE),
+                            ("?nov=1", serve_dashboard.REVALIDATE_CACHE),
+                            ("", serve_dashboard.REVALIDATE_CACHE)):
+        status, headers, _ = request("GET", "/datasets/nri_data.json" + query)
+        assert status == 200
+        assert headers["Cache-Control"] == expected
+
+def test_detail_levels_are_cached_forever_under_all_level_hashes(start_server):
+    request = start_server()
+    entries = manifest()
+    version = ".".join(entries[name]["hash"] for name in sorted(entries)
+                       if name.startswith("us-states-") and name.endswith(".topo.json"))
+
+    status, headers, _ = request("GET", f"/datasets/us-states.topo.json?zoom=4&v={version}")
+    assert status == 200
+    assert headers["X-Detail-Level"] == "low"
+    assert headers["Cache-Control"] == serve_dashboard.IMMUTABLE_CACHE
+
+    status, headers, _ = request("GET", f"/datasets/us-states.topo.json?zoom=4&v={version.split('.')[0]}")
+    assert headers["Cache-Control"] == serve_dashboard.REVALIDATE_CACHE
+
+class FailingStreamClient:
+    cache = None
+
+    def chat_stream(self, message, context):
+        yield {"token": "Hello"}
+        raise RuntimeError("upstream went away")
+
+def test_chat_stream_errors_are_sent_as_events(start_server, monkeypatch):
+    monkeypatch.setattr(serve_dashboard.chatbot_api, "get_default_client", lambda: FailingStreamClient())
+    request = start_server()
+
+    body = json.dumps({"message": "Hi", "context": "", "stream": True})
+    status, headers, payload = request("POST", "/api/chat", body, {"Content-Type": "application/json"})
+
+    assert status == 200
+    assert headers["Content-Type"].startswith("text/event-stream")
+    events = [frame.split("\n") for frame in payload.decode('utf-8').strip().split("\n\n")]
+    assert [e[0] for e in events] == ["event: token", "event: error"]
+    assert json.loads(events[1][1][len("data: "):]) == {"error": "upstream went away"}
+    assert b"HTTP/1." not in payload
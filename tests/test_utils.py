@@ -0,0 +1,56 @@
+import json
+
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LogisticRegression
+
+import utils
+
+def write_features(path, rows=500, seed=0):
+    """
+    A features.csv-like table: continuous floats with more precision than
+    float32 holds, small integers and 0/1 flags.
+    """
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'magnitude_normalized': rng.random(rows) * 1e-3 + 0.1234567890123,
+        'duration_hours': rng.gamma(2.0, 10.0, rows),
+        'month': rng.integers(1, 13, rows),
+        'disaster_type_flood': rng.integers(0, 2, rows)
+    })
+    df.to_csv(path, index=False)
+    return pd.read_csv(path)
+
+def test_cached_features_match_csv_parse(tmp_path):
+    csv = write_features(tmp_path / "features.csv")
+
+    built = utils.load_table(str(tmp_path / "features.csv"))
+    cached = utils.load_table(str(tmp_path / "features.csv"))
+
+    for df in (built, cached):
+        assert list(df.columns) == list(csv.columns)
+        for col in ('magnitude_normalized', 'duration_hours'):
+            assert df[col].dtype == np.float64
+            np.testing.assert_array_equal(df[col].to_numpy(), csv[col].to_numpy())
+        for col in ('month', 'disaster_type_flood'):
+            np.testing.assert_array_equal(df[col].to_numpy(), csv[col].to_numpy())
+
+def test_cached_features_give_identical_predictions(tmp_path):
+    csv = write_features(tmp_path / "features.csv")
+    utils.load_table(str(tmp_path / "features.csv"))
+    cached = utils.load_table(str(tmp_path / "features.csv"))
+
+    y = (csv['duration_hours'] > csv['duration_hours'].median()).astype(int)
+    model = LogisticRegression(max_iter=1000).fit(csv, y)
+    np.testing.assert_array_equal(model.predict_proba(cached), model.predict_proba(csv))
+
+def test_cache_from_older_version_is_rebuilt(tmp_path):
+    write_features(tmp_path / "features.csv")
+    utils.load_table(str(tmp_path / "features.csv"))
+    meta_path = tmp_path / utils.CACHE_DIRNAME / "features.csv" / "meta.json"
+
+    with open(meta_path) as f:
+        meta = json.load(f)
+    assert utils.cache_is_fresh(meta, str(tmp_path / "features.csv"))
+    meta["version"] = utils.CACHE_VERSION - 1
+    assert not utils.cache_is_fresh(meta, str(tmp_path / "features.csv"))